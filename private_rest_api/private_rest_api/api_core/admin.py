@@ -3,7 +3,11 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
 # Importing the User Model Object:
-from .models import CustomUser
+from .models import CustomUser, IngestionRun, IngestionStage
 
 # Registering the Custom User Model to the admin dash:
-admin.site.register(CustomUser, UserAdmin)
\ No newline at end of file
+admin.site.register(CustomUser, UserAdmin)
+
+# Registering the ingestion ledger models:
+admin.site.register(IngestionRun)
+admin.site.register(IngestionStage)
@@ -0,0 +1,217 @@
+# Importing django methods:
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+# Importing native packages:
+import functools
+import hashlib
+import time
+from datetime import datetime, timezone
+
+# Importing the ingestion models:
+from .models import IngestionRun
+
+# The data sources whose views are cached by 'ingestion_cached_view', reported by 'get_cache_stats':
+CACHED_SOURCES = []
+
+def ingestion_conditional_view(source, max_age=None):
+    """Decorator of the DRF api views of a data source that answers conditional GET requests.
+
+    The data of a source only changes when one of its ingestion runs finishes, so the finish time of the
+    latest run (the 'IngestionRun.data_version') is used as the version of the data. The ETag of a response
+    is a hash of the version, the query parameters and the format of the response and the Last-Modified
+    date is the version. Requests whose If-None-Match or If-Modified-Since headers match the current version
+    are answered with a 304 before the view runs, so a client polling an unchanged dataset only costs a
+    cache read of the data version.
+
+    Views whose data also changes with time (eg: the posts of the last 24 hours) set a 'max_age'. Their version
+    is the start of the current 'max_age' window if it is later than the data version, so their responses are
+    revalidated at least once per window even if no ingestion run finished.
+
+    The decorator is applied below the 'api_view' decorator so that requests are authenticated and the
+    format of the response negotiated before the conditional headers are checked:
+
+        @api_view(["GET"])
+        @ingestion_conditional_view("reddit")
+        def reddit_posts(request):
+
+    Args:
+        source (str): The data source (the 'source' of its IngestionRuns) eg: 'reddit' or 'twitter'.
+
+        max_age (int|None): The maximum number of seconds that the version of a response is used for.
+
+    Returns:
+        function: The decorator of the view.
+
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def conditional_view(request, *args, **kwargs):
+            last_modified = get_view_version(source, max_age)
+            etag = get_ingestion_etag(request, source, last_modified)
+            last_modified = int(last_modified.timestamp()) if last_modified is not None else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+
+            if response.status_code in (200, 304):
+                response["ETag"] = etag
+                if last_modified is not None:
+                    response["Last-Modified"] = http_date(last_modified)
+
+            return response
+
+        return conditional_view
+
+    return decorator
+
+def ingestion_cached_view(source, max_age=None):
+    """Decorator of the DRF api views of a data source that caches the data of their responses.
+
+    Responses are cached under a key made of the data version of the source (the 'IngestionRun.data_version')
+    and the normalized url of the request, so the same filtered page (eg: 'politics, last 7 days, page 1')
+    is only queried once between two ingestion runs. Finishing an ingestion run bumps the data version so
+    the responses cached for the previous version are no longer read, they expire after the 'TIMEOUT' of
+    the cache. The hits and misses of each source are counted in the cache, see 'get_cache_stats'. The 
+    responses of views with a 'max_age' are also keyed by the current 'max_age' window and expire with it.
+
+    Only successful responses are cached. The decorator is applied below the 'api_view' decorator and the
+    'ingestion_conditional_view' decorator, so that requests that are answered with a 304 are not counted:
+
+        @api_view(["GET"])
+        @ingestion_conditional_view("reddit")
+        @ingestion_cached_view("reddit")
+        def reddit_posts(request):
+
+    Args:
+        source (str): The data source (the 'source' of its IngestionRuns) eg: 'reddit' or 'twitter'.
+
+        max_age (int|None): The maximum number of seconds that a response is cached for, see 'ingestion_conditional_view'.
+
+    Returns:
+        function: The decorator of the view.
+
+    """
+    if source not in CACHED_SOURCES:
+        CACHED_SOURCES.append(source)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def cached_view(request, *args, **kwargs):
+            key = get_query_cache_key(request, source, get_view_version(source, max_age))
+            data = cache.get(key)
+            if data is not None:
+                _increment(f"query_cache:{source}:hits")
+                return Response(data)
+
+            _increment(f"query_cache:{source}:misses")
+            response = view(request, *args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                if max_age is None:
+                    cache.set(key, response.data)
+                else:
+                    cache.set(key, response.data, timeout=max_age)
+
+            return response
+
+        return cached_view
+
+    return decorator
+
+def get_view_version(source, max_age=None):
+    """Returns the version of the responses of a view, the data version of its source or, for views with
+    a 'max_age', the start of the current 'max_age' window if it is later.
+
+    Args:
+        source (str): The data source eg: 'reddit'.
+
+        max_age (int|None): The maximum number of seconds that a version is used for.
+
+    Returns:
+        datetime.datetime|None: The version of the responses.
+
+    """
+    version = IngestionRun.data_version(source)
+    if max_age is None:
+        return version
+
+    window_start = datetime.fromtimestamp(time.time() // max_age * max_age, tz=timezone.utc)
+    return window_start if version is None or version < window_start else version
+
+def get_ingestion_etag(request, source, version):
+    """Creates the ETag of a response of a data source from the version of the data, the query parameters
+    and the format of the request.
+
+    Args:
+        request (rest_framework.request.Request): The request of the view.
+
+        source (str): The data source eg: 'reddit'.
+
+        version (datetime.datetime|None): The finish time of the latest ingestion run of the source.
+
+    Returns:
+        str: The quoted ETag.
+
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    validator = repr((source, version.isoformat() if version else None, _normalized_query(request), getattr(renderer, "format", None)))
+
+    return quote_etag(hashlib.md5(validator.encode("utf-8")).hexdigest())
+
+def get_query_cache_key(request, source, version):
+    """Creates the cache key of the response data of a request from the version of the data and the
+    normalized url of the request. The absolute url is part of the key as the pagination links of the
+    responses are absolute urls.
+
+    Args:
+        request (rest_framework.request.Request): The request of the view.
+
+        source (str): The data source eg: 'reddit'.
+
+        version (datetime.datetime|None): The finish time of the latest ingestion run of the source.
+
+    Returns:
+        str: The cache key.
+
+    """
+    query = repr((request.build_absolute_uri(request.path), _normalized_query(request)))
+    version = version.isoformat() if version else None
+
+    return f"query_cache:{source}:{version}:{hashlib.md5(query.encode('utf-8')).hexdigest()}"
+
+def get_cache_stats():
+    """Returns the number of cache hits and misses of the cached views of each data source.
+
+    Returns:
+        dict: The 'hits', 'misses' and 'hit_ratio' of each source in 'CACHED_SOURCES'.
+
+    """
+    counters = cache.get_many([f"query_cache:{source}:{counter}" for source in CACHED_SOURCES for counter in ("hits", "misses")])
+    stats = {}
+    for source in CACHED_SOURCES:
+        hits = counters.get(f"query_cache:{source}:hits", 0)
+        misses = counters.get(f"query_cache:{source}:misses", 0)
+        stats[source] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None
+        }
+
+    return stats
+
+def _normalized_query(request):
+    """Returns the query parameters of a request sorted by name and value so that the same query in a
+    different parameter order is treated as the same query."""
+    return sorted((key, sorted(values)) for key, values in request.query_params.lists())
+
+def _increment(key):
+    """Increments a counter stored in the cache, creating it if it does not exist."""
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # The counter was evicted between the add and the incr:
+            cache.add(key, 1, timeout=None)
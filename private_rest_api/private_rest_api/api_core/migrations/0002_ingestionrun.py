@@ -0,0 +1,53 @@
+# Generated by Django 3.1.4 on 2026-10-18 12:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('run_id', models.UUIDField(default=uuid.uuid4, unique=True)),
+                ('source', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('started_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_on', models.DateTimeField(null=True)),
+                ('wall_time', models.FloatField(null=True)),
+                ('api_calls', models.IntegerField(default=0)),
+                ('rows_written', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Ingestion Runs',
+                'db_table': 'ingestionruns',
+                'ordering': ['-started_on'],
+            },
+        ),
+        migrations.CreateModel(
+            name='IngestionStage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('target', models.CharField(blank=True, max_length=250, null=True)),
+                ('started_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('wall_time', models.FloatField(default=0)),
+                ('api_calls', models.IntegerField(default=0)),
+                ('rows', models.IntegerField(default=0)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stages', to='api_core.ingestionrun')),
+            ],
+            options={
+                'verbose_name_plural': 'Ingestion Stages',
+                'db_table': 'ingestionstages',
+            },
+        ),
+    ]
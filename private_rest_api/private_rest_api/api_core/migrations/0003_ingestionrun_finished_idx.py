@@ -0,0 +1,17 @@
+# Generated by Django 3.1.4 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_core', '0002_ingestionrun'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingestionrun',
+            index=models.Index(fields=['source', '-finished_on'], name='ingestionrun_finished_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.4 on 2026-10-18 12:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_core', '0003_ingestionrun_finished_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestionstage',
+            name='error',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
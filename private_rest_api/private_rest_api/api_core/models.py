@@ -1,6 +1,241 @@
 # Native Django Imports:
 from django.contrib.auth.models import AbstractUser
+from django.db import models
+from django.utils import timezone
+from django.core.cache import cache
+
+# Importing native packages:
+import time
+import uuid
+from contextlib import contextmanager
 
 # Custom User for future-proofing / best practices:
 class CustomUser(AbstractUser):
     pass
+
+class IngestionRun(models.Model):
+    """The database model that records a single run of a data ingestion pipeline (eg: one execution
+    of the 'perform_reddit_ingestion' celery task). It is the parent of the IngestionStage records
+    that time each stage of the run.
+
+    Attributes:
+        run_id (models.UUIDField): The unique id of the run. It is passed between the celery tasks of
+            a run and recorded on the data written by the run (eg: the RedditPostSnapshot rows).
+
+        source (models.CharField): The data source that was ingested eg: 'reddit' or 'twitter'.
+
+        status (models.CharField): The status of the run, 'running', 'succeeded' or 'failed'.
+
+        started_on (models.DateTimeField): The UTC date and time the run started.
+
+        finished_on (models.DateTimeField): The UTC date and time the run finished.
+
+        wall_time (models.FloatField): The number of seconds between the start and the end of the run.
+
+        api_calls (models.IntegerField): The number of API requests made by all stages of the run.
+
+        rows_written (models.IntegerField): The number of database rows inserted or updated by the run.
+
+        error (models.TextField): The errors of the run, if any of its stages failed.
+    """
+    STATUS_CHOICES = [
+        ("running", "Running"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed")
+    ]
+
+    run_id = models.UUIDField(default=uuid.uuid4, unique=True)
+    source = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="running")
+    started_on = models.DateTimeField(default=timezone.now)
+    finished_on = models.DateTimeField(null=True)
+    wall_time = models.FloatField(null=True)
+    api_calls = models.IntegerField(default=0)
+    rows_written = models.IntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        db_table = "ingestionruns"
+        verbose_name_plural = "Ingestion Runs"
+        ordering = ["-started_on"]
+        indexes = [
+            # The latest finished run of a source is looked up by every conditional GET of the data APIs:
+            models.Index(fields=["source", "-finished_on"], name="ingestionrun_finished_idx")
+        ]
+
+    # The cache key of the data version of a source:
+    DATA_VERSION_KEY = "data_version:{source}"
+
+    @classmethod
+    def data_version(cls, source):
+        """Returns the version of the data of a source, the finish time of its latest run. The version is
+        stored in the cache when a run finishes so that the data APIs can read it without a database 
+        query, it is read from the database if it is not in the cache. The version expires with the 
+        'TIMEOUT' of the cache, so if redis was unavailable when a run finished the stale version is only 
+        used until then.
+
+        Args:
+            source (str): The data source eg: 'reddit' or 'twitter'.
+
+        Returns:
+            datetime.datetime|None: The finish time of the latest run or None if no run of the source has finished.
+
+        """
+        key = cls.DATA_VERSION_KEY.format(source=source)
+        version = cache.get(key)
+        if version is None:
+            version = cls.last_finished_on(source)
+            # Not overwriting the version of a run that finished while it was read from the database:
+            if version is not None and not cache.add(key, version):
+                version = cache.get(key, version)
+
+        return version
+
+    @classmethod
+    def bump_data_version(cls, source, version=None):
+        """Sets the data version of a source in the cache, which invalidates the cached responses of its data 
+        APIs. It is called when a run finishes and by long running loads after each chunk that they commit 
+        (eg: the 'reddit_backfill' command) so that the data APIs do not serve responses older than the chunk.
+
+        Args:
+            source (str): The data source eg: 'reddit' or 'twitter'.
+
+            version (datetime.datetime|None): The new version. Defaults to now.
+
+        Returns:
+            datetime.datetime: The new version.
+
+        """
+        version = version or timezone.now()
+        cache.set(cls.DATA_VERSION_KEY.format(source=source), version)
+        return version
+
+    @classmethod
+    def last_finished_on(cls, source):
+        """Returns the date and time that the latest run of a data source finished. As the data of a source
+        is only written by its ingestion runs it is used as the version of the data (see 'data_version').
+
+        Args:
+            source (str): The data source eg: 'reddit' or 'twitter'.
+
+        Returns:
+            datetime.datetime|None: The finish time of the latest run or None if no run of the source has finished.
+
+        """
+        return cls.objects.filter(source=source, finished_on__isnull=False).aggregate(
+            last_finished_on=models.Max("finished_on"))["last_finished_on"]
+
+    @property
+    def rows_per_second(self):
+        """float: The throughput of the run in rows written per second of wall time."""
+        if not self.wall_time:
+            return None
+        return self.rows_written / self.wall_time
+
+    def finish(self, error=None):
+        """Marks the run as finished, totalling the API calls and rows written by its stages.
+
+        Args:
+            error (str|None): The errors of the run. The run is marked as failed if provided.
+
+        """
+        totals = self.stages.aggregate(api_calls=models.Sum("api_calls"))
+        self.api_calls = totals["api_calls"] or 0
+        self.rows_written = self.stages.filter(name="write").aggregate(rows=models.Sum("rows"))["rows"] or 0
+
+        self.finished_on = timezone.now()
+        self.wall_time = (self.finished_on - self.started_on).total_seconds()
+        self.status = "failed" if error else "succeeded"
+        self.error = error
+        self.save()
+
+        # Bumping the data version of the source, which invalidates the cached responses of its data APIs:
+        self.bump_data_version(self.source, self.finished_on)
+
+    def __str__(self):
+        return f"{self.source}-{self.started_on}-{self.status}"
+
+class IngestionStage(models.Model):
+    """The database model that records the timing of one stage of an IngestionRun for a single
+    target of the source (eg: the 'fetch' stage of a subreddit or the 'write' stage of a location).
+
+    Attributes:
+        run (models.ForeignKey): The ingestion run the stage is part of.
+
+        name (models.CharField): The name of the stage, 'fetch', 'serialize' or 'write'.
+
+        target (models.CharField): The subreddit, location etc that the stage processed.
+
+        started_on (models.DateTimeField): The UTC date and time the stage started.
+
+        wall_time (models.FloatField): The number of seconds the stage took.
+
+        api_calls (models.IntegerField): The number of API requests made by the stage.
+
+        rows (models.IntegerField): The number of rows handled by the stage. The records extracted by
+            a 'fetch' stage, serialized by a 'serialize' stage and written by a 'write' stage.
+
+        error (models.TextField): The error raised by the stage, if it failed.
+    """
+    run = models.ForeignKey(IngestionRun, on_delete=models.CASCADE, related_name="stages")
+    name = models.CharField(max_length=50)
+    target = models.CharField(max_length=250, null=True, blank=True)
+    started_on = models.DateTimeField(default=timezone.now)
+    wall_time = models.FloatField(default=0)
+    api_calls = models.IntegerField(default=0)
+    rows = models.IntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        db_table = "ingestionstages"
+        verbose_name_plural = "Ingestion Stages"
+
+    @property
+    def rows_per_second(self):
+        """float: The throughput of the stage in rows per second."""
+        if not self.wall_time:
+            return None
+        return self.rows / self.wall_time
+
+    def __str__(self):
+        return f"{self.run}-{self.name}-{self.target}"
+
+@contextmanager
+def track_stage(ingestion_run, name, target=None, rate_limiter=None):
+    """Context manager that times a stage of an ingestion run and saves it as an IngestionStage
+    once the block exits. The caller sets the 'rows' (and optionally 'api_calls') of the yielded stage.
+
+        with track_stage(ingestion_run, "write", target=subreddit.name) as stage:
+            stage.rows = write_rows(rows)
+
+    If the block raises, the stage is saved with the error and the exception is re-raised. Nothing is
+    saved if 'ingestion_run' is None, so extraction methods can be called without a run.
+
+    Args:
+        ingestion_run (IngestionRun|None): The run that the stage is part of.
+
+        name (str): The name of the stage.
+
+        target (str|None): The subreddit, location etc that the stage processes.
+
+        rate_limiter (RedditRateLimiter|None): If provided, the tokens it acquires during the stage
+            are counted as the API calls of the stage.
+
+    Yields:
+        IngestionStage: The unsaved stage.
+
+    """
+    stage = IngestionStage(run=ingestion_run, name=name, target=target)
+    acquired = rate_limiter.acquired if rate_limiter is not None and ingestion_run is not None else 0
+    start = time.perf_counter()
+    try:
+        yield stage
+    except BaseException as exc:
+        stage.error = repr(exc)
+        raise
+    finally:
+        stage.wall_time = time.perf_counter() - start
+        if ingestion_run is not None:
+            if rate_limiter is not None:
+                stage.api_calls += rate_limiter.acquired - acquired
+            stage.save()
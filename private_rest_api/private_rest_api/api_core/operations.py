@@ -0,0 +1,29 @@
+# Importing django migration operations:
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db.migrations.operations import AddIndex
+
+class AddIndexConcurrentlyIfPostgres(AddIndexConcurrently):
+    """An AddIndexConcurrently operation that builds the index with CREATE INDEX CONCURRENTLY on postgres, so
+    that the ingestion pipelines can keep writing to the table while the index is built, and as a plain index
+    on the other database backends (eg: the sqlite database of the tests). Like AddIndexConcurrently it must
+    be run in a migration with 'atomic = False':
+
+        class Migration(migrations.Migration):
+            atomic = False
+
+            operations = [
+                AddIndexConcurrentlyIfPostgres(model_name="redditposts", index=models.Index(...)),
+            ]
+
+    """
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+        return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+        return super().database_backwards(app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,50 @@
+# Importing pagination methods:
+from rest_framework import pagination
+from django.core.paginator import Paginator
+
+# Importing native packages:
+import functools
+
+class ValuesPaginator(Paginator):
+    """A Paginator of a model queryset whose pages are read as the '.values()' rows of a list of lookups.
+
+    The rows are counted on the model queryset and only the slice of the requested page is converted
+    into values rows. The joins that read related values (eg: 'subreddit__name') are LEFT OUTER joins
+    that do not change the number of rows, but counting through them stops postgres from counting the
+    rows with an index.
+
+    Args:
+        lookups (lst [str]): The '.values()' lookups of the rows of a page.
+
+    """
+    def __init__(self, object_list, per_page, lookups=(), **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.lookups = lookups
+
+    def _get_page(self, object_list, *args, **kwargs):
+        return super()._get_page(object_list.values(*self.lookups), *args, **kwargs)
+
+class ValuesPageNumberPagination(pagination.PageNumberPagination):
+    """A PageNumberPagination that can paginate a model queryset as '.values()' rows, used by the
+    list endpoints that serialize rows with 'DynamicFieldsModelSerializer.represent_values':
+
+        lookups = RedditPostsSerializer.values_lookups(fields)
+        rows = paginator.paginate_values(queryset, lookups, request)
+
+    """
+    def paginate_values(self, queryset, lookups, request, view=None):
+        """Paginates a model queryset, reading the rows of the page as '.values()' rows.
+
+        Args:
+            queryset (models.QuerySet): The (filtered) model queryset.
+
+            lookups (lst [str]): The '.values()' lookups of the rows.
+
+            request (rest_framework.request.Request): The request of the list endpoint.
+
+        Returns:
+            lst [dict]|None: The values rows of the page or None if the request is not paginated.
+
+        """
+        self.django_paginator_class = functools.partial(ValuesPaginator, lookups=lookups)
+        return self.paginate_queryset(queryset, request, view)
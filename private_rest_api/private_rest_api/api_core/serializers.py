@@ -0,0 +1,129 @@
+# Importing serializer methods:
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """A ModelSerializer that accepts an additional 'fields' argument restricting the fields that
+    are serialized, used by the list endpoints to implement the 'fields' query parameter:
+
+        fields = RedditPostsSerializer.get_requested_fields(request)
+        rows = queryset.values(*RedditPostsSerializer.values_lookups(fields))
+        data = RedditPostsSerializer(fields=fields).represent_values(rows)
+
+    The 'values_lookups' method restricts the columns read from the database to the requested fields
+    so large columns that are not requested (eg: the content of reddit posts) are neither read from
+    the database nor sent to the client. The 'represent_values' method serializes the rows without 
+    creating model instances, which is several times faster than serializing the instances.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+
+        # Dropping the fields that were not requested:
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    @classmethod
+    def get_requested_fields(cls, request):
+        """Parses the comma separated 'fields' query parameter of a request.
+
+        Args:
+            request (rest_framework.request.Request): The request of the list endpoint.
+
+        Returns:
+            lst [str]|None: The requested field names or None if all fields are requested.
+
+        Raises:
+            ValidationError: If a requested field is not a field of the serializer.
+
+        """
+        fields = request.query_params.get("fields")
+        if not fields:
+            return None
+
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+        serializer_fields = cls().fields
+        unknown_fields = [field for field in fields if field not in serializer_fields]
+        if unknown_fields:
+            raise ValidationError({
+                "fields": f"Unknown fields {', '.join(unknown_fields)}, the supported fields are {', '.join(serializer_fields)}"})
+
+        return fields
+
+    @classmethod
+    def values_lookups(cls, fields=None, required_fields=None):
+        """Returns the '.values()' lookups of the columns read by the requested serializer fields. The related
+        fields (eg: 'subreddit.name') are read as joined columns (eg: 'subreddit__name') so the rows are read
+        without creating model instances.
+
+        Args:
+            fields (lst [str]|None): The requested field names, all fields of the serializer are read if None.
+
+            required_fields (lst [str]|None): Additional model field lookups that are always read eg: the
+                fields that a pagination orders by.
+
+        Returns:
+            lst [str]: The lookups of the values rows.
+
+        """
+        lookups = [_source_lookup(field) for field in cls(fields=fields).fields.values()]
+        return list(dict.fromkeys(lookups + list(required_fields or [])))
+
+    def represent_values(self, rows):
+        """Serializes the values rows of the 'values_lookups' into the same dicts that the serializer creates
+        from model instances. The values of fields whose representation is the database value (strings, numbers,
+        booleans and json) are copied as is, the other values are converted by their serializer field.
+
+        Args:
+            rows (iterable [dict]): The values rows.
+
+        Returns:
+            lst [dict]: The serialized rows.
+
+        """
+        model = self.Meta.model
+        converters = []
+        for field_name, field in self.fields.items():
+            lookup = _source_lookup(field)
+            if isinstance(field, _PASSTHROUGH_FIELDS) and not getattr(field, "binary", False):
+                converter = None
+            elif isinstance(field, serializers.FileField):
+                converter = _file_converter(field, model._meta.get_field(lookup))
+            else:
+                converter = field.to_representation
+
+            converters.append((field_name, lookup, converter))
+
+        return [
+            {
+                field_name: row[lookup] if converter is None or row[lookup] is None else converter(row[lookup])
+                for field_name, lookup, converter in converters
+            }
+            for row in rows
+        ]
+
+# The serializer fields that represent database values as they are:
+_PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.FloatField, serializers.BooleanField,
+    serializers.NullBooleanField, serializers.JSONField, serializers.ReadOnlyField)
+
+def _source_lookup(field):
+    """Converts the source of a serializer field into a queryset lookup eg: 'subreddit.name' to 'subreddit__name'.
+
+    Raises:
+        ValueError: If the field serializes the whole object (source="*") and can not be read as a column.
+
+    """
+    if field.source == "*":
+        raise ValueError(f"The field {field.field_name} has source='*' and can not be read from a values queryset")
+
+    return field.source.replace(".", "__")
+
+def _file_converter(field, model_field):
+    """Creates the converter of a file field, wrapping the stored file name in the model field's FieldFile so
+    that the file field creates the same url as it does for a model instance."""
+    def convert(name):
+        return field.to_representation(model_field.attr_class(None, model_field, name))
+
+    return convert
@@ -1,2 +1,67 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.utils import timezone
 
+# Importing native packages:
+from datetime import timedelta
+from types import SimpleNamespace
+
+# Importing the ingestion run ledger:
+from .models import IngestionRun, IngestionStage, track_stage
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "ingestion-runs"}})
+class IngestionRunTest(TestCase):
+    """Records ingestion runs and the stages of each run."""
+    def setUp(self):
+        cache.clear()
+        self.ingestion_run = IngestionRun.objects.create(source="reddit", started_on=timezone.now() - timedelta(seconds=10))
+
+    def test_finish_totals_the_stages_and_bumps_the_data_version(self):
+        self.assertIsNone(IngestionRun.data_version("reddit"))
+        for name, api_calls, rows in [("fetch", 2, 50), ("serialize", 1, 50), ("write", 0, 30), ("write", 0, 20)]:
+            IngestionStage.objects.create(run=self.ingestion_run, name=name, api_calls=api_calls, rows=rows)
+
+        self.ingestion_run.finish()
+        self.ingestion_run.refresh_from_db()
+
+        self.assertEqual(
+            (self.ingestion_run.status, self.ingestion_run.api_calls, self.ingestion_run.rows_written, self.ingestion_run.error),
+            ("succeeded", 3, 50, None))
+        self.assertGreaterEqual(self.ingestion_run.wall_time, 10)
+        self.assertEqual(IngestionRun.data_version("reddit"), self.ingestion_run.finished_on)
+
+        # The version is read from the database once it is no longer cached:
+        cache.clear()
+        self.assertEqual(IngestionRun.data_version("reddit"), self.ingestion_run.finished_on)
+        self.assertIsNone(IngestionRun.data_version("twitter"))
+
+    def test_finish_with_an_error_fails_the_run(self):
+        self.ingestion_run.finish(error="politics: RuntimeError()")
+        self.ingestion_run.refresh_from_db()
+        self.assertEqual((self.ingestion_run.status, self.ingestion_run.error), ("failed", "politics: RuntimeError()"))
+
+    def test_stage_counts_the_rate_limiter_tokens(self):
+        rate_limiter = SimpleNamespace(acquired=5)
+        with track_stage(self.ingestion_run, "fetch", "politics", rate_limiter) as stage:
+            rate_limiter.acquired += 3
+            stage.rows = 10
+
+        stage = IngestionStage.objects.get()
+        self.assertEqual((stage.run, stage.name, stage.target, stage.api_calls, stage.rows, stage.error),
+            (self.ingestion_run, "fetch", "politics", 3, 10, None))
+        self.assertGreater(stage.wall_time, 0)
+
+    def test_stage_that_raises_is_recorded_with_its_error(self):
+        with self.assertRaises(RuntimeError):
+            with track_stage(self.ingestion_run, "write", "politics") as stage:
+                stage.rows = 10
+                raise RuntimeError("write failed")
+
+        stage = IngestionStage.objects.get()
+        self.assertEqual((stage.name, stage.rows, stage.error), ("write", 10, "RuntimeError('write failed')"))
+
+    def test_stage_without_a_run_is_not_saved(self):
+        with track_stage(None, "fetch", "politics", SimpleNamespace(acquired=0)) as stage:
+            stage.rows = 10
+
+        self.assertFalse(IngestionStage.objects.exists())
@@ -1,7 +1,11 @@
 # Native Django Packages:
 from django.urls import path, include
 
+# Importing API Core views:
+from .views import query_cache_stats
+
 urlpatterns = [
     path("", include("djoser.urls")),
-    path("", include("djoser.urls.authtoken"))
+    path("", include("djoser.urls.authtoken")),
+    path("cache_stats/", query_cache_stats, name="Query Cache Stats")
 ]
\ No newline at end of file
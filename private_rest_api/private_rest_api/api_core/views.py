@@ -1,3 +1,24 @@
-from django.shortcuts import render
+# DRF Imports:
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 
-# Create your views here.
+# Importing the query cache methods:
+from .caching import get_cache_stats
+
+# Importing schema documentation methods:
+from drf_yasg.utils import swagger_auto_schema
+
+schema_description = "The endpoint that reports the hits and misses of the query result cache of the data APIs for each data source."
+@swagger_auto_schema(method="get", operation_description=schema_description)
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def query_cache_stats(request):
+    """The API view that returns the number of hits and misses of the query result cache of each 
+    data source (eg: the 'reddit' posts and 'twitter' trending topics endpoints) and their hit ratio.
+    
+    The counters are stored in the cache, they are shared by every process of the API and are only 
+    reset if the cache is flushed.
+
+    """
+    return Response(get_cache_stats())
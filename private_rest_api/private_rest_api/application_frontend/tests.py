@@ -1,3 +1,40 @@
-from django.test import TestCase
+from django.test import TestCase, RequestFactory
+from django.utils import timezone
 
-# Create your tests here.
+# Importing native packages:
+from unittest import mock
+
+# Importing the views and the ingestion run ledger:
+from .views import render_api_dashboard
+from api_core.models import IngestionRun, IngestionStage
+from data_APIs.reddit_api.models import Subreddit, RedditPosts
+
+class ApiDashboardTest(TestCase):
+    """Renders the ingestion graphs of the api dashboard."""
+    def setUp(self):
+        # The reddit posts graph of the dashboard is drawn from the posts of the last month:
+        subreddit = Subreddit.objects.create(name="dashboard")
+        for post_id in ["d1", "d2"]:
+            RedditPosts.objects.create(id=post_id, subreddit=subreddit, title="Dashboard", created_on=timezone.now())
+
+    def render_context(self):
+        with mock.patch("application_frontend.views.render") as render:
+            render_api_dashboard(RequestFactory().get("/paribus/documentation/api_dash"))
+
+        return render.call_args.kwargs["context"]
+
+    def test_runs_without_stages_are_rendered(self):
+        IngestionRun.objects.create(source="reddit").finish()
+
+        context = self.render_context()
+        self.assertIn("ingestion_throughput_timeseries", context)
+        self.assertNotIn("ingestion_latency_timeseries", context)
+
+    def test_stage_latency_is_rendered(self):
+        ingestion_run = IngestionRun.objects.create(source="reddit")
+        IngestionStage.objects.create(run=ingestion_run, name="write", target="politics", wall_time=1.5, rows=10)
+        ingestion_run.finish()
+
+        context = self.render_context()
+        self.assertIn("ingestion_throughput_timeseries", context)
+        self.assertIn("ingestion_latency_timeseries", context)
@@ -6,6 +6,7 @@ from django.templatetags.static import static
 from django.conf import settings
 from django.db.models.functions import TruncDay, TruncWeek, ExtractWeek, ExtractDay
 from django.db.models import Count, Sum
+from django.utils import timezone
 
 # Importing view logic:
 from .article_logic import get_article_categories, get_article_summary, get_full_article
@@ -14,6 +15,7 @@ from .article_logic import get_article_categories, get_article_summary, get_full
 from data_APIs.articles_api.forms import ArticleForm
 from data_APIs.articles_api.models import Article 
 from data_APIs.reddit_api.models import RedditPosts
+from api_core.models import IngestionRun, IngestionStage
 
 # Importing Frontend asset models:
 from application_frontend.models import SIPRIData
@@ -397,4 +399,60 @@ def render_api_dashboard(request):
 
     context["reddit_posts_timeseries"] = reddit_timeseries_fig.to_html()
 
+    # Querying the ingestion runs that finished in the last month:
+    ingestion_runs = IngestionRun.objects.filter(
+        started_on__gt=timezone.now() - timedelta(days=30), finished_on__isnull=False)
+    ingestion_run_records = ingestion_runs.values_list("started_on", "source", "wall_time", "rows_written")
+    ingestion_dataframe = pd.DataFrame.from_records(
+        ingestion_run_records, columns=["started_on", "source", "wall_time", "rows_written"])
+
+    if not ingestion_dataframe.empty:
+        # Creating the plotly Timeseries graph for the throughput of each ingestion run, runs without a wall time have no throughput:
+        ingestion_dataframe["rows_per_second"] = ingestion_dataframe["rows_written"] / ingestion_dataframe["wall_time"].where(ingestion_dataframe["wall_time"] > 0)
+        throughput_fig = px.line(
+            ingestion_dataframe.sort_values("started_on"),
+            x="started_on",
+            y="rows_per_second",
+            color="source",
+            markers=True
+        )
+        throughput_fig.update_traces(hovertemplate="%{y:.1f} Rows/sec on %{x}")
+        throughput_fig.update_layout(
+            title="Ingestion Throughput in the last Month",
+            xaxis_title="Run Started",
+            yaxis_title="Rows Written per Second",
+            xaxis=dict(showgrid=False),
+            yaxis=dict(showgrid=False),
+            plot_bgcolor="#0d1117"
+        )
+        context["ingestion_throughput_timeseries"] = throughput_fig.to_html()
+
+        # Querying the total wall time of each stage of the runs, summed across subreddits/locations:
+        stage_records = IngestionStage.objects.filter(run__in=ingestion_runs).values(
+            "run__started_on", "run__source", "name").annotate(stage_wall_time=Sum("wall_time"))
+        stage_dataframe = pd.DataFrame.from_records(stage_records)
+
+        # Runs that did not record any stages (eg: a backfill of dumps that were already loaded) have no stage latency:
+        if not stage_dataframe.empty:
+            stage_dataframe["stage"] = stage_dataframe["run__source"] + " " + stage_dataframe["name"]
+
+            # Creating the plotly Timeseries graph for the latency of each ingestion stage:
+            latency_fig = px.line(
+                stage_dataframe.sort_values("run__started_on"),
+                x="run__started_on",
+                y="stage_wall_time",
+                color="stage",
+                markers=True
+            )
+            latency_fig.update_traces(hovertemplate="%{y:.2f} Seconds on %{x}")
+            latency_fig.update_layout(
+                title="Ingestion Stage Latency in the last Month",
+                xaxis_title="Run Started",
+                yaxis_title="Stage Wall Time (Seconds)",
+                xaxis=dict(showgrid=False),
+                yaxis=dict(showgrid=False),
+                plot_bgcolor="#0d1117"
+            )
+            context["ingestion_latency_timeseries"] = latency_fig.to_html()
+
     return render(request, "application_frontend/documentation/api_dashboard.html", context=context)
\ No newline at end of file
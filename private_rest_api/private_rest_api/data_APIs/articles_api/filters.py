@@ -8,8 +8,12 @@ from django_filters import rest_framework as filters
 class ArticleSummaryFilter(filters.FilterSet):
     """Allows Article Summaries to be filtered based on their key charecteristics. 
     Will mainly be used by front-end projects to search for specific types of articles.
+
+    On postgres the 'title' and 'title_icontains' substring filters are served by the GIN trigram
+    indexes of the article title, other database backends scan the table.
     """
     title = filters.CharFilter(field_name="title", lookup_expr="contains")
+    title_icontains = filters.CharFilter(field_name="title", lookup_expr="icontains")
     author = filters.CharFilter(field_name="author__username", lookup_expr="exact")
     category = filters.CharFilter(field_name="category__name", lookup_expr="exact")
    
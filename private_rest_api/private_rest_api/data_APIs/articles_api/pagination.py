@@ -1,8 +1,8 @@
 # Importing pagination methods:
-from rest_framework import pagination
+from api_core.pagination import ValuesPageNumberPagination
 
 # Paginator for article summary content:
-class ArticleSummaryPagination(pagination.PageNumberPagination):
+class ArticleSummaryPagination(ValuesPageNumberPagination):
     """Overrides the default PageNumberPagination to allow for user specific
     query sizes.
     """
@@ -3,6 +3,7 @@ from rest_framework import serializers
 
 # Importing Article Models: 
 from .models import Article, ArticleCategory
+from api_core.serializers import DynamicFieldsModelSerializer
 
 class ArticleSerializer(serializers.ModelSerializer): 
     # Specifying foreign key fields:
@@ -17,7 +18,7 @@ class ArticleSerializer(serializers.ModelSerializer):
         fields = "__all__"
         depth = 1
 
-class ArticleSummarySerializer(serializers.ModelSerializer):
+class ArticleSummarySerializer(DynamicFieldsModelSerializer):
     id = serializers.IntegerField()
     title = serializers.CharField()
     author = serializers.CharField(source="author.username")
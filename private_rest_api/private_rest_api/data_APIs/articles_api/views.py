@@ -49,7 +49,7 @@ class ArticleViewSet(viewsets.ViewSet):
         instead of the ArticleSerializer. This ommits the main body content from each Article object.
 
         The purpose of this endpoint is to provide a way for front-end services to query 'thumbnails' of
-        articles.
+        articles. The 'fields' query parameter restricts the summary to a comma separated list of fields.
 
         Args:
             request (request): The HTTP request object recieved from the query.
@@ -68,13 +68,17 @@ class ArticleViewSet(viewsets.ViewSet):
         if filterset.is_valid():
             queryset = filterset.qs
 
+        # Only reading the requested fields as values rows:
+        fields = ArticleSummarySerializer.get_requested_fields(request)
+        lookups = ArticleSummarySerializer.values_lookups(fields)
+
         # Paginating the queryset:
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
+        paginated_rows = paginator.paginate_values(queryset, lookups, request)
 
-        # Seralizing the Article Queryset through the Summary Serializer to create a summary dataset:
-        seralized_queryset = ArticleSummarySerializer(queryset, many=True, context={'request':request})
+        # Seralizing the Article rows through the Summary Serializer to create a summary dataset:
+        seralized_rows = ArticleSummarySerializer(fields=fields, context={'request':request}).represent_values(paginated_rows)
         
-        return paginator.get_paginated_response(seralized_queryset.data)
+        return paginator.get_paginated_response(seralized_rows)
     
     @swagger_auto_schema(operation_description="The endpoint that allows for the creation of an Article via a POST request.")
     def create(self, request):
@@ -2,8 +2,11 @@
 from django.contrib import admin
 
 # Importing Reddit Models:
-from .models import RedditPosts, Subreddit, RedditDeveloperAccount
+from .models import RedditPosts, RedditAuthor, RedditComment, Subreddit, SubredditIngestionState, RedditDeveloperAccount
 
 admin.site.register(RedditPosts)
+admin.site.register(RedditAuthor)
+admin.site.register(RedditComment)
 admin.site.register(Subreddit)
+admin.site.register(SubredditIngestionState)
 admin.site.register(RedditDeveloperAccount)
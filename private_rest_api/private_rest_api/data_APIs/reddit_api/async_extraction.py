@@ -0,0 +1,242 @@
+# Importing Reddit APIs:
+import asyncpraw
+import praw
+
+# Importing native packages:
+import asyncio
+import logging
+import time
+import uuid
+
+# Importing django methods:
+from django.conf import settings
+from asgiref.sync import sync_to_async
+
+# Importing Reddit Database Models and extraction methods:
+from .models import SubredditIngestionState
+from .data_extraction import ListingMerger, load_subreddit_posts, _get_listing
+from .rate_limiting import RedditRateLimiter
+from api_core.models import IngestionStage
+
+logger = logging.getLogger(__name__)
+
+async def extract_reddit_posts_async(**kwargs):
+    """The asyncio version of the 'extract_reddit_posts' method. The listings of several subreddits
+    are extracted concurrently via asyncpraw so that the wall-clock time of an ingestion run no longer
+    grows with the sum of every API round trip.
+
+    The number of subreddits extracted at the same time is bounded by an asyncio semaphore. Every API
+    request still takes a token from the shared RedditRateLimiter, waiting with 'asyncio.sleep' when
+    the budget is spent so that the other subreddits keep running. The extracted posts are merged and
+    written with the same 'ListingMerger' and 'load_subreddit_posts' used by the synchronous path. The
+    database, author refresh and redis rate limiter calls are blocking so they are run via 'sync_to_async'.
+
+    A subreddit that fails does not cancel the others, its error is returned in its result instead.
+
+    Args:
+        dev_client_id (str): The reddit developer account id.
+
+        dev_secret (str): The secret key for the reddit developer account.
+
+        dev_user_agent (str): The user agent (application description string) of the reddit developer account.
+
+        subreddits (lst [Subreddit]): A list of subreddit objects that will be queried for posts.
+
+        post_filters (lst [str]): The listings (eg: ["top", "hot"]) that are extracted for each subreddit.
+
+        concurrency (int): The maximum number of subreddits extracted at the same time. Defaults to
+            the 'REDDIT_ASYNC_CONCURRENCY' setting.
+
+        praw_config (dict): Optional additional config passed to the asyncpraw and praw Reddit objects (eg: 
+            the config of the replay server in 'replay.py').
+
+        rate_limiter (RedditRateLimiter): Optional rate limiter to use instead of the shared one.
+
+        run_id (uuid.UUID): The id of the ingestion run recorded on the RedditPostSnapshot rows. It
+            defaults to the id of the 'ingestion_run' and a new id is generated if neither is provided.
+
+        ingestion_run (IngestionRun): Optional ingestion run that the stages of each subreddit are recorded
+            on. As the subreddits share a rate limiter the API calls of the serialize stages are approximate.
+
+    Returns:
+        lst [dict]: The result of each subreddit ingestion containing the subreddit, listings, the number
+            of posts inserted and updated and the error if the ingestion failed.
+
+    """
+    # Unpacking kwargs:
+    dev_app_id = kwargs.get("dev_client_id")
+    dev_app_secret = kwargs.get("dev_secret")
+    dev_app_usr_agent = kwargs.get("dev_user_agent")
+
+    subreddits = kwargs.get("subreddits")
+    reddit_filters = kwargs.get("post_filters") or ["top"]
+    concurrency = kwargs.get("concurrency") or settings.REDDIT_ASYNC_CONCURRENCY
+    ingestion_run = kwargs.get("ingestion_run")
+    run_id = kwargs.get("run_id") or (ingestion_run.run_id if ingestion_run else uuid.uuid4())
+
+    # Creating the asyncpraw object used for listings and the praw object used by the blocking author refresh:
+    reddit = asyncpraw.Reddit(
+        client_id = dev_app_id,
+        client_secret = dev_app_secret,
+        user_agent = dev_app_usr_agent,
+        **kwargs.get("praw_config", {})
+    )
+    reddit.read_only = True
+
+    sync_reddit = praw.Reddit(
+        client_id = dev_app_id,
+        client_secret = dev_app_secret,
+        user_agent = dev_app_usr_agent,
+        **kwargs.get("praw_config", {})
+    )
+    sync_reddit.read_only = True
+
+    rate_limiter = kwargs.get("rate_limiter") or RedditRateLimiter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    try:
+        outcomes = await asyncio.gather(
+            *[
+                _extract_subreddit_posts(
+                    reddit, sync_reddit, subreddit, reddit_filters, run_id, rate_limiter, semaphore, ingestion_run)
+                for subreddit in subreddits
+            ],
+            return_exceptions=True
+        )
+    finally:
+        await reddit.close()
+
+    # Building the result of each subreddit, recording the failed ones:
+    results = []
+    for subreddit, outcome in zip(subreddits, outcomes):
+        result = {
+            "subreddit": subreddit.name,
+            "post_filters": reddit_filters,
+            "inserted": 0,
+            "updated": 0,
+            "error": None
+        }
+        if isinstance(outcome, Exception):
+            logger.error(f"Async ingestion of posts for subreddit {subreddit.name} failed", exc_info=outcome)
+            result["error"] = repr(outcome)
+        else:
+            result["inserted"], result["updated"] = outcome
+
+        results.append(result)
+
+    return results
+
+async def _extract_subreddit_posts(
+    reddit, sync_reddit, subreddit, reddit_filters, run_id, rate_limiter, semaphore, ingestion_run=None):
+    """Method that extracts and writes the listings of a single subreddit while holding a slot
+    of the semaphore.
+
+    Args:
+        reddit (asyncpraw.Reddit): The asyncpraw instance used to extract the listings.
+
+        sync_reddit (praw.Reddit): The praw instance used to refresh stale post authors.
+
+        subreddit (Subreddit): The subreddit to extract.
+
+        reddit_filters (lst [str]): The listings to extract.
+
+        run_id (uuid.UUID): The id of the ingestion run.
+
+        rate_limiter (RedditRateLimiter): The shared rate limiter.
+
+        semaphore (asyncio.Semaphore): The semaphore bounding the number of concurrent subreddits.
+
+        ingestion_run (IngestionRun|None): The ingestion run that the stages are recorded on.
+
+    Returns:
+        tuple: A tuple of ints (inserted, updated) containing the number of posts that were
+            created and updated.
+
+    """
+    async with semaphore:
+        # Querying the post hashes stored by the previous runs:
+        ingestion_state, _ = await sync_to_async(SubredditIngestionState.objects.get_or_create)(subreddit=subreddit)
+        listing_merger = ListingMerger(ingestion_state.post_hashes)
+
+        # Extracting each listing and merging the posts by id:
+        fetch_start = time.perf_counter()
+        api_calls = 0
+        subreddit_instance = await reddit.subreddit(subreddit.name)
+        for reddit_filter in reddit_filters:
+            listing_merger.start_listing()
+            listing = _rate_limited_listing(
+                _get_listing(subreddit_instance, reddit_filter, ingestion_state.listing_depth), rate_limiter)
+            async for post in listing:
+                if not listing_merger.add(post, reddit_filter):
+                    break
+
+            api_calls += listing.api_calls
+            listing_merger.finish_listing(ingestion_state.listing_depth)
+
+            # Syncing the shared request budget with the rate limit headers from the API:
+            await sync_to_async(rate_limiter.sync_from_reddit, thread_sensitive=False)(reddit)
+
+        if ingestion_run is not None:
+            await sync_to_async(IngestionStage.objects.create)(
+                run=ingestion_run,
+                name="fetch",
+                target=subreddit.name,
+                wall_time=time.perf_counter() - fetch_start,
+                api_calls=api_calls,
+                rows=len(listing_merger.post_hashes))
+
+        return await sync_to_async(load_subreddit_posts)(
+            sync_reddit, subreddit, listing_merger, ingestion_state, run_id, rate_limiter, ingestion_run)
+
+def _rate_limited_listing(listing, rate_limiter):
+    """The asyncpraw version of the '_rate_limited_listing' method of 'data_extraction.py'. A token is taken
+    from the rate limiter via '_acquire' before each page of the listing is requested and the number of
+    tokens taken is counted in the 'api_calls' attribute of the generator.
+
+    Args:
+        listing (asyncpraw.models.ListingGenerator): The generator of the listing.
+
+        rate_limiter (RedditRateLimiter): The shared rate limiter.
+
+    Returns:
+        asyncpraw.models.ListingGenerator: The same generator.
+
+    """
+    next_batch = listing._next_batch
+    listing.api_calls = 0
+
+    async def rate_limited_next_batch():
+        # An exhausted listing stops without requesting another page:
+        if not listing._exhausted:
+            listing.api_calls += await _acquire(rate_limiter)
+        await next_batch()
+
+    listing._next_batch = rate_limited_next_batch
+    return listing
+
+async def _acquire(rate_limiter, tokens=1):
+    """Method that takes tokens from the shared rate limiter, sleeping the coroutine instead of
+    the thread when the request budget is spent. The redis call of the rate limiter is made in a
+    thread so that it does not block the event loop.
+
+    Args:
+        rate_limiter (RedditRateLimiter): The shared rate limiter.
+
+        tokens (int): The number of API requests that are about to be made.
+
+    Returns:
+        int: The number of tokens acquired. As the rate limiter is shared by the subreddits that are
+            extracted at the same time, the API calls of a subreddit are counted from these and not
+            from the 'acquired' count of the rate limiter.
+
+    Raises:
+        ValueError: If more tokens are requested than the capacity of the rate limiter.
+
+    """
+    try_acquire = sync_to_async(rate_limiter.try_acquire, thread_sensitive=False)
+    while True:
+        wait = await try_acquire(tokens)
+        if wait == 0:
+            return tokens
+
+        await asyncio.sleep(wait)
@@ -0,0 +1,181 @@
+# Importing Reddit API:
+import praw
+import prawcore
+
+# Importing native packages:
+import logging
+from collections import deque
+
+# Importing django methods:
+from django.conf import settings
+
+# Importing Reddit Database Models and extraction methods:
+from .loaders import bulk_upsert_reddit_comments
+from .data_extraction import get_or_create_reddit_authors, _utc_datetime
+from .rate_limiting import RedditRateLimiter, RateLimitedSession
+
+logger = logging.getLogger(__name__)
+
+def extract_reddit_comments(**kwargs):
+    """The method that extracts the comments of reddit posts and writes them to the database via
+    the RedditComment model.
+
+    The comment forest of each post is walked as a generator and the comments are written in fixed
+    size batches of 'batch_size', so the number of serialized comments held in memory never exceeds
+    one batch. The praw comment forest of the post being walked is the only other structure held in
+    memory. It is held in full, as its 'MoreComments' are resolved before it is walked, so its size is
+    bounded by the comments of the first request of the post plus at most 100 comments for each of the
+    'replace_more_limit' resolved 'MoreComments'.
+
+    Every API request, including the requests made by 'replace_more', takes a token from the shared
+    RedditRateLimiter so the comment ingestion draws from the same budget as the post ingestion.
+
+    Args:
+        dev_client_id (str): The reddit developer account id.
+
+        dev_secret (str): The secret key for the reddit developer account.
+
+        dev_user_agent (str): The user agent (application description string) of the reddit developer account.
+
+        posts (iterable [RedditPosts]): The posts whose comments are extracted.
+
+        replace_more_limit (int): The maximum number of 'MoreComments' resolved per post, each costs an
+            API request. Defaults to the 'REDDIT_COMMENT_REPLACE_MORE_LIMIT' setting. It can not be None
+            (resolve every 'MoreComments') as the forest of a large thread would be held in memory in full.
+
+        batch_size (int): The number of comments written per bulk insert. Defaults to the
+            'REDDIT_COMMENT_BATCH_SIZE' setting.
+
+        praw_config (dict): Optional additional config passed to the praw Reddit object.
+
+        rate_limiter (RedditRateLimiter): Optional rate limiter to use instead of the shared one.
+
+    Returns:
+        tuple: A tuple of ints (inserted, updated) containing the total number of comments that were
+            created and updated.
+
+    """
+    # Unpacking kwargs:
+    posts = kwargs.get("posts")
+    replace_more_limit = kwargs.get("replace_more_limit", settings.REDDIT_COMMENT_REPLACE_MORE_LIMIT)
+    batch_size = kwargs.get("batch_size") or settings.REDDIT_COMMENT_BATCH_SIZE
+    rate_limiter = kwargs.get("rate_limiter") or RedditRateLimiter()
+
+    # Creating a reddit praw object whose requests all take a token from the rate limiter:
+    praw_config = {"requestor_kwargs": {"session": RateLimitedSession(rate_limiter)}}
+    praw_config.update(kwargs.get("praw_config", {}))
+
+    reddit = praw.Reddit(
+        client_id = kwargs.get("dev_client_id"),
+        client_secret = kwargs.get("dev_secret"),
+        user_agent = kwargs.get("dev_user_agent"),
+        **praw_config
+    )
+    reddit.read_only = True
+
+    total_inserted, total_updated = 0, 0
+    batch = []
+    for post in posts:
+        try:
+            for comment in iter_comment_forest(reddit.submission(id=post.id), replace_more_limit):
+                batch.append(comment_serializer(comment, post))
+
+                # Flushing each full batch to the database:
+                if len(batch) >= batch_size:
+                    inserted, updated = load_reddit_comments(batch)
+                    total_inserted += inserted
+                    total_updated += updated
+                    batch = []
+
+        except (prawcore.exceptions.NotFound, prawcore.exceptions.Forbidden):
+            logger.warning(f"Comments for reddit post {post.id} could not be extracted")
+
+        # Syncing the shared request budget with the rate limit headers from the API:
+        rate_limiter.sync_from_reddit(reddit)
+
+    inserted, updated = load_reddit_comments(batch)
+    return total_inserted + inserted, total_updated + updated
+
+def iter_comment_forest(submission, replace_more_limit):
+    """Generator that resolves the 'MoreComments' of a praw submission's comment forest and then
+    yields every comment in the forest breadth first.
+
+    The 'MoreComments' are resolved before the first comment is yielded, so the resolved forest is
+    held in memory while it is walked. Its size grows by up to 100 comments per resolved 'MoreComments'
+    and resolving all of them (praw's limit=None) is rejected.
+
+    Args:
+        submission (praw.models.Submission): The praw submission object.
+
+        replace_more_limit (int): The maximum number of 'MoreComments' to resolve. 0 resolves none.
+
+    Yields:
+        praw.models.Comment: The comments of the submission.
+
+    Raises:
+        ValueError: If 'replace_more_limit' is None or negative.
+
+    """
+    if replace_more_limit is None or replace_more_limit < 0:
+        raise ValueError(
+            f"replace_more_limit must be 0 or a positive int, got {replace_more_limit!r}. Resolving every "
+            f"'MoreComments' of a thread holds the whole thread in memory")
+
+    submission.comments.replace_more(limit=replace_more_limit)
+
+    comment_queue = deque(submission.comments)
+    while comment_queue:
+        comment = comment_queue.popleft()
+        comment_queue.extend(comment.replies)
+        yield comment
+
+def load_reddit_comments(comments):
+    """Method that replaces the author names of a batch of serialized comments with RedditAuthor
+    objects and writes the batch to the database.
+
+    Authors that do not exist are created without extracting their attributes, the attributes of
+    authors that also write posts are refreshed by the post ingestion.
+
+    Args:
+        comments (lst [dict]): A list of reddit comment dicts as created by the 'comment_serializer' method.
+
+    Returns:
+        tuple: A tuple of ints (inserted, updated) containing the number of comments that were
+            created and updated.
+
+    """
+    if not comments:
+        return 0, 0
+
+    authors = get_or_create_reddit_authors(
+        {comment["author"] for comment in comments if comment["author"] is not None})
+    for comment in comments:
+        comment["author"] = authors.get(comment["author"])
+
+    return bulk_upsert_reddit_comments(comments)
+
+def comment_serializer(comment, post):
+    """Function that takes in a praw comment object and serializes it into the fields of the
+    RedditComment model. It does not trigger any API requests.
+
+    Args:
+        comment (praw.models.Comment): The praw comment object.
+
+        post (RedditPosts): The post that the comment was made on.
+
+    Returns:
+        dict: The dict containing the seralized data from the praw comment object.
+
+    """
+    return {
+        "id": comment.id,
+        "post": post,
+        "parent_id": comment.parent_id,
+        "author": comment.author.name if comment.author else None,
+        "body": comment.body,
+        "score": comment.score,
+        "depth": getattr(comment, "depth", None),
+        "created_on": _utc_datetime(comment.created_utc),
+        "stickied": comment.stickied,
+        "is_submitter": comment.is_submitter
+    }
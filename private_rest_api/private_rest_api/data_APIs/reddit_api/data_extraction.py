@@ -9,9 +9,18 @@ import pytz
 # Importing Requests packages:
 import json
 import requests
+import hashlib
+import uuid
 
-# Importing Reddit Database Models:
-from .models import RedditPosts, Subreddit
+# Importing django methods:
+from django.conf import settings
+from django.utils import timezone
+
+# Importing Reddit Database Models and loaders:
+from .models import RedditPosts, RedditAuthor, Subreddit, SubredditIngestionState
+from .loaders import bulk_upsert_reddit_posts, write_reddit_post_snapshots, refresh_reddit_daily_rollups
+from .rate_limiting import RedditRateLimiter
+from api_core.models import track_stage
 
 # Function that extracts reddit posts and POSTs said data to a REST API (aggregates all other methods):
 def extract_reddit_posts(**kwargs):
@@ -19,6 +28,16 @@ def extract_reddit_posts(**kwargs):
     from each subreddit provided in the kwargs. These posts are then written to the database via the 
     creation of RedditPosts models.
 
+    The ingestion is incremental. A content hash of the mutable fields of each post (score, num_comments
+    and upvote_ratio) is stored in the SubredditIngestionState of the subreddit and a post is only written
+    if it is new or its hash has changed since the last run. A listing stops being paginated once 
+    'REDDIT_UNCHANGED_STOP_THRESHOLD' consecutive known and unchanged posts are reached.
+
+    The number of posts requested from each listing is the adaptive 'listing_depth' of the subreddit's
+    ingestion state. It grows when a listing is read to its full depth without reaching a post seen by a
+    previous run and shrinks towards the number of new posts the subreddit recently produced, so quiet
+    subreddits are polled with a single small page.
+
     Args:
         dev_client_id (str): The reddit developer account id.
         
@@ -33,6 +52,25 @@ def extract_reddit_posts(**kwargs):
         post_filter (str): The str determining if the 'top' or 'best' reddit posts will be extracted from the
             subreddit.
 
+        post_filters (lst [str]): The combined extraction mode. A list of listings (eg: ["top", "hot"]) that
+            are all extracted for each subreddit. The listings are merged by post id so that a post that 
+            appears in several listings is serialized and written once. It overrides 'post_filter'.
+
+        praw_config (dict): Optional additional config passed to the praw Reddit object (eg: the 'oauth_url',
+            'reddit_url' and 'requestor_kwargs' used to point praw at the replay server in 'replay.py').
+
+        rate_limiter (RedditRateLimiter): Optional rate limiter to use instead of the shared one.
+
+        run_id (uuid.UUID): The id of the ingestion run recorded on the RedditPostSnapshot rows. It
+            defaults to the id of the 'ingestion_run' and a new id is generated if neither is provided.
+
+        ingestion_run (IngestionRun): Optional ingestion run that the fetch, serialize and write stages
+            of each subreddit are recorded on.
+
+    Returns:
+        tuple: A tuple of ints (inserted, updated) containing the total number of posts that were
+            created and updated across all subreddits.
+
     """
     # Unpacking kwargs:
     dev_app_id = kwargs.get("dev_client_id")
@@ -41,96 +79,395 @@ def extract_reddit_posts(**kwargs):
 
     # Config for what reddit posts to extract:
     subreddits = kwargs.get("subreddits")
-    reddit_filter = kwargs.get("post_filter", "top")
+    reddit_filters = kwargs.get("post_filters") or [kwargs.get("post_filter", "top")]
 
     # Creating a reddit praw object:
     reddit = praw.Reddit(
         client_id = dev_app_id,
         client_secret = dev_app_secret,
-        user_agent = dev_app_usr_agent
+        user_agent = dev_app_usr_agent,
+        **kwargs.get("praw_config", {})
     )
     reddit.read_only = True
 
+    # The rate limiter shared by all workers that replaces sleeping between requests:
+    rate_limiter = kwargs.get("rate_limiter") or RedditRateLimiter()
+    ingestion_run = kwargs.get("ingestion_run")
+    run_id = kwargs.get("run_id") or (ingestion_run.run_id if ingestion_run else uuid.uuid4())
+
     # Performing data extraction and ingestion for each subreddit:
+    total_inserted, total_updated = 0, 0
     for subreddit in subreddits:
         subreddit_instance = reddit.subreddit(subreddit.name)
         
-        # Determining which filter to apply to the subreddit post extraction and serializing posts:
-        if reddit_filter == "top":
-            posts = [post_serializer(post, subreddit) for post in subreddit_instance.top("day", limit=25)]
-           
-        elif reddit_filter == "hot":
-            posts = [post_serializer(post, subreddit) for post in subreddit_instance.hot(limit=25)]
-    
-        # Creating database models: and writing data to the database:
-        posts_objects = [
-            RedditPosts.objects.update_or_create(
-                id = post["id"],
-                defaults= {
-                "id":post["id"],
-                "subreddit": post["subreddit"],
-                "title":post["title"],
-                "content":post["content"],
-                "upvote_ratio":post["upvote_ratio"],
-                "score":post["score"],
-                "num_comments":post["num_comments"],
-                "created_on":post["created_on"],
-                "stickied":post["stickied"],
-                "over_18":post["over_18"],
-                "spoiler":post["spoiler"],
-                "author_is_gold":post["author_is_gold"],
-                "author_mod":post["author_mod"],
-                "author_has_verified_email":post["author_has_verified_email"],
-                "permalink":post["permalink"],
-                "author":post["author"],
-                "author_created":post["author_created"],
-                "comment_karma":post["comment_karma"]}                
-            ) for post in posts
-        ] 
-
-def post_serializer(post, subreddit):
-    """Function that takes in a praw post object extracted from reddit and
-    serializes it into a format that is compatable with the private REST API
-    that the ingestion is designed for.
+        # Querying the post hashes stored by the previous runs:
+        ingestion_state, _ = SubredditIngestionState.objects.get_or_create(subreddit=subreddit)
+        listing_merger = ListingMerger(ingestion_state.post_hashes)
 
-    Args: 
-        post (praw.Reddit.post): The praw reddit post object from which all the data 
-            will be extracted.
+        # Extracting each listing and merging the posts by id:
+        with track_stage(ingestion_run, "fetch", subreddit.name, rate_limiter) as stage:
+            for reddit_filter in reddit_filters:
+                listing_merger.start_listing()
+                listing = _rate_limited_listing(
+                    _get_listing(subreddit_instance, reddit_filter, ingestion_state.listing_depth), rate_limiter)
+                for post in listing:
+                    if not listing_merger.add(post, reddit_filter):
+                        break
 
-        subreddit (db.Models): The subreddit instance used to create a ForeginKey field.
+                listing_merger.finish_listing(ingestion_state.listing_depth)
 
-    Return:
-        dict: The dict containing the seralized data from the praw post object.
+                # Syncing the shared request budget with the rate limit headers from the API:
+                rate_limiter.sync_from_reddit(reddit)
+
+            stage.rows = len(listing_merger.post_hashes)
+
+        inserted, updated = load_subreddit_posts(
+            reddit, subreddit, listing_merger, ingestion_state, run_id, rate_limiter, ingestion_run)
+        total_inserted += inserted
+        total_updated += updated
+
+    return total_inserted, total_updated
+
+class ListingMerger(object):
+    """Merges the posts extracted from one or more listings of a subreddit by post id and selects 
+    the posts that need to be written to the database.
+
+    A post is selected if it is new or if the hash of its mutable fields differs from the hash stored
+    by a previous run. The listings each post appeared in are recorded for every post that is seen.
+
+    Attributes:
+        known_hashes (dict): The post hashes stored in the SubredditIngestionState by previous runs.
+
+        posts (dict): The praw post objects that need to be written, keyed by post id.
+
+        post_listings (dict): The listings that each seen post appeared in, keyed by post id.
+
+        post_hashes (dict): The hash of the mutable fields of each seen post, keyed by post id.
+
+        new_post_ids (set): The ids of the seen posts that were not seen by a previous run.
+
+        saturated (bool): True if a listing was read to its full depth and its last post was new, 
+            indicating that new posts may have been missed deeper in the listing.
 
     """
-    # Reddit Post Dict to be populated:
-    reddit_post = {}
+    def __init__(self, known_hashes):
+        self.known_hashes = known_hashes
+        self.posts = {}
+        self.post_listings = {}
+        self.post_hashes = {}
+        self.new_post_ids = set()
+        self.saturated = False
+        self._unchanged_streak = 0
+        self._listing_count = 0
+        self._listing_stopped = False
+        self._last_post_new = False
+
+    def start_listing(self):
+        """Resets the streak of unchanged posts and the post count at the start of a new listing."""
+        self._unchanged_streak = 0
+        self._listing_count = 0
+        self._listing_stopped = False
+        self._last_post_new = False
+
+    def finish_listing(self, listing_depth):
+        """Records if the listing that was just extracted was saturated.
+
+        Args:
+            listing_depth (int): The number of posts that were requested from the listing.
+
+        """
+        if not self._listing_stopped and self._listing_count >= listing_depth and self._last_post_new:
+            self.saturated = True
 
-    # Extracting the "problamatic" elements from the post object:
+    def add(self, post, reddit_filter):
+        """Adds a post extracted from a listing.
+
+        Args:
+            post (praw.Reddit.post): The praw reddit post object.
+
+            reddit_filter (str): The listing that the post was extracted from.
+
+        Returns:
+            bool: False once 'REDDIT_UNCHANGED_STOP_THRESHOLD' consecutive known and unchanged posts 
+                have been added, indicating that the listing should not be paginated further.
+
+        """
+        self.post_hashes[post.id] = _content_hash(post)
+        self.post_listings.setdefault(post.id, []).append(reddit_filter)
+
+        # Counting the posts that no previous run has seen, used to adapt the listing depth:
+        self._listing_count += 1
+        self._last_post_new = post.id not in self.known_hashes
+        if self._last_post_new:
+            self.new_post_ids.add(post.id)
+
+        # Only new or changed posts are written, stopping at a streak of known and unchanged posts:
+        if self.known_hashes.get(post.id) == self.post_hashes[post.id]:
+            self._unchanged_streak += 1
+            self._listing_stopped = self._unchanged_streak >= settings.REDDIT_UNCHANGED_STOP_THRESHOLD
+            return not self._listing_stopped
+
+        self._unchanged_streak = 0
+        self.posts[post.id] = post
+        return True
+
+def load_subreddit_posts(reddit, subreddit, listing_merger, ingestion_state, run_id, rate_limiter=None, ingestion_run=None):
+    """Method that serializes the posts selected by a ListingMerger and writes them to the 
+    database, appending a RedditPostSnapshot of each post and recomputing the RedditDailyRollup rows 
+    of their days, before storing the hashes of every seen post and the adapted listing depth in the 
+    subreddit's ingestion state.
+
+    Args:
+        reddit (praw.Reddit): The praw instance used to refresh stale post authors.
+
+        subreddit (Subreddit): The subreddit that the posts were extracted from.
+
+        listing_merger (ListingMerger): The merger containing the posts extracted from the listings.
+
+        ingestion_state (SubredditIngestionState): The ingestion state of the subreddit.
+
+        run_id (uuid.UUID): The id of the ingestion run recorded on the snapshots.
+
+        rate_limiter (RedditRateLimiter|None): The shared rate limiter used when refreshing authors.
+
+        ingestion_run (IngestionRun|None): The ingestion run that the serialize and write stages are recorded on.
+
+    Returns:
+        tuple: A tuple of ints (inserted, updated) containing the number of posts that were
+            created and updated.
+
+    """
+    with track_stage(ingestion_run, "serialize", subreddit.name, rate_limiter) as stage:
+        # Serializing each unique post once:
+        posts = [
+            post_serializer(post, subreddit, listing_merger.post_listings[post_id]) 
+            for post_id, post in listing_merger.posts.items()
+        ]
+
+        # Replacing the author names with RedditAuthor objects, refreshing stale authors:
+        authors = refresh_reddit_authors(
+            reddit, 
+            {post["author"] for post in posts if post["author"] is not None},
+            rate_limiter)
+        for post in posts:
+            post["author"] = authors.get(post["author"])
+
+        stage.rows = len(posts)
+
+    with track_stage(ingestion_run, "write", subreddit.name) as stage:
+        # Writing the full listing to the database in a single upsert statement:
+        inserted, updated = bulk_upsert_reddit_posts(posts)
+
+        # Appending the engagement history of the new and changed posts:
+        write_reddit_post_snapshots(posts, run_id)
+
+        # Recomputing the daily rollups of the days that the written posts were created on:
+        refresh_reddit_daily_rollups({(subreddit.id, post["created_on"].astimezone(pytz.utc).date()) for post in posts})
+
+        # Storing the adapted listing depth and the hashes of the posts seen in this run once they have been written:
+        ingestion_state.update_listing_depth(len(listing_merger.new_post_ids), listing_merger.saturated)
+        ingestion_state.update_post_hashes(listing_merger.post_hashes)
+
+        stage.rows = inserted + updated
+
+    return inserted, updated
+
+def _content_hash(post):
+    """Method that creates a hash of the mutable fields of a praw post object that is used 
+    to detect if a post has changed since it was last written to the database. The hash is 
+    computed from values already present in the listing so it does not trigger an API request.
+
+    Args:
+        post (praw.Reddit.post): The praw reddit post object.
+
+    Returns:
+        str: The hex digest of the score, num_comments and upvote_ratio of the post.
+
+    """
+    mutable_fields = f"{post.score}:{post.num_comments}:{post.upvote_ratio}"
+    return hashlib.md5(mutable_fields.encode("utf-8")).hexdigest()
+
+def _get_listing(subreddit_instance, reddit_filter, limit=25):
+    """Method that returns the praw listing generator for a subreddit listing. The generator requests
+    pages of up to 100 posts as it is iterated so a listing that is stopped early does not request
+    the rest of its pages.
+
+    Args:
+        subreddit_instance (praw.models.Subreddit): The praw subreddit object.
+
+        reddit_filter (str): The listing to extract, either 'top' (the top posts of the day) or 'hot'.
+
+        limit (int): The maximum number of posts extracted from the listing.
+
+    Returns:
+        praw.models.ListingGenerator: The generator of praw post objects in the listing.
+
+    """
+    if reddit_filter == "top":
+        return subreddit_instance.top("day", limit=limit)
+    elif reddit_filter == "hot":
+        return subreddit_instance.hot(limit=limit)
+
+    raise ValueError(f"Unsupported reddit listing: {reddit_filter}")
+
+def _rate_limited_listing(listing, rate_limiter):
+    """Method that makes a praw listing generator take a token from the rate limiter before it requests
+    each page of the listing. Pages are requested by the '_next_batch' method of the generator as it is
+    iterated, so a listing that is stopped early by the ListingMerger only takes the tokens of the pages
+    that it requested.
+
+    Args:
+        listing (praw.models.ListingGenerator): The generator of the listing.
+
+        rate_limiter (RedditRateLimiter): The shared rate limiter.
+
+    Returns:
+        praw.models.ListingGenerator: The same generator.
+
+    """
+    next_batch = listing._next_batch
+
+    def rate_limited_next_batch():
+        # An exhausted listing stops without requesting another page:
+        if not listing._exhausted:
+            rate_limiter.acquire()
+        return next_batch()
+
+    listing._next_batch = rate_limited_next_batch
+    return listing
+
+def refresh_reddit_authors(reddit, author_names, rate_limiter=None):
+    """Method that returns the RedditAuthor objects for a collection of usernames, creating the
+    ones that do not exist and refreshing the attributes of stale authors from the API.
+
+    Author attributes are only extracted from the API if they have never been extracted or if they
+    were extracted longer than 'REDDIT_AUTHOR_REFRESH_TTL' seconds ago. Each author extraction is a
+    seperate API request so at most 'REDDIT_AUTHOR_REFRESH_BATCH_SIZE' of the stalest authors are
+    refreshed per call and the refreshed batch is written to the database in a single bulk update. 
+    Authors that are not refreshed in this batch are refreshed by a later call.
+
+    Args:
+        reddit (praw.Reddit): The praw instance used to extract author attributes.
+
+        author_names (set [str]): The usernames of the authors.
+
+        rate_limiter (RedditRateLimiter|None): The shared rate limiter. If provided, a request is 
+            taken from the budget before each author is extracted.
+
+    Returns:
+        dict: A dict mapping each username to its RedditAuthor object.
+
+    """
+    # Querying existing authors and creating the missing ones:
+    authors = get_or_create_reddit_authors(author_names)
+
+    # Determining which authors are stale, never extracted authors first then the oldest:
+    now = timezone.now()
+    refresh_cutoff = now - timedelta(seconds=settings.REDDIT_AUTHOR_REFRESH_TTL)
+    stale_authors = sorted(
+        [author for author in authors.values() if author.last_refreshed is None or author.last_refreshed < refresh_cutoff],
+        key=lambda author: (author.last_refreshed is not None, author.last_refreshed or now)
+    )[:settings.REDDIT_AUTHOR_REFRESH_BATCH_SIZE]
+
+    # Extracting the author attributes from the API:
+    for author in stale_authors:
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+
+        author_attributes = author_serializer(reddit.redditor(author.name))
+        for attribute, value in author_attributes.items():
+            setattr(author, attribute, value)
+        author.last_refreshed = now
+
+    if stale_authors:
+        RedditAuthor.objects.bulk_update(
+            stale_authors,
+            ["is_gold", "is_mod", "has_verified_email", "comment_karma", "created_on", "last_refreshed"])
+
+    return authors
+
+def get_or_create_reddit_authors(author_names):
+    """Method that returns the RedditAuthor objects for a collection of usernames, creating the 
+    ones that do not exist without extracting their attributes from the API.
+
+    Args:
+        author_names (set [str]): The usernames of the authors.
+
+    Returns:
+        dict: A dict mapping each username to its RedditAuthor object.
+
+    """
+    authors = {author.name: author for author in RedditAuthor.objects.filter(name__in=author_names)}
+    missing_names = set(author_names) - set(authors)
+    if missing_names:
+        RedditAuthor.objects.bulk_create(
+            [RedditAuthor(name=name) for name in missing_names], 
+            ignore_conflicts=True)
+        authors.update({author.name: author for author in RedditAuthor.objects.filter(name__in=missing_names)})
+
+    return authors
+
+def author_serializer(redditor):
+    """Function that takes in a praw Redditor object and serializes the author attributes that
+    are stored on the RedditAuthor model. 
+    
+    Accessing the first attribute triggers the API request that fetches the Redditor. Suspended
+    or deleted accounts do not have these attributes (or fail to fetch) so each attribute falls 
+    back to None.
+
+    Args:
+        redditor (praw.models.Redditor): The praw Redditor object.
+
+    Returns:
+        dict: The dict containing the seralized author attributes.
+
+    """
+    author = {}
     try:
-        reddit_post["author_is_gold"] = post.author.is_gold
+        author["is_gold"] = redditor.is_gold
     except:
-        reddit_post["author_is_gold"] = None
+        author["is_gold"] = None
     try:
-        reddit_post["author_mod"] = post.author.is_mod
+        author["is_mod"] = redditor.is_mod
     except:
-        reddit_post["author_mod"] = None
+        author["is_mod"] = None
     try:
-        reddit_post["author_has_verified_email"] = post.author.has_verified_email
+        author["has_verified_email"] = redditor.has_verified_email
     except:
-        reddit_post["author_has_verified_email"] = None
+        author["has_verified_email"] = None
     try:
-        reddit_post["comment_karma"] = post.author.comment_karma
+        author["comment_karma"] = redditor.comment_karma
     except:
-        reddit_post["comment_karma"] = None 
+        author["comment_karma"] = None 
     try:
-        reddit_post["author_created"] = _format_datetime(post.author.created_utc)
+        author["created_on"] = _utc_datetime(redditor.created_utc)
     except:
-        reddit_post["author_created"] = None
+        author["created_on"] = None
 
-    # Extracting the basic elements from the post object:
+    return author
+
+def post_serializer(post, subreddit, listings=None):
+    """Function that takes in a praw post object extracted from reddit and
+    serializes it into a format that is compatable with the private REST API
+    that the ingestion is designed for.
+
+    The post author is serialized as the author's username only, accessing the
+    username does not trigger an API request. Author attributes are extracted
+    seperately via the 'refresh_reddit_authors' method.
+
+    Args: 
+        post (praw.Reddit.post): The praw reddit post object from which all the data 
+            will be extracted.
+
+        subreddit (db.Models): The subreddit instance used to create a ForeginKey field.
+
+        listings (lst [str]|None): The listings (eg: 'top', 'hot') that the post appeared in.
+
+    Return:
+        dict: The dict containing the seralized data from the praw post object.
+
+    """
     reddit_post = {
-        **reddit_post,
         "id":post.id,
         "subreddit":subreddit, 
         "title": post.title,
@@ -142,23 +479,20 @@ def post_serializer(post, subreddit):
         "over_18": post.over_18,
         "spoiler": post.spoiler,
         "permalink": post.permalink,
-        "author": post.author,
-        "created_on": _format_datetime(post.created_utc)
+        "author": post.author.name if post.author else None,
+        "created_on": _utc_datetime(post.created_utc),
+        "listings": listings or []
     }    
-    time.sleep(0.5)
     return reddit_post
 
-def _format_datetime(utc_float):
-    """Method ingests a utc timestamp float and formats it into
-    a datetime format that is prefered by the DRF framework.
-    It performs conversions through datetime and pytz.
+def _utc_datetime(utc_float):
+    """Method ingests a utc timestamp float and converts it into a timezone
+    aware datetime object that can be written directly to the database.
+    
     Args:
         utc (float): A unix timestamp.   
         
     Returns:
-        str: The formatted datetime in string format.
+        datetime: The timezone aware (UTC) datetime.
     """
-    date_obj = datetime.fromtimestamp(utc_float, tz=pytz.utc)
-    date_str = date_obj.strftime("%Y-%m-%dT%H:%M:%S.%f%z")
-
-    return date_str
+    return datetime.fromtimestamp(utc_float, tz=pytz.utc)
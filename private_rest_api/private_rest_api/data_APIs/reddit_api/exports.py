@@ -0,0 +1,259 @@
+# Importing django methods:
+from django.conf import settings
+
+# Importing native packages:
+import csv
+import json
+import zlib
+
+# Importing the Apache Arrow and Parquet writers:
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
+
+# The exported columns of a reddit post and the RedditPosts lookups they are read from. The column
+# names match the fields of the RedditPostsSerializer so an export holds the same data as the API:
+EXPORT_COLUMNS = [
+    ("id", "id"),
+    ("subreddit", "subreddit__name"),
+    ("title", "title"),
+    ("content", "content"),
+    ("upvote_ratio", "upvote_ratio"),
+    ("score", "score"),
+    ("num_comments", "num_comments"),
+    ("created_on", "created_on"),
+    ("stickied", "stickied"),
+    ("over_18", "over_18"),
+    ("spoiler", "spoiler"),
+    ("author_is_gold", "author__is_gold"),
+    ("author_mod", "author__is_mod"),
+    ("author_has_verified_email", "author__has_verified_email"),
+    ("permalink", "permalink"),
+    ("author", "author__name"),
+    ("author_created", "author__created_on"),
+    ("comment_karma", "author__comment_karma"),
+    ("listings", "listings")
+]
+
+# The arrow schema of the exported columns used by the parquet and arrow formats:
+EXPORT_SCHEMA = pyarrow.schema([
+    ("id", pyarrow.string()),
+    ("subreddit", pyarrow.string()),
+    ("title", pyarrow.string()),
+    ("content", pyarrow.string()),
+    ("upvote_ratio", pyarrow.float64()),
+    ("score", pyarrow.int64()),
+    ("num_comments", pyarrow.int64()),
+    ("created_on", pyarrow.timestamp("us", tz="UTC")),
+    ("stickied", pyarrow.bool_()),
+    ("over_18", pyarrow.bool_()),
+    ("spoiler", pyarrow.bool_()),
+    ("author_is_gold", pyarrow.bool_()),
+    ("author_mod", pyarrow.bool_()),
+    ("author_has_verified_email", pyarrow.bool_()),
+    ("permalink", pyarrow.string()),
+    ("author", pyarrow.string()),
+    ("author_created", pyarrow.timestamp("us", tz="UTC")),
+    ("comment_karma", pyarrow.int64()),
+    ("listings", pyarrow.list_(pyarrow.string()))
+])
+
+def iter_post_rows(queryset, chunk_size=None):
+    """Generator that yields the exported columns of every post in a RedditPosts queryset as tuples.
+
+    The rows are read with 'values_list' through a server-side cursor on postgres, fetching 'chunk_size'
+    rows at a time, so only one chunk of rows is ever held in memory no matter the size of the queryset.
+
+    Args:
+        queryset (models.QuerySet): The (filtered) RedditPosts queryset to export.
+
+        chunk_size (int): The number of rows fetched from the database at a time. Defaults to the
+            'REDDIT_EXPORT_CHUNK_SIZE' setting.
+
+    Yields:
+        tuple: The values of the 'EXPORT_COLUMNS' of a post.
+
+    """
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    yield from queryset.values_list(*lookups).iterator(chunk_size=chunk_size or settings.REDDIT_EXPORT_CHUNK_SIZE)
+
+def iter_ndjson(rows):
+    """Generator that encodes post rows as newline delimited JSON, one JSON object per line.
+
+    Args:
+        rows (iterable [tuple]): The post rows created by the 'iter_post_rows' method.
+
+    Yields:
+        str: A line of the export.
+
+    """
+    columns = [column for column, _ in EXPORT_COLUMNS]
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+
+def iter_csv(rows):
+    """Generator that encodes post rows as CSV with a header line. The listings of the posts are
+    written as JSON arrays.
+
+    Args:
+        rows (iterable [tuple]): The post rows created by the 'iter_post_rows' method.
+
+    Yields:
+        str: A line of the export.
+
+    """
+    listings_index = [column for column, _ in EXPORT_COLUMNS].index("listings")
+    writer = csv.writer(_EchoBuffer())
+
+    yield writer.writerow([column for column, _ in EXPORT_COLUMNS])
+    for row in rows:
+        row = list(row)
+        row[listings_index] = json.dumps(row[listings_index])
+        yield writer.writerow([_json_default(value) if hasattr(value, "isoformat") else value for value in row])
+
+def iter_record_batches(rows, batch_size=None):
+    """Generator that groups post rows into arrow record batches of the 'EXPORT_SCHEMA'.
+
+    Args:
+        rows (iterable [tuple]): The post rows created by the 'iter_post_rows' method.
+
+        batch_size (int): The number of rows in each record batch. Defaults to the 
+            'REDDIT_EXPORT_BATCH_SIZE' setting.
+
+    Yields:
+        pyarrow.RecordBatch: A batch of posts.
+
+    """
+    batch_size = batch_size or settings.REDDIT_EXPORT_BATCH_SIZE
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield _record_batch(batch)
+            batch = []
+
+    if batch:
+        yield _record_batch(batch)
+
+def iter_parquet(rows, compression="zstd"):
+    """Generator that encodes post rows as a Parquet file. Each record batch is written as a row
+    group and the bytes of the file are yielded as each row group is written, the footer of the 
+    file is yielded last.
+
+    Args:
+        rows (iterable [tuple]): The post rows created by the 'iter_post_rows' method.
+
+        compression (str): The compression codec of the parquet column chunks.
+
+    Yields:
+        bytes: The next part of the parquet file.
+
+    """
+    sink = _ChunkedSink()
+    writer = pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(sink, mode="w"), EXPORT_SCHEMA, compression=compression)
+    for record_batch in iter_record_batches(rows):
+        writer.write_table(pyarrow.Table.from_batches([record_batch]))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+def iter_arrow_stream(rows, compression="zstd"):
+    """Generator that encodes post rows in the Arrow IPC streaming format, yielding each record 
+    batch as it is written.
+
+    Args:
+        rows (iterable [tuple]): The post rows created by the 'iter_post_rows' method.
+
+        compression (str): The compression codec of the record batch buffers.
+
+    Yields:
+        bytes: The next part of the arrow stream.
+
+    """
+    sink = _ChunkedSink()
+    writer = pyarrow.ipc.new_stream(
+        pyarrow.PythonFile(sink, mode="w"), EXPORT_SCHEMA, options=pyarrow.ipc.IpcWriteOptions(compression=compression))
+    for record_batch in iter_record_batches(rows):
+        writer.write_batch(record_batch)
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+def iter_gzip(chunks, compression_level=6):
+    """Generator that gzip compresses a stream of text or binary chunks as they are produced.
+
+    Args:
+        chunks (iterable [str|bytes]): The chunks of the export.
+
+        compression_level (int): The zlib compression level.
+
+    Yields:
+        bytes: The compressed chunks, empty chunks are not yielded.
+
+    """
+    # A wbits of 16 + MAX_WBITS writes the gzip header and trailer:
+    compressor = zlib.compressobj(compression_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if compressed:
+            yield compressed
+
+    yield compressor.flush()
+
+def _record_batch(rows):
+    """Transposes a list of post rows into an arrow record batch of the 'EXPORT_SCHEMA'."""
+    columns = zip(*rows)
+    return pyarrow.RecordBatch.from_arrays(
+        [pyarrow.array(column, type=field.type) for column, field in zip(columns, EXPORT_SCHEMA)],
+        schema=EXPORT_SCHEMA)
+
+def _json_default(value):
+    """Encodes the datetimes of the exported rows as ISO 8601 strings in the format of the API."""
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+class _EchoBuffer(object):
+    """A file-like object whose write method returns the written value, used to stream the lines
+    written by a csv writer without buffering them."""
+    def write(self, value):
+        return value
+
+class _ChunkedSink(object):
+    """A file-like object that the arrow writers write to, holding the written bytes until they are
+    drained into the streamed response."""
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        """Returns and forgets the bytes written since the last drain."""
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+# The content types, file extensions and encoders of the export formats:
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson", iter_ndjson),
+    "csv": ("text/csv", "csv", iter_csv),
+    "parquet": ("application/vnd.apache.parquet", "parquet", iter_parquet),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows", iter_arrow_stream)
+}
@@ -1,18 +1,34 @@
 # Importing models to be filtered:
-from .models import RedditPosts 
+from .models import RedditPosts, RedditDailyRollup
 
 # Filter imports:
 from django_filters import rest_framework as filters
 
+# Importing django methods:
+from django.db import connection
+from django.db.models import F, Q, Value, FloatField, TextField
+from django.db.models.functions import Coalesce, Concat
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchHeadline
+
+# Importing native packages:
+import re
+
 class RedditPostFilter(filters.FilterSet):
-    """Generic django-filter FilterSet for the RedditPosts API."""
+    """Generic django-filter FilterSet for the RedditPosts API.
+
+    On postgres the 'title' and 'title_icontains' substring filters are served by the GIN trigram
+    indexes of the title, other database backends scan the table.
+    """
     title = filters.CharFilter(field_name="title", lookup_expr="contains")
+    title_icontains = filters.CharFilter(field_name="title", lookup_expr="icontains")
     content = filters.CharFilter(field_name="content", lookup_expr="contains")
     subreddit = filters.CharFilter(field_name="subreddit__name", lookup_expr="exact")
     
     start_date = filters.DateTimeFilter(field_name="created_on", lookup_expr="gt")
     end_date = filters.DateTimeFilter(field_name="created_on", lookup_expr="lt")
 
+    q = filters.CharFilter(method="search_posts")
+
     class Meta:
         model = RedditPosts
         fields = [
@@ -20,4 +36,91 @@ class RedditPostFilter(filters.FilterSet):
             "subreddit",
             "content",
             "created_on"
-        ]
\ No newline at end of file
+        ]
+
+    def search_posts(self, queryset, name, value):
+        """Filters the posts with a full text search of their title and content.
+
+        On postgres the query is matched against the GIN indexed 'search_vector' of the posts, which
+        are ordered by their relevance rank and annotated with the 'search_rank' and a 'search_headline'
+        of the matched terms highlighted in <b> tags. Other database backends fall back to case
+        insensitive substring matching of every term without ranking.
+
+        Args:
+            queryset (models.QuerySet): The RedditPosts queryset to filter.
+
+            name (str): The name of the filter.
+
+            value (str): The search query, see the 'build_search_query' method for its syntax.
+
+        Returns:
+            models.QuerySet: The filtered queryset.
+
+        """
+        search_query = build_search_query(value)
+        if search_query is None or connection.vendor != "postgresql":
+            for term in re.findall(r"\w+", value):
+                queryset = queryset.filter(Q(title__icontains=term) | Q(content__icontains=term))
+
+            return queryset.annotate(
+                search_rank=Value(None, output_field=FloatField()),
+                search_headline=Value(None, output_field=TextField()))
+
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F("search_vector"), search_query),
+            search_headline=SearchHeadline(
+                Concat(Coalesce("title", Value("")), Value(" "), Coalesce("content", Value(""))),
+                search_query,
+                config="english",
+                start_sel="<b>",
+                stop_sel="</b>",
+                max_fragments=2
+            )
+        ).order_by("-search_rank", "-created_on")
+
+def build_search_query(value):
+    """Method that converts the 'q' parameter of the reddit posts endpoint into a postgres tsquery.
+
+    Terms are all required. A "quoted phrase" matches its words next to each other in order and a 
+    term ending with '*' matches every word starting with it (eg: 'elect*' matches 'election').
+    Characters other than letters, digits and underscores are ignored so user input can never
+    produce an invalid tsquery.
+
+    Args:
+        value (str): The search query eg: '"interest rates" inflat*'
+
+    Returns:
+        SearchQuery|None: The raw english SearchQuery or None if the query does not contain any terms.
+
+    """
+    terms = []
+    for phrase, term in re.findall(r'"([^"]*)"|(\S+)', value):
+        if phrase:
+            words = re.findall(r"\w+", phrase)
+            if words:
+                terms.append(f"({' <-> '.join(words)})")
+            continue
+
+        words = re.findall(r"\w+", term)
+        if words:
+            prefix = ":*" if term.endswith("*") else ""
+            terms.extend(words[:-1] + [words[-1] + prefix])
+
+    if not terms:
+        return None
+
+    return SearchQuery(" & ".join(terms), search_type="raw", config="english")
+
+class RedditDailyRollupFilter(filters.FilterSet):
+    """Generic django-filter FilterSet for the reddit statistics API. The start and end dates are inclusive."""
+    subreddit = filters.CharFilter(field_name="subreddit__name", lookup_expr="exact")
+
+    start_date = filters.DateFilter(field_name="day", lookup_expr="gte")
+    end_date = filters.DateFilter(field_name="day", lookup_expr="lte")
+
+    class Meta:
+        model = RedditDailyRollup
+        fields = [
+            "subreddit",
+            "day"
+        ]
@@ -0,0 +1,343 @@
+# Importing database connection methods:
+from django.db import connection, transaction
+from django.db.models import Q, Avg, Count, Sum, DateField
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
+
+# Importing native packages:
+import io
+import csv
+import operator
+import functools
+from datetime import datetime, timedelta
+
+# Importing Reddit Database Models:
+from .models import RedditPosts, RedditPostSnapshot, RedditComment, RedditDailyRollup
+
+# The fields of a reddit post that are captured in each snapshot:
+SNAPSHOT_FIELDS = ["score", "num_comments", "upvote_ratio"]
+
+def bulk_upsert_reddit_posts(posts):
+    """Method that writes a list of serialized reddit posts to the database in a single
+    INSERT ... ON CONFLICT (id) DO UPDATE statement.
+
+    This replaces calling 'RedditPosts.objects.update_or_create' for each post, which costs a
+    SELECT and then an UPDATE or INSERT per row. Posts that share an id within the list are
+    de-duplicated (the last one wins) as postgres does not allow a single upsert statement to
+    affect the same row twice. Existing rows are only updated if at least one of their values has
+    changed, avoiding the row rewrite and index churn of updating a row to the same values.
+
+    On postgres the inserted/updated split is read from the statement itself via the 'xmax'
+    system column. Other backends (the sqlite dev database) use one extra SELECT of the
+    existing ids to determine the split.
+
+    Args:
+        posts (lst [dict]): A list of reddit post dicts as created by the 'post_serializer' method.
+            Datetime fields are expected to be native datetime objects.
+
+    Returns:
+        tuple: A tuple of ints (inserted, updated) containing the number of rows that were
+            created and the number of existing rows that were updated. Unchanged rows are in neither.
+
+    """
+    return _bulk_upsert(RedditPosts, posts)
+
+def bulk_upsert_reddit_comments(comments):
+    """Method that writes a batch of serialized reddit comments to the database in a single
+    INSERT ... ON CONFLICT (id) DO UPDATE statement, the same way as 'bulk_upsert_reddit_posts'.
+
+    Args:
+        comments (lst [dict]): A list of reddit comment dicts as created by the 'comment_serializer' method.
+
+    Returns:
+        tuple: A tuple of ints (inserted, updated) containing the number of rows that were
+            created and the number of existing rows that were updated.
+
+    """
+    return _bulk_upsert(RedditComment, comments)
+
+def _bulk_upsert(model, rows):
+    """Method that performs the INSERT ... ON CONFLICT (pk) DO UPDATE statement for the 
+    'bulk_upsert_reddit_posts' and 'bulk_upsert_reddit_comments' methods.
+
+    Args:
+        model (models.Model): The model whose table the rows are written to.
+
+        rows (lst [dict]): The rows to write, keyed by model field name. The primary key must be 'id'.
+
+    Returns:
+        tuple: A tuple of ints (inserted, updated).
+
+    """
+    # De-duplicating the rows by id:
+    rows = list({row["id"]: row for row in rows}.values())
+    if not rows:
+        return 0, 0
+
+    # Building the column list and the row values from the model fields:
+    fields = _written_fields(model)
+    columns = [connection.ops.quote_name(field.column) for field in fields]
+    pk_column = connection.ops.quote_name(model._meta.pk.column)
+
+    params = []
+    for row in rows:
+        for field in fields:
+            value = row.get(field.name)
+            if field.is_relation and value is not None:
+                value = value.pk
+            params.append(field.get_db_prep_save(value, connection))
+
+    row_placeholder = f"({', '.join(['%s'] * len(fields))})"
+    update_columns = [column for column in columns if column != pk_column]
+
+    # Only updating the existing rows whose values differ from the new values:
+    table = connection.ops.quote_name(model._meta.db_table)
+    distinct_operator = "IS DISTINCT FROM" if connection.vendor == "postgresql" else "IS NOT"
+    changed_condition = " OR ".join(
+        f"{table}.{column} {distinct_operator} EXCLUDED.{column}" for column in update_columns)
+
+    upsert_sql = (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES {', '.join([row_placeholder] * len(rows))} "
+        f"ON CONFLICT ({pk_column}) DO UPDATE SET "
+        f"{', '.join(f'{column} = EXCLUDED.{column}' for column in update_columns)} "
+        f"WHERE {changed_condition}"
+    )
+
+    # Postgres reports whether each row was inserted (xmax = 0) or updated, unchanged rows are not returned:
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"{upsert_sql} RETURNING (xmax = 0) AS inserted", params)
+            inserted_flags = [row[0] for row in cursor.fetchall()]
+
+        inserted = sum(inserted_flags)
+        return inserted, len(inserted_flags) - inserted
+
+    # Fallback for other backends, determining existing rows before the upsert:
+    existing_ids = set(
+        model.objects.filter(id__in=[row["id"] for row in rows]).values_list("id", flat=True))
+
+    with connection.cursor() as cursor:
+        cursor.execute(upsert_sql, params)
+        written = cursor.rowcount
+
+    inserted = len(rows) - len(existing_ids)
+    return inserted, written - inserted
+
+def copy_reddit_posts(posts):
+    """Method that loads a large chunk of serialized reddit posts into the database, skipping the
+    posts that already exist. It is used by the 'reddit_backfill' management command.
+
+    On postgres the chunk is streamed with COPY into a temporary staging table that is dropped at 
+    the end of the transaction and then moved into the posts table with a single
+    INSERT ... SELECT ... ON CONFLICT (id) DO NOTHING. Other backends use a bulk_create.
+
+    Args:
+        posts (lst [dict]): A list of reddit post dicts keyed by RedditPosts field name. Foreign keys
+            are given as ids via the 'subreddit_id' and 'author_id' keys.
+
+    Returns:
+        int: The number of posts inserted.
+
+    """
+    if not posts:
+        return 0
+
+    if connection.vendor != "postgresql":
+        existing_count = RedditPosts.objects.filter(id__in=[post["id"] for post in posts]).count()
+        RedditPosts.objects.bulk_create([RedditPosts(**post) for post in posts], ignore_conflicts=True)
+        return RedditPosts.objects.filter(id__in=[post["id"] for post in posts]).count() - existing_count
+
+    fields = _written_fields(RedditPosts)
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+    table = connection.ops.quote_name(RedditPosts._meta.db_table)
+    staging_table = connection.ops.quote_name(f"{RedditPosts._meta.db_table}_staging")
+
+    # Building the COPY payload in the postgres text format:
+    buffer = io.StringIO()
+    for post in posts:
+        buffer.write("\t".join(
+            _copy_text_value(field.get_db_prep_save(post.get(field.attname), connection)) for field in fields))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE IF NOT EXISTS {staging_table} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+        cursor.copy_expert(f"COPY {staging_table} ({columns}) FROM STDIN", buffer)
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) "
+            f"SELECT DISTINCT ON (id) {columns} FROM {staging_table} "
+            f"ON CONFLICT (id) DO NOTHING")
+        inserted = cursor.rowcount
+        cursor.execute(f"DROP TABLE {staging_table}")
+
+    return inserted
+
+def refresh_reddit_daily_rollups(buckets):
+    """Method that recomputes the RedditDailyRollup rows of the (subreddit, day) buckets touched by an
+    ingestion run or backfill chunk from the posts in the buckets.
+
+    Only the posts of the touched buckets are aggregated, in a single GROUP BY date_trunc('day') query
+    whose day ranges are served by the (subreddit, created_on) index of the posts. The rollup rows of the
+    buckets are then replaced in one transaction, buckets that no longer contain posts are deleted.
+
+    Args:
+        buckets (iterable [tuple]): The (subreddit_id, day) buckets to recompute, where day is the 
+            datetime.date of the UTC day. Buckets without a subreddit are ignored.
+
+    Returns:
+        int: The number of rollup rows written.
+
+    """
+    days_by_subreddit = {}
+    for subreddit_id, day in buckets:
+        if subreddit_id is not None:
+            days_by_subreddit.setdefault(subreddit_id, set()).add(day)
+
+    if not days_by_subreddit:
+        return 0
+
+    # Selecting the posts of each bucket by the UTC date range of its day:
+    post_filter = functools.reduce(operator.or_, [
+        Q(subreddit_id=subreddit_id, created_on__gte=start, created_on__lt=start + timedelta(days=1))
+        for subreddit_id, days in days_by_subreddit.items()
+        for start in (datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc) for day in days)
+    ])
+    rollups = (
+        RedditPosts.objects.filter(post_filter)
+        .order_by()
+        .annotate(day=TruncDay("created_on", output_field=DateField(), tzinfo=timezone.utc))
+        .values("subreddit_id", "day")
+        .annotate(
+            post_count=Count("id"),
+            total_score=Sum("score"),
+            average_score=Avg("score"),
+            total_comments=Sum("num_comments"),
+            average_comments=Avg("num_comments"),
+            average_upvote_ratio=Avg("upvote_ratio")
+        )
+    )
+
+    rollup_filter = functools.reduce(operator.or_, [
+        Q(subreddit_id=subreddit_id, day__in=days) for subreddit_id, days in days_by_subreddit.items()
+    ])
+    with transaction.atomic():
+        RedditDailyRollup.objects.filter(rollup_filter).delete()
+        # A bucket written by a concurrent refresh (eg: a backfill) is left as it is:
+        rollups = RedditDailyRollup.objects.bulk_create([RedditDailyRollup(**rollup) for rollup in rollups], ignore_conflicts=True)
+
+    return len(rollups)
+
+def _written_fields(model):
+    """Returns the concrete fields of a model that are written by the loaders. Search vector fields
+    are maintained by database triggers so they are left out of the column lists.
+    """
+    return [field for field in model._meta.concrete_fields if not isinstance(field, SearchVectorField)]
+
+def _copy_text_value(value):
+    """Method that formats a database value as a field of the postgres COPY text format.
+
+    Args:
+        value (object): The value as prepared for the database.
+
+    Returns:
+        str: The escaped field, '\\N' for null values.
+
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return (
+        str(value)
+        .replace("\x00", "")
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+def write_reddit_post_snapshots(posts, run_id, captured_on=None):
+    """Method that appends a RedditPostSnapshot row containing the score, num_comments and 
+    upvote_ratio of each reddit post.
+
+    On postgres the rows are streamed into the table with a single COPY statement, which is 
+    considerably cheaper than an INSERT for large batches, after making sure the daily partition 
+    for 'captured_on' exists. Other backends use a bulk_create.
+
+    Args:
+        posts (lst [dict]): A list of reddit post dicts as created by the 'post_serializer' method.
+
+        run_id (uuid.UUID): The id of the ingestion run that captured the snapshots.
+
+        captured_on (datetime|None): The time the snapshots were captured. Defaults to now.
+
+    Returns:
+        int: The number of snapshots written.
+
+    """
+    captured_on = captured_on or timezone.now()
+    if not posts:
+        return 0
+
+    if connection.vendor != "postgresql":
+        RedditPostSnapshot.objects.bulk_create([
+            RedditPostSnapshot(
+                post_id=post["id"],
+                run_id=run_id,
+                captured_on=captured_on,
+                **{field: post[field] for field in SNAPSHOT_FIELDS}
+            )
+            for post in posts
+        ])
+        return len(posts)
+
+    ensure_snapshot_partition(captured_on)
+
+    # Building the COPY payload as csv, null values are written as empty unquoted fields:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for post in posts:
+        writer.writerow(
+            [post["id"], run_id, captured_on.isoformat()] + 
+            ["" if post[field] is None else post[field] for field in SNAPSHOT_FIELDS])
+    buffer.seek(0)
+
+    columns = ["post_id", "run_id", "captured_on"] + SNAPSHOT_FIELDS
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {connection.ops.quote_name(RedditPostSnapshot._meta.db_table)} ({', '.join(columns)}) "
+            f"FROM STDIN WITH (FORMAT csv)",
+            buffer)
+
+    return len(posts)
+
+def ensure_snapshot_partition(day):
+    """Method that creates the daily partition of the postgres snapshot table containing a date
+    if it does not exist.
+
+    Args:
+        day (datetime): A date and time within the day of the partition.
+
+    Returns:
+        str: The name of the partition table.
+
+    """
+    start = timezone.localtime(day, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=1)
+    table = RedditPostSnapshot._meta.db_table
+    partition = f"{table}_{start:%Y%m%d}"
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {connection.ops.quote_name(partition)} "
+            f"PARTITION OF {connection.ops.quote_name(table)} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [start, end])
+
+    return partition
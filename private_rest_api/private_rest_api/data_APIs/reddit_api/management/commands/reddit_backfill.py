@@ -0,0 +1,221 @@
+# Importing django methods:
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+# Importing native packages:
+import io
+import os
+import gzip
+import json
+import zstandard
+
+# Importing Reddit Database Models and loaders:
+from data_APIs.reddit_api.models import Subreddit, RedditPosts, RedditBackfillCheckpoint
+from data_APIs.reddit_api.data_extraction import get_or_create_reddit_authors, _utc_datetime
+from data_APIs.reddit_api.loaders import copy_reddit_posts, refresh_reddit_daily_rollups
+from api_core.models import IngestionRun, track_stage
+
+# The extensions of the compressed dumps, which can not be seeked into:
+COMPRESSED_EXTENSIONS = (".zst", ".gz")
+
+def open_dump(dump_path):
+    """Method that opens a newline delimited JSON dump as a binary stream of lines. Zstandard (.zst)
+    and gzip (.gz) compressed dumps are decompressed as they are read so the dump is never fully
+    held in memory or on disk. The lines are read as bytes so that the byte offset of each line is
+    known, uncompressed dumps can be seeked to it.
+
+    Args:
+        dump_path (str): The path to the dump file.
+
+    Returns:
+        io.BufferedIOBase: The binary stream of the (decompressed) dump.
+
+    """
+    if dump_path.endswith(".zst"):
+        # Pushshift dumps are compressed with a long window which has to be allowed explicitly:
+        decompressor = zstandard.ZstdDecompressor(max_window_size=2 ** 31)
+        return io.BufferedReader(decompressor.stream_reader(open(dump_path, "rb")))
+
+    if dump_path.endswith(".gz"):
+        return gzip.open(dump_path, "rb")
+
+    return open(dump_path, "rb")
+
+class Command(BaseCommand):
+    """The management command that seeds the RedditPosts table from historical dumps of reddit
+    submissions in the Pushshift newline delimited JSON format (.ndjson, .ndjson.gz or .ndjson.zst).
+
+    The dump is stream decompressed and read in chunks of '--chunk-size' lines. Each chunk is mapped
+    onto the RedditPosts schema, with subreddits resolved through an in-memory map of subreddit names,
+    and loaded via the postgres COPY command. Posts that already exist are skipped.
+
+    The number of lines and bytes loaded is stored in a RedditBackfillCheckpoint in the same transaction 
+    as each chunk, so re-running the command after an interruption resumes from the last loaded chunk.
+    Uncompressed dumps are resumed by seeking to the byte offset of the checkpoint. Compressed dumps can
+    not be seeked into, so they are resumed by decompressing and skipping the lines that were loaded.
+
+    The backfill is recorded as an IngestionRun of the 'reddit' source with a 'write' stage per chunk.
+    The data version of the source is bumped after each chunk is committed, so the cached responses and
+    ETags of the reddit endpoints do not outlive the data they were created from.
+
+        python manage.py reddit_backfill RS_2022-01.zst --create-subreddits
+
+    """
+    help = "Loads historical reddit submissions from NDJSON (optionally gzip or zstd compressed) dumps."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dumps", nargs="+", help="The paths of the dump files to load.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=20000,
+            help=(
+                "The number of dump lines loaded per COPY statement and checkpoint. An interrupted backfill resumes "
+                "from its last checkpoint, by seeking into uncompressed dumps and by re-reading and skipping the "
+                "loaded lines of compressed (.gz, .zst) dumps."))
+        parser.add_argument(
+            "--create-subreddits", action="store_true",
+            help="Create the subreddits that do not exist instead of skipping their posts.")
+        parser.add_argument(
+            "--restart", action="store_true",
+            help="Ignore the stored checkpoints and load the dumps from the start.")
+
+    def handle(self, *args, **options):
+        for dump_path in options["dumps"]:
+            if not os.path.exists(dump_path):
+                raise CommandError(f"The dump {dump_path} does not exist.")
+
+        # Building the in-memory map of subreddit names to ids:
+        self.subreddit_ids = {name.lower(): subreddit_id for subreddit_id, name in Subreddit.objects.values_list("id", "name")}
+        self.create_subreddits = options["create_subreddits"]
+
+        self.ingestion_run = IngestionRun.objects.create(source="reddit")
+        try:
+            for dump_path in options["dumps"]:
+                self.backfill_dump(dump_path, options["chunk_size"], options["restart"])
+
+        except BaseException as exc:
+            # Recording interrupted backfills as failed runs, the loaded chunks are kept:
+            self.ingestion_run.finish(error=repr(exc))
+            raise
+
+        self.ingestion_run.finish()
+
+    def backfill_dump(self, dump_path, chunk_size, restart):
+        """Loads a single dump file, resuming from its checkpoint."""
+        checkpoint, _ = RedditBackfillCheckpoint.objects.get_or_create(dump_path=os.path.abspath(dump_path))
+        if restart:
+            checkpoint.offset, checkpoint.byte_offset, checkpoint.rows_loaded, checkpoint.completed = 0, 0, 0, False
+            checkpoint.save()
+
+        if checkpoint.completed:
+            self.stdout.write(f"{dump_path} has already been loaded ({checkpoint.rows_loaded} posts), skipping")
+            return
+
+        # Uncompressed dumps are seeked to the end of the loaded lines. Checkpoints created before the byte
+        # offset was stored (a byte offset of 0 after loading lines) are resumed by skipping lines:
+        seek = not dump_path.endswith(COMPRESSED_EXTENSIONS) and (checkpoint.byte_offset or not checkpoint.offset)
+
+        if checkpoint.offset:
+            resume_method = f"seeking to byte {checkpoint.byte_offset}" if seek else "skipping the loaded lines"
+            self.stdout.write(f"Resuming {dump_path} from line {checkpoint.offset}, {resume_method}")
+
+        offset, byte_offset, chunk = 0, 0, []
+        with open_dump(dump_path) as dump:
+            if seek:
+                dump.seek(checkpoint.byte_offset)
+                offset, byte_offset = checkpoint.offset, checkpoint.byte_offset
+
+            for line in dump:
+                offset += 1
+                byte_offset += len(line)
+
+                # Skipping the lines loaded by a previous run:
+                if offset <= checkpoint.offset:
+                    continue
+
+                post = self.map_record(line)
+                if post is not None:
+                    chunk.append(post)
+
+                if offset % chunk_size == 0:
+                    self.load_chunk(checkpoint, chunk, offset, byte_offset)
+                    chunk = []
+
+        self.load_chunk(checkpoint, chunk, offset, byte_offset, completed=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {dump_path}: {checkpoint.offset} lines, {checkpoint.rows_loaded} posts inserted"))
+
+    def load_chunk(self, checkpoint, chunk, offset, byte_offset, completed=False):
+        """Writes a chunk of mapped posts, recomputes the daily rollups of their days and advances the 
+        checkpoint in a single transaction, recorded as a 'write' stage of the ingestion run. The data
+        version of the reddit source is bumped once the chunk is committed."""
+        with track_stage(self.ingestion_run, "write", checkpoint.dump_path) as stage, transaction.atomic():
+            # Resolving the authors of the chunk:
+            authors = get_or_create_reddit_authors({post["author"] for post in chunk if post["author"] is not None})
+            for post in chunk:
+                author = authors.get(post.pop("author"))
+                post["author_id"] = author.id if author else None
+
+            inserted = copy_reddit_posts(chunk)
+            refresh_reddit_daily_rollups({(post["subreddit_id"], post["created_on"].date()) for post in chunk})
+
+            checkpoint.offset = offset
+            checkpoint.byte_offset = byte_offset
+            checkpoint.rows_loaded += inserted
+            checkpoint.completed = completed
+            checkpoint.save()
+            stage.rows = inserted
+
+        IngestionRun.bump_data_version("reddit")
+
+        self.stdout.write(f"{checkpoint.dump_path}: {offset} lines, {checkpoint.rows_loaded} posts inserted")
+
+    def map_record(self, line):
+        """Maps a line of the dump onto the RedditPosts fields.
+
+        Args:
+            line (bytes): The line of the dump, invalid utf-8 is replaced.
+
+        Returns:
+            dict|None: The post keyed by field attribute name with the author username under 'author',
+                or None if the line is not a submission or its subreddit is skipped.
+
+        """
+        try:
+            record = json.loads(line.decode("utf-8", errors="replace"))
+        except ValueError:
+            return None
+
+        if not isinstance(record, dict) or not record.get("id") or "title" not in record or not record.get("created_utc"):
+            return None
+
+        # Resolving the subreddit through the in-memory map:
+        subreddit_name = record.get("subreddit") or ""
+        subreddit_id = self.subreddit_ids.get(subreddit_name.lower())
+        if subreddit_id is None:
+            if not self.create_subreddits or not subreddit_name:
+                return None
+
+            subreddit_id = Subreddit.objects.create(name=subreddit_name).id
+            self.subreddit_ids[subreddit_name.lower()] = subreddit_id
+
+        author = record.get("author")
+        return {
+            "id": record["id"][:_max_length("id")],
+            "subreddit_id": subreddit_id,
+            "title": (record["title"] or "")[:_max_length("title")],
+            "content": record.get("selftext"),
+            "upvote_ratio": record.get("upvote_ratio"),
+            "score": record.get("score"),
+            "num_comments": record.get("num_comments"),
+            "created_on": _utc_datetime(float(record["created_utc"])),
+            "stickied": record.get("stickied"),
+            "over_18": record.get("over_18"),
+            "spoiler": record.get("spoiler"),
+            "permalink": (record.get("permalink") or "")[:_max_length("permalink")] or None,
+            "author": author if author and author != "[deleted]" else None,
+            "listings": []
+        }
+
+def _max_length(field_name):
+    """Returns the max_length of a RedditPosts CharField, used to truncate over long dump values."""
+    return RedditPosts._meta.get_field(field_name).max_length
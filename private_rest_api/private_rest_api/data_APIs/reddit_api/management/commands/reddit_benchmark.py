@@ -0,0 +1,149 @@
+# Importing django methods:
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+# Importing native packages:
+import time
+
+# Importing Reddit Database Models and extraction methods:
+from data_APIs.reddit_api.models import Subreddit, RedditDeveloperAccount
+from data_APIs.reddit_api.data_extraction import extract_reddit_posts
+from data_APIs.reddit_api.rate_limiting import RedditRateLimiter
+from data_APIs.reddit_api.replay import CassetteRecorder, FakeRedditServer
+
+class StatementCounter(object):
+    """A database execute wrapper that counts the SQL statements executed while it is installed."""
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+class Command(BaseCommand):
+    """The management command that benchmarks the reddit ingestion pipeline by running the
+    'extract_reddit_posts' method against a FakeRedditServer replaying a recorded cassette.
+
+    It reports the number of posts written per second, the number of API calls made and the number
+    of database statements executed per post. By default all database writes are rolled back once the
+    benchmark is finished. With '--record' the method is instead run against the live Reddit API and
+    the responses are recorded to the cassette.
+
+        python manage.py reddit_benchmark cassette.jsonl --record --subreddits python django
+        python manage.py reddit_benchmark cassette.jsonl --latency 0.1
+
+    """
+    help = "Benchmarks reddit post ingestion against a replayed cassette of Reddit API responses."
+
+    def add_arguments(self, parser):
+        parser.add_argument("cassette", help="The path to the JSONL cassette to replay or record.")
+        parser.add_argument(
+            "--record", action="store_true",
+            help="Record the responses of the live Reddit API to the cassette instead of replaying it.")
+        parser.add_argument(
+            "--latency", type=float, default=0,
+            help="The number of seconds each replayed API response is delayed by.")
+        parser.add_argument(
+            "--subreddits", nargs="+",
+            help="The subreddits to ingest. Defaults to the subreddits recorded in the cassette.")
+        parser.add_argument(
+            "--post-filters", nargs="+", default=["top", "hot"],
+            help="The listings to ingest for each subreddit.")
+        parser.add_argument(
+            "--keep", action="store_true",
+            help="Keep the posts written by the benchmark instead of rolling them back.")
+
+    def handle(self, *args, **options):
+        if options["record"]:
+            if not options["subreddits"]:
+                raise CommandError("The subreddits to record must be provided with --subreddits.")
+            self.record(options)
+        else:
+            self.replay(options)
+
+    def record(self, options):
+        """Runs the ingestion against the live Reddit API, recording the responses to the cassette."""
+        dev_account = RedditDeveloperAccount.objects.first()
+        if dev_account is None:
+            raise CommandError("A RedditDeveloperAccount is required to record a cassette.")
+
+        with CassetteRecorder(options["cassette"]) as recorder:
+            results = self.run_ingestion(
+                options,
+                dev_client_id=dev_account.dev_client_id,
+                dev_secret=dev_account.dev_secret,
+                dev_user_agent=dev_account.dev_user_agent,
+                praw_config={"requestor_kwargs": {"session": recorder}})
+
+        self.stdout.write(self.style.SUCCESS(f"Recorded {options['cassette']}"))
+        self.report(results)
+
+    def replay(self, options):
+        """Runs the ingestion against a FakeRedditServer replaying the cassette."""
+        try:
+            server = FakeRedditServer(options["cassette"], latency=options["latency"])
+        except FileNotFoundError:
+            raise CommandError(f"The cassette {options['cassette']} does not exist.")
+
+        if not options["subreddits"]:
+            options["subreddits"] = server.subreddit_names
+
+        # The benchmark draws from its own rate limit budget so that it does not consume the live budget:
+        rate_limiter = RedditRateLimiter(key_prefix="reddit:benchmark:ratelimit", capacity=10 ** 9)
+
+        with server:
+            results = self.run_ingestion(
+                options,
+                dev_client_id="replay",
+                dev_secret="replay",
+                dev_user_agent="reddit_benchmark replay",
+                praw_config=server.praw_config,
+                rate_limiter=rate_limiter)
+
+        results["api_calls"] = server.request_count
+        self.report(results)
+
+        if server.unmatched_requests:
+            self.stdout.write(self.style.WARNING(
+                f"{len(server.unmatched_requests)} requests did not match the cassette, eg: {server.unmatched_requests[0]}"))
+
+    def run_ingestion(self, options, **extraction_kwargs):
+        """Runs 'extract_reddit_posts' for the subreddits, timing it and counting the SQL statements.
+
+        Returns:
+            dict: The inserted and updated post counts, the elapsed seconds and the statement count.
+
+        """
+        statement_counter = StatementCounter()
+        with transaction.atomic():
+            subreddits = [Subreddit.objects.get_or_create(name=name)[0] for name in options["subreddits"]]
+
+            start = time.perf_counter()
+            with connection.execute_wrapper(statement_counter):
+                inserted, updated = extract_reddit_posts(
+                    subreddits=subreddits,
+                    post_filters=options["post_filters"],
+                    **extraction_kwargs)
+            elapsed = time.perf_counter() - start
+
+            # Discarding the benchmark writes:
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+        return {
+            "inserted": inserted,
+            "updated": updated,
+            "elapsed": elapsed,
+            "statements": statement_counter.count,
+            "api_calls": None
+        }
+
+    def report(self, results):
+        """Writes the benchmark results to stdout."""
+        posts = results["inserted"] + results["updated"]
+        self.stdout.write(f"Posts written: {posts} ({results['inserted']} inserted, {results['updated']} updated)")
+        self.stdout.write(f"Elapsed: {results['elapsed']:.3f}s ({posts / results['elapsed']:.1f} posts/sec)")
+        if results["api_calls"] is not None:
+            self.stdout.write(f"API calls: {results['api_calls']}")
+        self.stdout.write(
+            f"DB statements: {results['statements']} ({results['statements'] / max(posts, 1):.2f} per post)")
@@ -0,0 +1,111 @@
+# Generated by Django 3.1.4 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def populate_reddit_authors(apps, schema_editor):
+    """Creates a RedditAuthor for every distinct author string stored on the reddit posts,
+    using the author attributes from their most recent post, and links the posts to them.
+    """
+    RedditPosts = apps.get_model("reddit_api", "RedditPosts")
+    RedditAuthor = apps.get_model("reddit_api", "RedditAuthor")
+
+    authors = {}
+    author_rows = RedditPosts.objects.exclude(author__isnull=True).order_by("-created_on").values(
+        "author", "author_is_gold", "author_mod", "author_has_verified_email", "comment_karma", "author_created")
+
+    for row in author_rows.iterator():
+        if row["author"] in authors:
+            continue
+
+        authors[row["author"]] = RedditAuthor(
+            name=row["author"],
+            is_gold=row["author_is_gold"],
+            is_mod=row["author_mod"],
+            has_verified_email=row["author_has_verified_email"],
+            comment_karma=row["comment_karma"],
+            created_on=row["author_created"])
+
+    RedditAuthor.objects.bulk_create(authors.values(), batch_size=1000)
+
+    RedditPosts.objects.update(
+        reddit_author=Subquery(RedditAuthor.objects.filter(name=OuterRef("author")).values("id")[:1]))
+
+
+def restore_author_columns(apps, schema_editor):
+    """Copies the RedditAuthor attributes back onto the reddit post author columns."""
+    RedditPosts = apps.get_model("reddit_api", "RedditPosts")
+    RedditAuthor = apps.get_model("reddit_api", "RedditAuthor")
+
+    author = RedditAuthor.objects.filter(id=OuterRef("reddit_author"))
+    RedditPosts.objects.update(
+        author=Subquery(author.values("name")[:1]),
+        author_is_gold=Subquery(author.values("is_gold")[:1]),
+        author_mod=Subquery(author.values("is_mod")[:1]),
+        author_has_verified_email=Subquery(author.values("has_verified_email")[:1]),
+        comment_karma=Subquery(author.values("comment_karma")[:1]),
+        author_created=Subquery(author.values("created_on")[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit_api', '0004_auto_20220117_1444'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RedditAuthor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=300, unique=True)),
+                ('is_gold', models.BooleanField(null=True)),
+                ('is_mod', models.BooleanField(null=True)),
+                ('has_verified_email', models.BooleanField(null=True)),
+                ('comment_karma', models.IntegerField(null=True)),
+                ('created_on', models.DateTimeField(null=True)),
+                ('last_refreshed', models.DateTimeField(null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Reddit Authors',
+                'db_table': 'redditauthors',
+            },
+        ),
+        migrations.AddField(
+            model_name='redditposts',
+            name='reddit_author',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='reddit_api.redditauthor'),
+        ),
+        migrations.RunPython(populate_reddit_authors, restore_author_columns),
+        migrations.RemoveField(
+            model_name='redditposts',
+            name='author',
+        ),
+        migrations.RemoveField(
+            model_name='redditposts',
+            name='author_created',
+        ),
+        migrations.RemoveField(
+            model_name='redditposts',
+            name='author_has_verified_email',
+        ),
+        migrations.RemoveField(
+            model_name='redditposts',
+            name='author_is_gold',
+        ),
+        migrations.RemoveField(
+            model_name='redditposts',
+            name='author_mod',
+        ),
+        migrations.RemoveField(
+            model_name='redditposts',
+            name='comment_karma',
+        ),
+        migrations.RenameField(
+            model_name='redditposts',
+            old_name='reddit_author',
+            new_name='author',
+        ),
+    ]
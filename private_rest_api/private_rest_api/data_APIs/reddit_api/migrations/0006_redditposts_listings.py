@@ -0,0 +1,18 @@
+# Generated by Django 3.1.4 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit_api', '0005_redditauthor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='redditposts',
+            name='listings',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
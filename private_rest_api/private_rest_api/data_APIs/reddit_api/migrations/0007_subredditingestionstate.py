@@ -0,0 +1,23 @@
+# Generated by Django 3.1.4 on 2026-10-18 11:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit_api', '0006_redditposts_listings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubredditIngestionState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_hashes', models.JSONField(blank=True, default=dict)),
+                ('last_run_at', models.DateTimeField(null=True)),
+                ('subreddit', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ingestion_state', to='reddit_api.subreddit')),
+            ],
+        ),
+    ]
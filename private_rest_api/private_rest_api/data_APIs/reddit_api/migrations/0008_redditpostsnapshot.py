@@ -0,0 +1,63 @@
+# Generated by Django 3.1.4 on 2026-10-18 11:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+PARTITIONED_SNAPSHOT_TABLE_SQL = """
+DROP TABLE "redditpostsnapshots";
+CREATE TABLE "redditpostsnapshots" (
+    "id" bigserial NOT NULL,
+    "run_id" uuid NOT NULL,
+    "captured_on" timestamp with time zone NOT NULL,
+    "score" integer NULL,
+    "num_comments" integer NULL,
+    "upvote_ratio" double precision NULL,
+    "post_id" varchar(20) NOT NULL,
+    PRIMARY KEY ("id", "captured_on")
+) PARTITION BY RANGE ("captured_on");
+CREATE TABLE "redditpostsnapshots_default" PARTITION OF "redditpostsnapshots" DEFAULT;
+CREATE INDEX "redditpostsnapshots_post_idx" ON "redditpostsnapshots" ("post_id", "captured_on");
+"""
+
+
+def partition_snapshot_table(apps, schema_editor):
+    """Recreates the snapshot table as a table partitioned by day on postgres. The daily partitions
+    are created by the loader before each write, rows outside of them land in the default partition.
+    Other database backends keep the plain table.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(PARTITIONED_SNAPSHOT_TABLE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit_api', '0007_subredditingestionstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RedditPostSnapshot',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('run_id', models.UUIDField()),
+                ('captured_on', models.DateTimeField()),
+                ('score', models.IntegerField(null=True)),
+                ('num_comments', models.IntegerField(null=True)),
+                ('upvote_ratio', models.FloatField(null=True)),
+                ('post', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='snapshots', to='reddit_api.redditposts')),
+            ],
+            options={
+                'verbose_name_plural': 'Reddit Post Snapshots',
+                'db_table': 'redditpostsnapshots',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='redditpostsnapshot',
+            index=models.Index(fields=['post', 'captured_on'], name='redditpostsnapshots_post_idx'),
+        ),
+        migrations.RunPython(partition_snapshot_table, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.1.4 on 2026-10-18 11:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit_api', '0008_redditpostsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RedditComment',
+            fields=[
+                ('id', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('parent_id', models.CharField(max_length=20, null=True)),
+                ('body', models.TextField(null=True)),
+                ('score', models.IntegerField(null=True)),
+                ('depth', models.IntegerField(null=True)),
+                ('created_on', models.DateTimeField()),
+                ('stickied', models.BooleanField(null=True)),
+                ('is_submitter', models.BooleanField(null=True)),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='comments', to='reddit_api.redditauthor')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='reddit_api.redditposts')),
+            ],
+            options={
+                'verbose_name_plural': 'Reddit Comments',
+                'db_table': 'redditcomments',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.4 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit_api', '0009_redditcomment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RedditBackfillCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dump_path', models.CharField(max_length=500, unique=True)),
+                ('offset', models.BigIntegerField(default=0)),
+                ('rows_loaded', models.BigIntegerField(default=0)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Reddit Backfill Checkpoints',
+                'db_table': 'redditbackfillcheckpoints',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.4 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit_api', '0010_redditbackfillcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subredditingestionstate',
+            name='listing_depth',
+            field=models.IntegerField(default=25),
+        ),
+        migrations.AddField(
+            model_name='subredditingestionstate',
+            name='new_post_history',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.1.4 on 2026-10-18 12:40
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_SQL = """
+CREATE FUNCTION redditposts_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER redditposts_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, content ON "redditposts"
+    FOR EACH ROW EXECUTE PROCEDURE redditposts_search_vector_update();
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS redditposts_search_vector_trigger ON "redditposts";
+DROP FUNCTION IF EXISTS redditposts_search_vector_update();
+"""
+
+
+def create_search_vector_trigger(apps, schema_editor):
+    """Creates the trigger that maintains the search vector of every post on postgres. Other database
+    backends leave the column empty. The vectors of the existing posts are filled in batches and GIN indexed
+    concurrently by the '0017_redditposts_search_vector_index' migration, so that neither locks the table.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(SEARCH_VECTOR_SQL)
+
+
+def drop_search_vector_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(DROP_SEARCH_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit_api', '0011_subredditingestionstate_listing_depth'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='redditposts',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector_trigger, drop_search_vector_trigger),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.1.4 on 2026-10-18 13:10
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# The columns that get a trigram index for the case sensitive 'contains' filters and a trigram index
+# of their upper case value for the 'icontains' filters, which django compiles to UPPER(column) LIKE UPPER(%s):
+TRIGRAM_INDEXES = [
+    ("title", "redditposts_title_trgm_idx", "redditposts_title_upper_trgm_idx"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Creates the GIN trigram indexes without locking the table against writes on postgres. Other
+    database backends have no trigram indexes and run the substring filters as plain LIKE scans.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    table = schema_editor.quote_name(apps.get_model("reddit_api", "RedditPosts")._meta.db_table)
+    for column, index_name, upper_index_name in TRIGRAM_INDEXES:
+        column = schema_editor.quote_name(column)
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {schema_editor.quote_name(index_name)} "
+            f"ON {table} USING gin ({column} gin_trgm_ops)")
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {schema_editor.quote_name(upper_index_name)} "
+            f"ON {table} USING gin (UPPER({column}) gin_trgm_ops)")
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for _, index_name, upper_index_name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(index_name)}")
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(upper_index_name)}")
+
+
+class Migration(migrations.Migration):
+
+    # The indexes are built concurrently which can not be done inside a transaction:
+    atomic = False
+
+    dependencies = [
+        ('reddit_api', '0012_redditposts_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
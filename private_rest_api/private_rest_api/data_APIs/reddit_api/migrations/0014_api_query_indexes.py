@@ -0,0 +1,54 @@
+# Generated by Django 3.1.4 on 2026-10-18 12:13
+
+from django.db import migrations, models
+
+from api_core.operations import AddIndexConcurrentlyIfPostgres
+
+
+# BRIN indexes of the timestamp columns that rows are appended in order of. They store the range of
+# each block of the table so they are a tiny fraction of the size of a B-tree and serve date range filters:
+BRIN_INDEXES = [
+    ("redditpostsnapshots", "captured_on", "redditpostsnapshots_captured_brin"),
+    ("redditcomments", "created_on", "redditcomments_created_brin"),
+]
+
+
+def create_brin_indexes(apps, schema_editor):
+    """Creates the BRIN indexes on postgres, other database backends do not support BRIN indexes."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for table, column, index_name in BRIN_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {schema_editor.quote_name(index_name)} "
+            f"ON {schema_editor.quote_name(table)} USING brin ({schema_editor.quote_name(column)})")
+
+
+def drop_brin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for _, _, index_name in BRIN_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(index_name)}")
+
+
+class Migration(migrations.Migration):
+
+    # The indexes are built concurrently which can not be done inside a transaction:
+    atomic = False
+
+    dependencies = [
+        ('reddit_api', '0013_trigram_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='redditposts',
+            index=models.Index(fields=['subreddit', '-created_on'], name='redditposts_subreddit_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='redditposts',
+            index=models.Index(fields=['-created_on', '-id'], name='redditposts_created_idx'),
+        ),
+        migrations.RunPython(create_brin_indexes, drop_brin_indexes),
+    ]
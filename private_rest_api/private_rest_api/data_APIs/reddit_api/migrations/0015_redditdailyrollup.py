@@ -0,0 +1,67 @@
+# Generated by Django 3.1.4 on 2026-10-18 12:32
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def populate_daily_rollups(apps, schema_editor):
+    """Aggregates the existing posts into the daily rollups, afterwards the rollups are maintained by ingestion."""
+    RedditPosts = apps.get_model("reddit_api", "RedditPosts")
+    RedditDailyRollup = apps.get_model("reddit_api", "RedditDailyRollup")
+
+    rollups = (
+        RedditPosts.objects.filter(subreddit__isnull=False)
+        .order_by()
+        .annotate(day=TruncDay("created_on", output_field=models.DateField(), tzinfo=timezone.utc))
+        .values("subreddit_id", "day")
+        .annotate(
+            post_count=models.Count("id"),
+            total_score=models.Sum("score"),
+            average_score=models.Avg("score"),
+            total_comments=models.Sum("num_comments"),
+            average_comments=models.Avg("num_comments"),
+            average_upvote_ratio=models.Avg("upvote_ratio")
+        )
+    )
+    RedditDailyRollup.objects.bulk_create((RedditDailyRollup(**rollup) for rollup in rollups.iterator()), batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit_api', '0014_api_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RedditDailyRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('post_count', models.IntegerField(default=0)),
+                ('total_score', models.BigIntegerField(null=True)),
+                ('average_score', models.FloatField(null=True)),
+                ('total_comments', models.BigIntegerField(null=True)),
+                ('average_comments', models.FloatField(null=True)),
+                ('average_upvote_ratio', models.FloatField(null=True)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('subreddit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='reddit_api.subreddit')),
+            ],
+            options={
+                'verbose_name_plural': 'Reddit Daily Rollups',
+                'db_table': 'redditdailyrollups',
+                'ordering': ['-day', 'subreddit'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='redditdailyrollup',
+            index=models.Index(fields=['-day'], name='redditdailyrollups_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='redditdailyrollup',
+            constraint=models.UniqueConstraint(fields=('subreddit', 'day'), name='redditdailyrollups_bucket_unique'),
+        ),
+        migrations.RunPython(populate_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.4 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit_api', '0015_redditdailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='redditbackfillcheckpoint',
+            name='byte_offset',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
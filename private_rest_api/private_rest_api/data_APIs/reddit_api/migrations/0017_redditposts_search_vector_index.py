@@ -0,0 +1,69 @@
+# Generated by Django 3.1.4 on 2026-10-18 14:05
+
+from django.db import migrations
+
+
+# The number of posts whose search vector is filled by each UPDATE statement of the backfill:
+BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_search_vectors(apps, schema_editor, batch_size=BACKFILL_BATCH_SIZE):
+    """Fills the search vector of the posts written before the 'redditposts_search_vector_trigger' was created
+    on postgres. The posts are updated in batches of primary keys that are each committed on their own, so 
+    the rows of a batch are only locked while it is updated and autovacuum can reclaim the old row versions
+    between the batches. Posts whose vector was set by the trigger are not rewritten.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    table = schema_editor.quote_name(apps.get_model("reddit_api", "RedditPosts")._meta.db_table)
+    with schema_editor.connection.cursor() as cursor:
+        last_id = ""
+        while True:
+            cursor.execute(
+                f"SELECT max(id) FROM (SELECT id FROM {table} WHERE id > %s ORDER BY id LIMIT %s) AS batch",
+                [last_id, batch_size])
+            batch_last_id = cursor.fetchone()[0]
+            if batch_last_id is None:
+                break
+
+            cursor.execute(
+                f"UPDATE {table} SET search_vector = "
+                f"setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+                f"setweight(to_tsvector('english', coalesce(content, '')), 'B') "
+                f"WHERE id > %s AND id <= %s AND search_vector IS NULL",
+                [last_id, batch_last_id])
+            last_id = batch_last_id
+
+
+def create_search_vector_index(apps, schema_editor):
+    """GIN indexes the search vectors without locking the table against writes on postgres."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute(
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS "redditposts_search_vector_idx" '
+        f'ON {schema_editor.quote_name(apps.get_model("reddit_api", "RedditPosts")._meta.db_table)} USING gin ("search_vector")')
+
+
+def drop_search_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS "redditposts_search_vector_idx"')
+
+
+class Migration(migrations.Migration):
+
+    # The batches of the backfill are committed separately and the index is built concurrently, neither
+    # can be done inside a transaction:
+    atomic = False
+
+    dependencies = [
+        ('reddit_api', '0016_redditbackfillcheckpoint_byte_offset'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.RunPython(create_search_vector_index, drop_search_vector_index),
+    ]
@@ -1,4 +1,9 @@
 from django.db import models
+from django.conf import settings
+from django.utils import timezone
+from django.contrib.postgres.search import SearchVectorField
+
+import math
 
 class Subreddit(models.Model):
     """The database model for a subreddit. It is used mainly as a relational field connected to
@@ -16,6 +21,117 @@ class Subreddit(models.Model):
     def __str__(self):
         return self.name
 
+class SubredditIngestionState(models.Model):
+    """The database model that stores the state of the incremental data ingestion for a subreddit
+    between ingestion runs.
+
+    Attributes:
+        subreddit (models.OneToOneField): The subreddit that the ingestion state belongs to.
+
+        post_hashes (models.JSONField): A dict mapping the ids of the most recently seen posts to a
+            hash of their mutable fields (score, num_comments, upvote_ratio). It is used to only write 
+            posts that are new or have changed since they were last seen. It holds at most 
+            'REDDIT_INGESTION_STATE_SIZE' posts, the least recently seen posts being dropped first.
+
+        last_run_at (models.DateTimeField): The UTC date and time of the last ingestion of the subreddit.
+
+        listing_depth (models.IntegerField): The number of posts requested from each listing of the subreddit.
+            It is adapted after every run by the 'update_listing_depth' method.
+
+        new_post_history (models.JSONField): The number of new posts found in each of the last 
+            'REDDIT_LISTING_DEPTH_HISTORY' runs, the most recent run last.
+    """
+    subreddit = models.OneToOneField(Subreddit, on_delete=models.CASCADE, related_name="ingestion_state")
+    post_hashes = models.JSONField(default=dict, blank=True)
+    last_run_at = models.DateTimeField(null=True)
+    listing_depth = models.IntegerField(default=25)
+    new_post_history = models.JSONField(default=list, blank=True)
+
+    def update_listing_depth(self, new_post_count, saturated):
+        """Adapts the listing depth of the subreddit to the number of new posts found in a run. The
+        state is not saved, it is saved by the 'update_post_hashes' method at the end of the run.
+
+        If a listing was read to its full depth and its last post had not been seen in an earlier run
+        there may be new posts deeper in the listing that were missed, so the depth is doubled. Otherwise
+        the depth is set to the largest number of new posts found in the recent runs multiplied by the 
+        'REDDIT_LISTING_DEPTH_HEADROOM' setting, shrinking it for subreddits with few new posts. The 
+        depth is kept between 'REDDIT_LISTING_MIN_DEPTH' and 'REDDIT_LISTING_MAX_DEPTH'.
+
+        Runs without any previously seen posts (the first run of a subreddit) do not change the depth.
+
+        Args:
+            new_post_count (int): The number of posts found in the run that had not been seen before.
+
+            saturated (bool): True if a listing was read to its full depth and its last post was new.
+
+        """
+        if not self.post_hashes:
+            return
+
+        self.new_post_history = (self.new_post_history + [new_post_count])[-settings.REDDIT_LISTING_DEPTH_HISTORY:]
+        if saturated:
+            listing_depth = self.listing_depth * 2
+        else:
+            listing_depth = math.ceil(max(self.new_post_history) * settings.REDDIT_LISTING_DEPTH_HEADROOM)
+
+        self.listing_depth = min(max(listing_depth, settings.REDDIT_LISTING_MIN_DEPTH), settings.REDDIT_LISTING_MAX_DEPTH)
+
+    def update_post_hashes(self, post_hashes):
+        """Merges the hashes of the posts seen in an ingestion run into the stored hashes and 
+        saves the state.
+
+        Args:
+            post_hashes (dict): A dict mapping post ids to the hash of their mutable fields.
+
+        """
+        merged_hashes = {post_id: post_hash for post_id, post_hash in self.post_hashes.items() if post_id not in post_hashes}
+        merged_hashes.update(post_hashes)
+
+        self.post_hashes = dict(list(merged_hashes.items())[-settings.REDDIT_INGESTION_STATE_SIZE:])
+        self.last_run_at = timezone.now()
+        self.save()
+
+    def __str__(self):
+        return f"{self.subreddit}-{self.last_run_at}"
+
+class RedditAuthor(models.Model):
+    """The database model for a reddit user that has authored posts. 
+    
+    Author attributes require an additional API request per user to extract so they are stored 
+    once per author instead of once per post. The attributes are only re-extracted from the API 
+    once they are older than the 'REDDIT_AUTHOR_REFRESH_TTL' setting.
+
+    Attributes:
+        name (models.CharField): The unique username of the author.
+
+        is_gold (models.BooleanField): A Boolean indicating if the author has reddit premium (gold).
+
+        is_mod (models.BooleanField): A Boolean indicating if the author is a moderator.
+
+        has_verified_email (models.BooleanField): A Boolean indicating if the author has a verified email.
+
+        comment_karma (models.IntegerField): The comment karma of the author.
+
+        created_on (models.DateTimeField): The UTC date and time that the author's account was created.
+
+        last_refreshed (models.DateTimeField): The UTC date and time that the author attributes were last
+            extracted from the API. It is null if the author has never been extracted.
+    """
+    name = models.CharField(max_length=300, unique=True)
+    is_gold = models.BooleanField(null=True)
+    is_mod = models.BooleanField(null=True)
+    has_verified_email = models.BooleanField(null=True)
+    comment_karma = models.IntegerField(null=True)
+    created_on = models.DateTimeField(null=True)
+    last_refreshed = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = "redditauthors"
+        verbose_name_plural = "Reddit Authors"
+
+    def __str__(self):
+        return self.name
+
 # Reddit Data Pipeline Model:
 class RedditPosts(models.Model):
     """A django model object that represents the data table
@@ -27,11 +143,11 @@ class RedditPosts(models.Model):
     during ingestion.
     The ETL API extract subreddit data in the tabular format:
     
-    +----------+---------+-------+-------+------------+-----+------------+----------+--------+-------+-------+---------+------+--------------+----------+-------------------------+--------------+-------------+
-    |id (index)|subreddit| title |content|upvote_ratio|score|num_comments|created_on|stickied|over_18|spoiler|permalink|author|author_is_gold|author_mod|author_has_verified_email|author_created|comment_karma|
-    +----------+---------+-------+-------+------------+-----+------------+----------+--------+-------+-------+---------+------+--------------+----------+-------------------------+--------------+-------------+
-    | string   |   FK    |string | string|   float    | int |     int    | datetime |  Bool  | Bool  |  Bool |   str   |  str |      Bool    |  Bool    |           Bool          |      str     |     int     |
-    +----------+---------+-------+-------+------------+-----+------------+----------+--------+-------+-------+---------+------+--------------+----------+-------------------------+--------------+-------------+
+    +----------+---------+-------+-------+------------+-----+------------+----------+--------+-------+-------+---------+------+--------+
+    |id (index)|subreddit| title |content|upvote_ratio|score|num_comments|created_on|stickied|over_18|spoiler|permalink|author|listings|
+    +----------+---------+-------+-------+------------+-----+------------+----------+--------+-------+-------+---------+------+--------+
+    | string   |   FK    |string | string|   float    | int |     int    | datetime |  Bool  | Bool  |  Bool |   str   |  FK  |  JSON  |
+    +----------+---------+-------+-------+------------+-----+------------+----------+--------+-------+-------+---------+------+--------+
     Attributes:
         id (models.CharField): The unique reddit id for the post.
         
@@ -58,19 +174,16 @@ class RedditPosts(models.Model):
         
         permalink (models.CharField): The permanent url path to the post.
         
-        author (models.CharField): The name of the author of the post.
-        
-        author_is_gold: (models.IntegerField): A Boolean indicating if the author of the post has been given gold. 
-        
-        author_mod: (models.BooleanField): A Boolean, indicating if the author
-            of the post is a moderator of the subreddit. 
-        
-        author_has_verified_email: (models.BooleanField): A Boolean Field indicating if the author
-            of the post has a verified email. 
-        
-        author_created (models.DateTimeField): The UTC date and time that the author's account was created.
-        
-        comment_karma (models.IntegerField): The amount of karma that a post has.
+        author (models.ForeignKey): A foreign key connection to the RedditAuthor data model. The author
+            attributes (gold, moderator, verified email, account creation date and comment karma) are
+            stored on the RedditAuthor model.
+
+        listings (models.JSONField): The list of subreddit listings (eg: ["top", "hot"]) that the post 
+            appeared in when it was last extracted.
+
+        search_vector (SearchVectorField): The full text search document of the title (weight A) and 
+            content (weight B) of the post. On postgres it is maintained by the 'redditposts_search_vector_update'
+            trigger and GIN indexed by the 'redditposts_search_vector_idx' index, it is never written by django.
     """
     id = models.CharField(
         max_length=20,
@@ -91,29 +204,209 @@ class RedditPosts(models.Model):
     stickied = models.BooleanField(null=True)
     over_18 = models.BooleanField(null=True)
     spoiler = models.BooleanField(null=True)
-    author_is_gold = models.BooleanField(null=True)
-    author_mod = models.BooleanField(null=True)
-    author_has_verified_email = models.BooleanField(null=True)
-
 
     permalink = models.CharField(
         max_length=300,
         null=True
     )
 
-    author = models.CharField(max_length=300, null=True)
-    author_created = models.DateTimeField(null=True)
-    comment_karma = models.IntegerField(null=True)
+    author = models.ForeignKey(RedditAuthor, on_delete=models.SET_NULL, null=True, related_name="posts")
+    listings = models.JSONField(default=list, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         db_table = "redditposts"
         verbose_name_plural = "Reddit Posts"
         abstract = False
         ordering = ['-created_on']
+
+        # Indexes matching the queries of the reddit posts endpoint, posts of a subreddit newest first 
+        # and all posts newest first (the ordering of the page number and cursor paginations):
+        indexes = [
+            models.Index(fields=["subreddit", "-created_on"], name="redditposts_subreddit_idx"),
+            models.Index(fields=["-created_on", "-id"], name="redditposts_created_idx")
+        ]
         
     def __str__(self):
         return f"{self.title}-{self.subreddit}"
 
+class RedditDailyRollup(models.Model):
+    """The database model that stores the daily aggregates of the reddit posts of each subreddit, so
+    that the post counts, scores and comment volume of subreddits over time are read from a few hundred
+    rollup rows instead of aggregating millions of posts.
+
+    A row is kept for every (subreddit, UTC day) bucket that contains posts. The rows are maintained 
+    incrementally by the ingestion pipeline, after posts are written only the buckets of the written 
+    posts are recomputed (see the 'refresh_reddit_daily_rollups' method).
+
+    Attributes:
+        subreddit (models.ForeignKey): The subreddit of the posts.
+
+        day (models.DateField): The UTC day that the posts were created on.
+
+        post_count (models.IntegerField): The number of posts created on the day.
+
+        total_score (models.BigIntegerField): The sum of the scores of the posts.
+
+        average_score (models.FloatField): The average score of the posts.
+
+        total_comments (models.BigIntegerField): The sum of the number of comments of the posts.
+
+        average_comments (models.FloatField): The average number of comments of the posts.
+
+        average_upvote_ratio (models.FloatField): The average upvote ratio of the posts.
+
+        updated_on (models.DateTimeField): The UTC date and time the bucket was last recomputed.
+    """
+    subreddit = models.ForeignKey(Subreddit, on_delete=models.CASCADE, related_name="daily_rollups")
+    day = models.DateField()
+    post_count = models.IntegerField(default=0)
+    total_score = models.BigIntegerField(null=True)
+    average_score = models.FloatField(null=True)
+    total_comments = models.BigIntegerField(null=True)
+    average_comments = models.FloatField(null=True)
+    average_upvote_ratio = models.FloatField(null=True)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "redditdailyrollups"
+        verbose_name_plural = "Reddit Daily Rollups"
+        ordering = ["-day", "subreddit"]
+        constraints = [
+            models.UniqueConstraint(fields=["subreddit", "day"], name="redditdailyrollups_bucket_unique")
+        ]
+        indexes = [
+            models.Index(fields=["-day"], name="redditdailyrollups_day_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.subreddit}-{self.day}"
+
+class RedditComment(models.Model):
+    """The database model for a comment on a reddit post. Comments are extracted for recently 
+    created posts by the 'perform_reddit_comment_ingestion' celery task.
+
+    Attributes:
+        id (models.CharField): The unique reddit id for the comment.
+
+        post (models.ForeignKey): The reddit post that the comment was made on.
+
+        parent_id (models.CharField): The reddit fullname of the parent of the comment. It is the post
+            (prefixed with 't3_') for top level comments and another comment (prefixed with 't1_') for replies.
+
+        author (models.ForeignKey): A foreign key connection to the RedditAuthor data model.
+
+        body (models.TextField): The text content of the comment in markdown format.
+
+        score (models.IntegerField): The number of upvotes the comment has.
+
+        depth (models.IntegerField): The depth of the comment in the comment tree, 0 for top level comments.
+
+        created_on (models.DateTimeField): The Date and Time the comment was created in UTC.
+
+        stickied (models.BooleanField): A Boolean indicating if the comment was pinned by a moderator.
+
+        is_submitter (models.BooleanField): A Boolean indicating if the comment was made by the author of the post.
+    """
+    id = models.CharField(max_length=20, primary_key=True)
+    post = models.ForeignKey(RedditPosts, on_delete=models.CASCADE, related_name="comments")
+    parent_id = models.CharField(max_length=20, null=True)
+    author = models.ForeignKey(RedditAuthor, on_delete=models.SET_NULL, null=True, related_name="comments")
+    body = models.TextField(null=True)
+    score = models.IntegerField(null=True)
+    depth = models.IntegerField(null=True)
+    created_on = models.DateTimeField()
+    stickied = models.BooleanField(null=True)
+    is_submitter = models.BooleanField(null=True)
+
+    class Meta:
+        db_table = "redditcomments"
+        verbose_name_plural = "Reddit Comments"
+
+    def __str__(self):
+        return f"{self.id}-{self.post_id}"
+
+class RedditPostSnapshot(models.Model):
+    """The append-only database model that stores the engagement history of reddit posts. A row is
+    written for each new or changed post in every ingestion run while the RedditPosts model only 
+    stores the current values.
+
+    Rows are never updated. They are written in bulk via the postgres COPY command and on postgres
+    the table is partitioned by day on 'captured_on' (see migration 0008) so old history can be 
+    detached or dropped one day at a time. The 'post' foreign key has no database constraint to keep
+    the inserts cheap.
+
+    Attributes:
+        post (models.ForeignKey): The reddit post that the snapshot was taken of.
+
+        run_id (models.UUIDField): The id of the ingestion run that captured the snapshot.
+
+        captured_on (models.DateTimeField): The UTC date and time the snapshot was captured. 
+
+        score (models.IntegerField): The number of upvotes the post had.
+
+        num_comments (models.IntegerField): The number of comments the post had.
+
+        upvote_ratio (models.FloatField): The ratio of upvotes to downvotes the post had.
+    """
+    id = models.BigAutoField(primary_key=True)
+    post = models.ForeignKey(
+        RedditPosts, 
+        on_delete=models.DO_NOTHING, 
+        db_constraint=False, 
+        db_index=False, 
+        related_name="snapshots")
+    run_id = models.UUIDField()
+    captured_on = models.DateTimeField()
+    score = models.IntegerField(null=True)
+    num_comments = models.IntegerField(null=True)
+    upvote_ratio = models.FloatField(null=True)
+
+    class Meta:
+        db_table = "redditpostsnapshots"
+        verbose_name_plural = "Reddit Post Snapshots"
+        indexes = [
+            models.Index(fields=["post", "captured_on"], name="redditpostsnapshots_post_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.post_id}-{self.captured_on}"
+
+class RedditBackfillCheckpoint(models.Model):
+    """The database model that stores the progress of the 'reddit_backfill' management command
+    for a dump file so that an interrupted backfill resumes where it stopped. 
+    
+    The checkpoint is updated in the same transaction as each chunk of posts is loaded.
+
+    Attributes:
+        dump_path (models.CharField): The absolute path of the dump file.
+
+        offset (models.BigIntegerField): The number of lines of the dump that have been loaded.
+
+        byte_offset (models.BigIntegerField): The number of (decompressed) bytes of the dump that have been
+            loaded, the position of the line after the last loaded line. Uncompressed dumps are resumed by 
+            seeking to it, compressed dumps are resumed by reading and skipping the loaded lines.
+
+        rows_loaded (models.BigIntegerField): The number of posts that have been inserted from the dump.
+
+        completed (models.BooleanField): A Boolean indicating if the whole dump has been loaded.
+
+        updated_on (models.DateTimeField): The UTC date and time the checkpoint was last updated.
+    """
+    dump_path = models.CharField(max_length=500, unique=True)
+    offset = models.BigIntegerField(default=0)
+    byte_offset = models.BigIntegerField(default=0)
+    rows_loaded = models.BigIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "redditbackfillcheckpoints"
+        verbose_name_plural = "Reddit Backfill Checkpoints"
+
+    def __str__(self):
+        return f"{self.dump_path}-{self.offset}"
+
 class RedditDeveloperAccount(models.Model):
     """ The model containing the information about the Reddit Developer Account that is
     used to initalize the praw api for extracting reddit posts.
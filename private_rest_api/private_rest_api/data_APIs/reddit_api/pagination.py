@@ -1,12 +1,125 @@
 # Importing pagination methods:
 from rest_framework import pagination
+from api_core.pagination import ValuesPageNumberPagination
+from rest_framework.exceptions import NotFound
+
+# Importing django methods:
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
 # Creating custom pagination for Reddit API endpoint: 
-class RedditEndpointPagination(pagination.PageNumberPagination):
+class RedditEndpointPagination(ValuesPageNumberPagination):
     """A Pagination object that overrides the default PageNumberPagination to allow for
     user specified query sizes. 
     """
     page_size = 300
     page_query_param = 'page'
     page_size_query_param = 'page_size'
-    max_page_size = 1000
\ No newline at end of file
+    max_page_size = 1000
+
+class RedditStatsPagination(ValuesPageNumberPagination):
+    """A Pagination object for the daily statistics of the subreddits. A page holds more rows than
+    the RedditEndpointPagination as the rollup rows are small.
+    """
+    page_size = 1000
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    max_page_size = 10000
+
+class RedditCursorPagination(pagination.CursorPagination):
+    """A keyset Pagination object for the RedditPosts API that pages through the posts newest first,
+    ordered on (created_on, id).
+
+    Unlike the RedditEndpointPagination it does not count the rows of the queryset or scan past an
+    OFFSET. The opaque next and previous cursors encode the (created_on, id) of the last post of a page 
+    and the following page is selected with a keyset filter on those values, so every page costs the 
+    same no matter how deep into the dataset it is.
+
+    The position of a post is unique as it contains the post id, so the offset that the DRF 
+    CursorPagination uses to step over posts with the same position is always 0.
+    """
+    page_size = 300
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = ("-created_on", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            reverse, current_position = self.cursor.reverse, self.cursor.position
+
+        # Previous pages are read in ascending order from the cursor and reversed afterwards:
+        if reverse:
+            queryset = queryset.order_by("created_on", "id")
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        # Filtering the queryset to the posts following the cursor. The redundant bound on created_on 
+        # lets the database range scan the created_on index instead of evaluating the OR for every row:
+        if current_position is not None:
+            created_on, post_id = self._parse_position(current_position)
+            if reverse:
+                queryset = queryset.filter(Q(created_on__gte=created_on), Q(created_on__gt=created_on) | Q(id__gt=post_id))
+            else:
+                queryset = queryset.filter(Q(created_on__lte=created_on), Q(created_on__lt=created_on) | Q(id__lt=post_id))
+
+        # Fetching an extra post to determine if there is a page following this one:
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = self._get_position_from_instance(results[-1], self.ordering) if has_following_position else None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next, self.next_position = True, current_position
+            self.has_previous, self.previous_position = has_following_position, following_position
+        else:
+            self.has_next, self.next_position = has_following_position, following_position
+            self.has_previous, self.previous_position = current_position is not None, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def paginate_values(self, queryset, lookups, request, view=None):
+        """Paginates the posts as '.values()' rows, as the 'ValuesPageNumberPagination' does. The keyset
+        pagination does not count the rows so the rows are read with the lookups from the start.
+
+        Args:
+            queryset (models.QuerySet): The (filtered) RedditPosts queryset.
+
+            lookups (lst [str]): The '.values()' lookups of the rows, including 'created_on' and 'id'.
+
+            request (rest_framework.request.Request): The request of the list endpoint.
+
+        Returns:
+            lst [dict]: The values rows of the page.
+
+        """
+        return self.paginate_queryset(queryset.values(*lookups), request, view)
+
+    def _get_position_from_instance(self, instance, ordering):
+        """Returns the position of a post, or of a values row of a post, as the string 'created_on|id'."""
+        if isinstance(instance, dict):
+            return f"{instance['created_on'].isoformat()}|{instance['id']}"
+
+        return f"{instance.created_on.isoformat()}|{instance.id}"
+
+    def _parse_position(self, position):
+        """Splits the position of a cursor into its created_on datetime and post id."""
+        created_on, _, post_id = position.partition("|")
+        try:
+            created_on = parse_datetime(created_on)
+        except ValueError:
+            created_on = None
+
+        if created_on is None or not post_id:
+            raise NotFound(self.invalid_cursor_message)
+
+        return created_on, post_id
@@ -0,0 +1,309 @@
+# Importing Redis client:
+import redis
+import requests
+
+# Importing native packages:
+import time
+import uuid
+
+# Importing django settings:
+from django.conf import settings
+
+# Module level redis client, lazily created so that importing this module does not open a connection:
+_redis_connection = None
+
+def get_redis_connection():
+    """Method that returns the redis client that is shared by all rate limiting objects in the
+    process. The client is created from the 'REDIS_URL' setting on first use. The underlying
+    connection pool is thread safe.
+
+    Returns:
+        redis.Redis: The redis client.
+
+    """
+    global _redis_connection
+    if _redis_connection is None:
+        _redis_connection = redis.Redis.from_url(settings.REDIS_URL)
+
+    return _redis_connection
+
+class RedditRateLimiter(object):
+    """A token bucket rate limiter for the Reddit API whose state is stored in redis so that every
+    celery worker draws from the same request budget.
+
+    The bucket holds 'capacity' tokens that are refilled at the end of each rate limit window, which
+    mirrors how the Reddit API enforces its limits. Each API request made by the ingestion pipeline
+    must first acquire a token. The bucket is kept in line with the real budget by syncing it with the
+    'X-Ratelimit-Remaining' and 'X-Ratelimit-Reset' response headers that praw exposes through
+    'reddit.auth.limits'.
+
+    All reads and writes of the bucket are performed in lua scripts so that they are atomic when
+    several workers run at the same time.
+
+    Attributes:
+        key_prefix (str): The prefix of the redis keys that store the bucket state.
+
+        capacity (int): The number of requests allowed per rate limit window.
+
+        window (int): The length of the rate limit window in seconds.
+
+        acquired (int): The number of tokens acquired through this object, used to count API calls.
+
+    """
+    # Lua script that attempts to take tokens from the bucket. It returns the number of seconds until
+    # the bucket is refilled if there are not enough tokens and "0" if the tokens were acquired:
+    ACQUIRE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local tokens = tonumber(ARGV[2])
+    local capacity = tonumber(ARGV[3])
+    local window = tonumber(ARGV[4])
+
+    local remaining = tonumber(redis.call('GET', KEYS[1]))
+    local reset = tonumber(redis.call('GET', KEYS[2]))
+
+    if reset == nil or remaining == nil or reset <= now then
+        remaining = capacity
+        reset = now + window
+        redis.call('SET', KEYS[2], reset, 'EX', window * 2)
+    end
+
+    if remaining >= tokens then
+        redis.call('SET', KEYS[1], remaining - tokens, 'EX', window * 2)
+        return '0'
+    end
+
+    redis.call('SET', KEYS[1], remaining, 'EX', window * 2)
+    return tostring(reset - now)
+    """
+
+    # Lua script that syncs the bucket with the rate limit headers returned by the Reddit API. Within
+    # the same window the lowest remaining value is kept as other workers may have spent tokens since
+    # the response was sent:
+    SYNC_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local header_remaining = tonumber(ARGV[2])
+    local header_reset = tonumber(ARGV[3])
+    local window = tonumber(ARGV[4])
+
+    local remaining = tonumber(redis.call('GET', KEYS[1]))
+    local reset = tonumber(redis.call('GET', KEYS[2]))
+
+    if remaining ~= nil and reset ~= nil and reset > now then
+        header_remaining = math.min(remaining, header_remaining)
+    end
+
+    redis.call('SET', KEYS[1], header_remaining, 'EX', window * 2)
+    redis.call('SET', KEYS[2], header_reset, 'EX', window * 2)
+    return 'OK'
+    """
+
+    def __init__(self, key_prefix="reddit:ratelimit", capacity=None, window=None, connection=None):
+        self.key_prefix = key_prefix
+        self.capacity = capacity or settings.REDDIT_RATELIMIT_CAPACITY
+        self.window = window or settings.REDDIT_RATELIMIT_WINDOW
+        self.acquired = 0
+
+        self._connection = connection or get_redis_connection()
+        self._acquire_script = self._connection.register_script(self.ACQUIRE_SCRIPT)
+        self._sync_script = self._connection.register_script(self.SYNC_SCRIPT)
+
+    @property
+    def _keys(self):
+        return [f"{self.key_prefix}:remaining", f"{self.key_prefix}:reset"]
+
+    def try_acquire(self, tokens=1):
+        """Attempts to take tokens from the shared bucket without blocking.
+
+        Args:
+            tokens (int): The number of API requests that are about to be made.
+
+        Returns:
+            float: 0 if the tokens were acquired, otherwise the number of seconds until the
+                bucket is refilled (the "over budget" signal).
+
+        Raises:
+            ValueError: If more tokens are requested than the bucket holds, they could never be acquired.
+
+        """
+        if tokens > self.capacity:
+            raise ValueError(f"Can not acquire {tokens} tokens from a bucket with a capacity of {self.capacity}")
+
+        wait = self._acquire_script(
+            keys=self._keys,
+            args=[time.time(), tokens, self.capacity, self.window])
+
+        if float(wait) == 0:
+            self.acquired += tokens
+
+        return float(wait)
+
+    def acquire(self, tokens=1, blocking=True, timeout=None):
+        """Takes tokens from the shared bucket, by default blocking until the budget allows
+        the request to be made.
+
+        Args:
+            tokens (int): The number of API requests that are about to be made.
+
+            blocking (bool): If False the method returns immediately instead of waiting for the
+                bucket to be refilled.
+
+            timeout (float|None): The maximum number of seconds to block for. None blocks until
+                the tokens are acquired.
+
+        Returns:
+            bool: True if the tokens were acquired, False if the caller is over budget.
+
+        Raises:
+            ValueError: If more tokens are requested than the bucket holds, see 'try_acquire'.
+
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+
+            if not blocking:
+                return False
+
+            if deadline is not None:
+                if time.time() + wait > deadline:
+                    return False
+
+            time.sleep(wait)
+
+    def sync(self, remaining, reset_timestamp):
+        """Updates the shared bucket with the rate limit values reported by the Reddit API.
+
+        Args:
+            remaining (float): The value of the 'X-Ratelimit-Remaining' header.
+
+            reset_timestamp (float): The unix timestamp at which the rate limit window resets,
+                computed from the 'X-Ratelimit-Reset' header.
+
+        """
+        if remaining is None or reset_timestamp is None:
+            return
+
+        self._sync_script(
+            keys=self._keys,
+            args=[time.time(), int(remaining), reset_timestamp, self.window])
+
+    def sync_from_reddit(self, reddit):
+        """Updates the shared bucket from the rate limit headers of the last response
+        recieved by a praw Reddit instance.
+
+        Args:
+            reddit (praw.Reddit): The praw instance used to make API requests.
+
+        """
+        limits = reddit.auth.limits
+        self.sync(limits.get("remaining"), limits.get("reset_timestamp"))
+
+class RateLimitedSession(requests.Session):
+    """A requests Session that takes a token from a RedditRateLimiter before every request it
+    sends. It is passed to praw through the 'requestor_kwargs' config for extraction steps whose
+    number of API requests is not known in advance, such as resolving the 'MoreComments' of a 
+    comment forest.
+
+    Attributes:
+        rate_limiter (RedditRateLimiter): The shared rate limiter.
+
+    """
+    def __init__(self, rate_limiter):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+
+    def request(self, method, url, *args, **kwargs):
+        self.rate_limiter.acquire()
+        return super().request(method, url, *args, **kwargs)
+
+class ConcurrencyLimiter(object):
+    """A counting semaphore stored in redis that limits how many celery tasks of a kind run at 
+    the same time across all workers.
+
+    Each held slot is a member of a redis sorted set scored by the time it was acquired. Slots 
+    are leases: a slot held for longer than 'lease_timeout' seconds is considered abandoned (eg: 
+    the worker was killed) and is removed the next time a slot is acquired.
+
+    It is used as a context manager, which blocks until a slot is available:
+
+        with ConcurrencyLimiter("reddit:ingestion", limit=4):
+            ...
+
+    Celery tasks should not hold a worker while they wait for a slot. They acquire the slot without
+    blocking and retry themselves later if none is available:
+
+        slot = ConcurrencyLimiter("reddit:ingestion", limit=4)
+        if not slot.acquire(blocking=False):
+            raise self.retry(countdown=15)
+
+    Attributes:
+        key (str): The redis key of the sorted set that stores the held slots.
+
+        limit (int): The maximum number of slots that can be held at once.
+
+        lease_timeout (int): The number of seconds after which a held slot is considered abandoned.
+
+    """
+    # Lua script that removes abandoned slots and then adds the slot if the limit is not reached:
+    ACQUIRE_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[3]))
+
+    if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+        redis.call('ZADD', KEYS[1], now, ARGV[4])
+        redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, key, limit, lease_timeout=600, poll_interval=1, connection=None):
+        self.key = key
+        self.limit = limit
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+
+        self._connection = connection or get_redis_connection()
+        self._acquire_script = self._connection.register_script(self.ACQUIRE_SCRIPT)
+        self._token = None
+
+    def acquire(self, blocking=True):
+        """Acquires a slot, by default blocking until one is available.
+
+        Args:
+            blocking (bool): If False the method returns immediately if no slot is available, 
+                otherwise it polls for a free slot every 'poll_interval' seconds.
+
+        Returns:
+            bool: True if a slot was acquired.
+
+        """
+        token = str(uuid.uuid4())
+        while True:
+            acquired = self._acquire_script(
+                keys=[self.key],
+                args=[time.time(), self.limit, self.lease_timeout, token])
+
+            if acquired:
+                self._token = token
+                return True
+
+            if not blocking:
+                return False
+
+            time.sleep(self.poll_interval)
+
+    def release(self):
+        """Releases the slot held by this object."""
+        if self._token is not None:
+            self._connection.zrem(self.key, self._token)
+            self._token = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
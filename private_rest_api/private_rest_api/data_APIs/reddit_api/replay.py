@@ -0,0 +1,260 @@
+# Importing Requests packages:
+import json
+import requests
+from urllib.parse import urlsplit, parse_qsl
+
+# Importing native packages:
+import time
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The endpoint used by praw to request an OAuth token. It is never recorded as the response contains a
+# live access token, the replay server returns a fake token instead:
+ACCESS_TOKEN_PATH = "/api/v1/access_token"
+
+def _request_key(method, path, query):
+    """Method that creates the key used to match a request to the responses recorded in a cassette.
+
+    Args:
+        method (str): The HTTP method of the request.
+
+        path (str): The url path of the request.
+
+        query (lst [tuple]): The (name, value) pairs of the url query string.
+
+    Returns:
+        tuple: The (method, path, query) key. The query pairs are sorted so that the key does not
+            depend on the order of the parameters.
+
+    """
+    return (method.upper(), path.rstrip("/"), tuple(sorted(query)))
+
+def load_cassette(cassette_path):
+    """Method that reads a JSONL cassette into a dict of the recorded responses for each request.
+
+    Args:
+        cassette_path (str): The path to the cassette file.
+
+    Returns:
+        dict: A dict mapping each request key to the list of responses recorded for it, in the
+            order they were recorded.
+
+    """
+    responses = defaultdict(list)
+    with open(cassette_path, "r") as cassette:
+        for line in cassette:
+            if not line.strip():
+                continue
+
+            interaction = json.loads(line)
+            key = _request_key(interaction["method"], interaction["path"], [tuple(pair) for pair in interaction["query"]])
+            responses[key].append(interaction)
+
+    return responses
+
+class CassetteRecorder(requests.Session):
+    """A requests Session that writes every response praw recieves to a JSONL cassette that can be
+    replayed by the FakeRedditServer.
+
+    Each line of the cassette is a JSON object containing the method, path and query of the request
+    and the status code, content type and body of the response. Request headers and the OAuth token
+    request are not recorded so the cassette does not contain credentials.
+
+    It is passed to praw through the 'requestor_kwargs' config:
+
+        with CassetteRecorder("cassette.jsonl") as recorder:
+            reddit = praw.Reddit(..., requestor_kwargs={"session": recorder})
+
+    Attributes:
+        cassette_path (str): The path to the cassette file. New interactions are appended to the file.
+
+    """
+    def __init__(self, cassette_path):
+        super().__init__()
+        self.cassette_path = cassette_path
+        self._cassette = open(cassette_path, "a")
+        self._lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        response = super().request(method, url, *args, **kwargs)
+
+        url_parts = urlsplit(response.request.url)
+        if url_parts.path.rstrip("/") == ACCESS_TOKEN_PATH:
+            return response
+
+        interaction = {
+            "method": method.upper(),
+            "path": url_parts.path,
+            "query": parse_qsl(url_parts.query, keep_blank_values=True),
+            "status": response.status_code,
+            "content_type": response.headers.get("content-type", "application/json"),
+            "body": response.text
+        }
+        with self._lock:
+            self._cassette.write(json.dumps(interaction) + "\n")
+            self._cassette.flush()
+
+        return response
+
+    def close(self):
+        super().close()
+        self._cassette.close()
+
+class _ReplayRequestHandler(BaseHTTPRequestHandler):
+    """The request handler of the FakeRedditServer, it passes every request to the server."""
+    def do_GET(self):
+        self.server.fake_reddit.respond(self)
+
+    def do_POST(self):
+        self.server.fake_reddit.respond(self)
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeRedditServer(object):
+    """A local stand-in for the Reddit API that replays the responses recorded in a cassette so that
+    the ingestion pipeline can be run and benchmarked without making requests to Reddit.
+
+    Requests are matched to the cassette by method, path and query string. If a request was recorded
+    several times its responses are returned in the order they were recorded, the last one being
+    repeated once they run out. Unmatched requests recieve a 404. The OAuth token request always
+    succeeds with a fake token.
+
+    Every response is sent with rate limit headers that never cause praw to throttle so that the only
+    delay is the injected 'latency'. The server runs in a background thread and is used as a context
+    manager:
+
+        with FakeRedditServer("cassette.jsonl", latency=0.1) as server:
+            reddit = praw.Reddit(..., **server.praw_config)
+
+    Attributes:
+        cassette_path (str): The path to the cassette file that is replayed.
+
+        latency (float): The number of seconds each response is delayed by, simulating the round trip
+            time of the real API.
+
+        request_count (int): The number of API requests served, excluding the OAuth token request.
+
+        unmatched_requests (lst [str]): The requests that did not match the cassette.
+
+        max_concurrent_requests (int): The largest number of API requests that were being served at 
+            the same time, excluding the OAuth token request.
+
+    """
+    def __init__(self, cassette_path, latency=0, host="127.0.0.1", port=0):
+        self.cassette_path = cassette_path
+        self.latency = latency
+        self.request_count = 0
+        self.unmatched_requests = []
+        self.max_concurrent_requests = 0
+        self._concurrent_requests = 0
+
+        self._responses = load_cassette(cassette_path)
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), _ReplayRequestHandler)
+        self._server.daemon_threads = True
+        self._server.fake_reddit = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """str: The base url of the server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def praw_config(self):
+        """dict: The praw Reddit config that points praw at the server."""
+        return {
+            "oauth_url": self.url,
+            "reddit_url": self.url,
+            "check_for_updates": False
+        }
+
+    @property
+    def subreddit_names(self):
+        """lst [str]: The names of the subreddits whose listings were recorded in the cassette."""
+        names = []
+        for _, path, _ in self._responses:
+            path_parts = path.strip("/").split("/")
+            if len(path_parts) >= 2 and path_parts[0] == "r" and path_parts[1] not in names:
+                names.append(path_parts[1])
+
+        return names
+
+    def respond(self, handler):
+        """Method that sends the recorded response matching a request.
+
+        Args:
+            handler (BaseHTTPRequestHandler): The handler of the request.
+
+        """
+        # Consuming the request body so the connection can be reused:
+        content_length = int(handler.headers.get("Content-Length") or 0)
+        if content_length:
+            handler.rfile.read(content_length)
+
+        url_parts = urlsplit(handler.path)
+        if url_parts.path.rstrip("/") == ACCESS_TOKEN_PATH:
+            return self._send(handler, 200, "application/json", json.dumps({
+                "access_token": "replay-token",
+                "token_type": "bearer",
+                "expires_in": 86400,
+                "scope": "*"
+            }))
+
+        with self._lock:
+            self._concurrent_requests += 1
+            self.max_concurrent_requests = max(self.max_concurrent_requests, self._concurrent_requests)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        key = _request_key(handler.command, url_parts.path, parse_qsl(url_parts.query, keep_blank_values=True))
+        with self._lock:
+            self._concurrent_requests -= 1
+            self.request_count += 1
+            recorded = self._responses.get(key)
+            if not recorded:
+                self.unmatched_requests.append(f"{handler.command} {handler.path}")
+                interaction = None
+            else:
+                interaction = recorded[min(self._served[key], len(recorded) - 1)]
+                self._served[key] += 1
+
+        if interaction is None:
+            return self._send(handler, 404, "application/json", json.dumps({"message": "Not Found", "error": 404}))
+
+        self._send(handler, interaction["status"], interaction["content_type"], interaction["body"])
+
+    def _send(self, handler, status, content_type, body):
+        body = body.encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.send_header("x-ratelimit-remaining", "600")
+        handler.send_header("x-ratelimit-used", "0")
+        handler.send_header("x-ratelimit-reset", "600")
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self):
+        """Starts serving requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the server and closes its socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -2,18 +2,54 @@
 from rest_framework import serializers
 
 # Importing Reddit Post Models:
-from .models import RedditPosts, Subreddit
+from .models import RedditPosts, Subreddit, RedditDailyRollup
+from api_core.serializers import DynamicFieldsModelSerializer
 
-class RedditPostsSerializer(serializers.ModelSerializer):
+class RedditPostsSerializer(DynamicFieldsModelSerializer):
     # Specifying the ForeginKey field on display:
     subreddit = serializers.CharField(source="subreddit.name")
 
+    # Flattening the RedditAuthor ForeignKey fields into the post:
+    author = serializers.CharField(source="author.name", allow_null=True)
+    author_is_gold = serializers.BooleanField(source="author.is_gold", allow_null=True)
+    author_mod = serializers.BooleanField(source="author.is_mod", allow_null=True)
+    author_has_verified_email = serializers.BooleanField(source="author.has_verified_email", allow_null=True)
+    author_created = serializers.DateTimeField(source="author.created_on", allow_null=True)
+    comment_karma = serializers.IntegerField(source="author.comment_karma", allow_null=True)
+
     class Meta:
         model = RedditPosts
-        fields = "__all__"
+        fields = [
+            "id", "subreddit", "title", "content", "upvote_ratio", "score", "num_comments", "created_on",
+            "stickied", "over_18", "spoiler", "author_is_gold", "author_mod", "author_has_verified_email",
+            "permalink", "author", "author_created", "comment_karma", "listings"
+        ]
         depth = 1
 
+class RedditPostsSearchSerializer(RedditPostsSerializer):
+    # The relevance and highlighted snippet of posts returned by a full text search:
+    search_rank = serializers.FloatField(allow_null=True)
+    search_headline = serializers.CharField(allow_null=True)
+
+    class Meta(RedditPostsSerializer.Meta):
+        fields = RedditPostsSerializer.Meta.fields + ["search_rank", "search_headline"]
+
+class RedditDailyRollupSerializer(DynamicFieldsModelSerializer):
+    subreddit = serializers.CharField(source="subreddit.name")
+
+    class Meta:
+        model = RedditDailyRollup
+        fields = [
+            "subreddit", "day", "post_count", "total_score", "average_score", 
+            "total_comments", "average_comments", "average_upvote_ratio"
+        ]
+
 class SubredditSerializer(serializers.ModelSerializer):
+    # The activity of the subreddit annotated by the 'annotate_subreddit_activity' method:
+    post_count = serializers.IntegerField(read_only=True)
+    latest_post_on = serializers.DateTimeField(read_only=True, allow_null=True)
+    posts_last_24h = serializers.IntegerField(source="recent_post_count", read_only=True)
+
     class Meta:
         model = Subreddit
         fields = "__all__"
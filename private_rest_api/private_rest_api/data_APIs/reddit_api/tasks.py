@@ -1,37 +1,223 @@
-from __future__ import absolute_import, unicode_literals 
+from __future__ import absolute_import, unicode_literals
+
+# Importing native packages:
+import asyncio
 
 # Importing celery packages:
-from celery import shared_task
+from celery import shared_task, group, chord
+from celery.exceptions import Retry
+from celery.utils.log import get_task_logger
+
+# Importing django settings:
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
 
 # Importing database models and extraction methods:
 from .models import RedditDeveloperAccount, Subreddit, RedditPosts
-from .data_extraction import extract_reddit_posts 
-#from reddit_api.data_extraction import
+from .data_extraction import extract_reddit_posts
+from .async_extraction import extract_reddit_posts_async
+from .comment_extraction import extract_reddit_comments
+from .rate_limiting import ConcurrencyLimiter
+from api_core.models import IngestionRun
+
+logger = get_task_logger(__name__)
 
 @shared_task
 def perform_reddit_ingestion():
-    """The celery task that performs the data ingestion for all subreddit posts via
-    the 'extract_reddit_posts' method. It performs scheduled data ingestion for both
-    top and hot posts.
-    
+    """The celery task that performs the data ingestion for all subreddit posts. It performs
+    scheduled data ingestion for both top and hot posts.
+
+    The ingestion is fanned out into one 'perform_subreddit_ingestion' subtask per subreddit which
+    are dispatched as a celery group. Each subtask extracts the top and hot listings in a single pass
+    so that posts appearing in both listings are only serialized and written once. The group is 
+    wrapped in a chord whose callback, 'record_reddit_ingestion_totals', records the totals of the
+    run once every subtask has finished.
+
+    The run is recorded as an IngestionRun that each subtask records its stages on and that the 
+    chord callback marks as finished.
+
+    Returns:
+        str: The id of the chord callback task that will contain the run totals.
+
+    """
+    # Querying the subreddits:
+    subreddit_ids = list(Subreddit.objects.values_list("id", flat=True))
+
+    # Creating a subtask that extracts 'top' and 'hot' posts for each subreddit, sharing the run id:
+    run_id = str(IngestionRun.objects.create(source="reddit").run_id)
+    subreddit_tasks = group(
+        perform_subreddit_ingestion.s(subreddit_id, ["top", "hot"], run_id) for subreddit_id in subreddit_ids
+    )
+
+    return chord(subreddit_tasks)(record_reddit_ingestion_totals.s(run_id)).id
+
+@shared_task(bind=True, max_retries=3)
+def perform_subreddit_ingestion(self, subreddit_id, post_filters, run_id=None, failures=0):
+    """The celery task that performs the data ingestion for a single subreddit via the combined
+    extraction mode of the 'extract_reddit_posts' method.
+
+    The number of these tasks that run at the same time across all workers is limited by the
+    'REDDIT_INGESTION_CONCURRENCY' setting. If every ingestion slot is taken the task is retried
+    after 'REDDIT_INGESTION_SLOT_RETRY_DELAY' seconds instead of waiting for a slot, so that the
+    worker can run other tasks in the meantime. Waiting for a slot does not count as a retry.
+
+    A failed ingestion is retried on its own with an exponential backoff, up to 'max_retries' times.
+    Once the retries are exhausted the failure is returned as a result instead of being raised so 
+    that the other subreddits in the chord are still recorded.
+
+    Args:
+        subreddit_id (int): The primary key of the Subreddit to ingest.
+
+        post_filters (lst [str]): The listings to ingest eg: ['top', 'hot'].
+
+        run_id (str|None): The id of the IngestionRun that the subtask is part of.
+
+        failures (int): The number of times the ingestion has already failed, set when the task is retried.
+
+    Returns:
+        dict: The result of the ingestion containing the subreddit, listings, the number of posts
+            inserted and updated and the error if the ingestion failed.
+
+    """
+    result = {
+        "subreddit": subreddit_id,
+        "post_filters": post_filters,
+        "inserted": 0,
+        "updated": 0,
+        "error": None
+    }
+
+    try:
+        # Querying the subreddit and the Developer Account:
+        dev_account = RedditDeveloperAccount.objects.first()
+        subreddit = Subreddit.objects.get(id=subreddit_id)
+        result["subreddit"] = subreddit.name
+        ingestion_run = IngestionRun.objects.filter(run_id=run_id).first() if run_id else None
+
+        slot = ConcurrencyLimiter(
+            "reddit:ingestion:slots",
+            limit=settings.REDDIT_INGESTION_CONCURRENCY,
+            lease_timeout=settings.REDDIT_INGESTION_SLOT_TIMEOUT)
+
+        if not slot.acquire(blocking=False):
+            raise self.retry(countdown=settings.REDDIT_INGESTION_SLOT_RETRY_DELAY, max_retries=None)
+
+        try:
+            result["inserted"], result["updated"] = extract_reddit_posts(
+                dev_client_id=dev_account.dev_client_id,
+                dev_secret=dev_account.dev_secret,
+                dev_user_agent=dev_account.dev_user_agent,
+                subreddits=[subreddit],
+                post_filters=post_filters,
+                run_id=run_id,
+                ingestion_run=ingestion_run
+            )
+        finally:
+            slot.release()
+
+    except Retry:
+        raise
+
+    except Exception as exc:
+        if failures < self.max_retries:
+            raise self.retry(
+                exc=exc, countdown=30 * 2 ** failures, kwargs={"failures": failures + 1}, max_retries=None)
+
+        logger.exception(f"Ingestion of posts for subreddit {result['subreddit']} failed")
+        result["error"] = repr(exc)
+
+    return result
+
+@shared_task
+def perform_async_reddit_ingestion():
+    """The celery task that performs the data ingestion for all subreddit posts in a single worker
+    via the asyncio extraction engine. It is an alternative to 'perform_reddit_ingestion' for 
+    deployments with many subreddits and few workers.
+
+    The listings of up to 'REDDIT_ASYNC_CONCURRENCY' subreddits are extracted at the same time while
+    drawing from the same shared rate limit budget as the other ingestion tasks. 
+
+    Returns:
+        dict: The run totals as created by 'record_reddit_ingestion_totals'.
+
     """
     # Querying the subreddits and the Developer Account:
     dev_account = RedditDeveloperAccount.objects.first()
-    subreddits = Subreddit.objects.all()
+    subreddits = list(Subreddit.objects.all())
+    ingestion_run = IngestionRun.objects.create(source="reddit")
 
-    # Performing data ingestion for 'top' and 'hot' posts:
-    extract_reddit_posts(
+    results = asyncio.run(extract_reddit_posts_async(
         dev_client_id=dev_account.dev_client_id,
         dev_secret=dev_account.dev_secret,
         dev_user_agent=dev_account.dev_user_agent,
         subreddits=subreddits,
-        post_filter="top"
-    )
+        post_filters=["top", "hot"],
+        concurrency=settings.REDDIT_ASYNC_CONCURRENCY,
+        ingestion_run=ingestion_run
+    ))
+
+    return record_reddit_ingestion_totals(results, str(ingestion_run.run_id))
+
+@shared_task
+def perform_reddit_comment_ingestion():
+    """The celery task that performs the data ingestion of comments for the tracked reddit posts,
+    the posts created within the last 'REDDIT_COMMENT_POST_MAX_AGE' seconds. 
+    
+    It is scheduled seperately from 'perform_reddit_ingestion' so that walking large comment 
+    forests does not delay the extraction of posts. Both tasks draw from the same rate limit budget.
+
+    Returns:
+        dict: The number of posts whose comments were extracted and the number of comments 
+            inserted and updated.
+
+    """
+    # Querying the Developer Account and the tracked posts:
+    dev_account = RedditDeveloperAccount.objects.first()
+    tracked_posts = RedditPosts.objects.filter(
+        created_on__gte=timezone.now() - timedelta(seconds=settings.REDDIT_COMMENT_POST_MAX_AGE)
+    ).only("id")
 
-    extract_reddit_posts(
+    inserted, updated = extract_reddit_comments(
         dev_client_id=dev_account.dev_client_id,
         dev_secret=dev_account.dev_secret,
         dev_user_agent=dev_account.dev_user_agent,
-        subreddits=subreddits,
-        post_filter="hot"
-    )
\ No newline at end of file
+        posts=tracked_posts.iterator()
+    )
+
+    totals = {"posts": tracked_posts.count(), "inserted": inserted, "updated": updated}
+    logger.info(f"Reddit comment ingestion finished: {totals}")
+    return totals
+
+@shared_task
+def record_reddit_ingestion_totals(results, run_id=None):
+    """The celery task used as the chord callback of 'perform_reddit_ingestion'. It aggregates
+    the results of every subreddit ingestion subtask into the totals for the run and marks the
+    IngestionRun of the run as finished.
+
+    Args:
+        results (lst [dict]): The results returned by each 'perform_subreddit_ingestion' subtask.
+
+        run_id (str|None): The id of the IngestionRun of the run.
+
+    Returns:
+        dict: The run totals. They are stored in the celery result backend.
+
+    """
+    failed = [result for result in results if result["error"] is not None]
+    totals = {
+        "subtasks": len(results),
+        "failed": len(failed),
+        "failed_subreddits": [result["subreddit"] for result in failed],
+        "inserted": sum(result["inserted"] for result in results),
+        "updated": sum(result["updated"] for result in results)
+    }
+
+    # Marking the run as failed if any subreddit failed:
+    ingestion_run = IngestionRun.objects.filter(run_id=run_id).first() if run_id else None
+    if ingestion_run is not None:
+        ingestion_run.finish(
+            error="\n".join(f"{result['subreddit']}: {result['error']}" for result in failed) or None)
+
+    logger.info(f"Reddit ingestion run finished: {totals}")
+    return totals
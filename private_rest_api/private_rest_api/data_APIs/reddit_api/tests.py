@@ -1,3 +1,1150 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.db import connection
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.core.management import call_command
+from django.apps import apps
+from rest_framework.test import APIClient
+from rest_framework.renderers import JSONRenderer
+from asgiref.sync import async_to_sync
 
-# Create your tests here.
+# Importing native packages:
+import os
+import json
+import tempfile
+import io
+import csv
+import gzip
+import base64
+import datetime
+import time
+import uuid
+import importlib
+from types import SimpleNamespace
+from urllib.parse import urlencode
+from unittest import mock, skipUnless
+
+# Importing the Apache Arrow readers:
+import pyarrow
+import pyarrow.ipc
+import pyarrow.parquet
+
+# Importing the in-memory redis server of the rate limiting tests, the tests are skipped if it is not installed:
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+# Importing Reddit Database Models and extraction methods:
+from .models import (
+    Subreddit, RedditPosts, RedditAuthor, SubredditIngestionState, RedditDailyRollup, RedditDeveloperAccount, RedditComment,
+    RedditBackfillCheckpoint)
+from .loaders import refresh_reddit_daily_rollups, bulk_upsert_reddit_posts, write_reddit_post_snapshots, copy_reddit_posts
+from .management.commands.reddit_backfill import Command as RedditBackfillCommand
+from .data_extraction import extract_reddit_posts, ListingMerger, _content_hash
+from .async_extraction import extract_reddit_posts_async, _acquire
+from .comment_extraction import extract_reddit_comments, load_reddit_comments
+from .replay import CassetteRecorder, FakeRedditServer
+from .rate_limiting import RedditRateLimiter, ConcurrencyLimiter
+from .tasks import perform_reddit_ingestion, perform_subreddit_ingestion
+from .serializers import RedditPostsSerializer
+from api_core.renderers import ORJSONRenderer
+from api_core.models import IngestionRun
+
+# The endpoints are tested without the query result cache, which is tested by the RedditPostsQueryCacheTest:
+DUMMY_CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+def _listing_interaction(path, query, posts, after=None):
+    """Creates a cassette interaction containing a page of a reddit listing of posts."""
+    children = [{"kind": "t3", "data": post} for post in posts]
+    return {
+        "method": "GET",
+        "path": path,
+        "query": query,
+        "status": 200,
+        "content_type": "application/json",
+        "body": json.dumps({"kind": "Listing", "data": {"after": after, "before": None, "children": children}})
+    }
+
+def _author_interaction(name):
+    """Creates a cassette interaction containing the about page of a reddit user."""
+    return {
+        "method": "GET",
+        "path": f"/user/{name}/about",
+        "query": [["raw_json", "1"]],
+        "status": 200,
+        "content_type": "application/json",
+        "body": json.dumps({"kind": "t2", "data": {
+            "name": name, "is_gold": False, "is_mod": True, "has_verified_email": True,
+            "comment_karma": 10, "created_utc": 1600000000.0}})
+    }
+
+def _post(post_id, author, score):
+    """Creates the data of a reddit post as returned in a listing."""
+    return {
+        "id": post_id, "name": f"t3_{post_id}", "title": f"Post {post_id}", "selftext": "",
+        "upvote_ratio": 0.9, "score": score, "num_comments": 1, "stickied": False, "over_18": False,
+        "spoiler": False, "permalink": f"/r/replay/comments/{post_id}/", "author": author,
+        "created_utc": 1650000000.0}
+
+class RedditReplayHarnessTest(TestCase):
+    """Runs the reddit ingestion pipeline against the FakeRedditServer."""
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cassette_path = os.path.join(self.directory.name, "cassette.jsonl")
+        self.write_cassette(self.cassette_path)
+
+        self.subreddit = Subreddit.objects.create(name="replay")
+        self.rate_limiter = mock.Mock(**{"acquire.return_value": True})
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_cassette(self, cassette_path, shared_post_score=5):
+        """Writes a cassette of the 'top' and 'hot' listings, the post 'a2' is in both listings."""
+        interactions = [
+            _listing_interaction(
+                "/r/replay/top", [["t", "day"], ["limit", "25"], ["raw_json", "1"]],
+                [_post("a1", "alice", 10), _post("a2", "bob", shared_post_score)]),
+            _listing_interaction(
+                "/r/replay/hot", [["limit", "25"], ["raw_json", "1"]],
+                [_post("a2", "bob", shared_post_score), _post("a3", "alice", 1)]),
+            _author_interaction("alice"),
+            _author_interaction("bob")
+        ]
+        with open(cassette_path, "w") as cassette:
+            for interaction in interactions:
+                cassette.write(json.dumps(interaction) + "\n")
+
+    def ingest(self, praw_config, post_filters=("top", "hot")):
+        return extract_reddit_posts(
+            dev_client_id="replay",
+            dev_secret="replay",
+            dev_user_agent="replay tests",
+            subreddits=[self.subreddit],
+            post_filters=list(post_filters),
+            praw_config=praw_config,
+            rate_limiter=self.rate_limiter)
+
+    def test_ingestion_replays_cassette(self):
+        with FakeRedditServer(self.cassette_path) as server:
+            inserted, updated = self.ingest(server.praw_config)
+
+        self.assertEqual((inserted, updated), (3, 0))
+        self.assertEqual(server.unmatched_requests, [])
+        self.assertEqual(server.request_count, 4)
+        # A token per page of each listing, then a token per author refresh:
+        self.assertEqual(self.rate_limiter.acquire.call_count, 4)
+
+        self.assertEqual(RedditPosts.objects.get(id="a2").listings, ["top", "hot"])
+        self.assertEqual(RedditPosts.objects.get(id="a3").author.name, "alice")
+        self.assertTrue(RedditAuthor.objects.get(name="bob").is_mod)
+
+    # Keeping the listing depth of the cassette, a run without new posts would shrink it:
+    @override_settings(REDDIT_LISTING_MIN_DEPTH=25)
+    def test_second_run_only_writes_changed_posts(self):
+        with FakeRedditServer(self.cassette_path) as server:
+            self.ingest(server.praw_config)
+            self.assertEqual(self.ingest(server.praw_config), (0, 0))
+
+        # Changing the score of the post that is in both listings:
+        changed_path = os.path.join(self.directory.name, "changed.jsonl")
+        self.write_cassette(changed_path, shared_post_score=50)
+        with FakeRedditServer(changed_path) as server:
+            self.assertEqual(self.ingest(server.praw_config), (0, 1))
+
+        self.assertEqual(RedditPosts.objects.get(id="a2").score, 50)
+        self.assertEqual(RedditPosts.objects.get(id="a2").listings, ["top", "hot"])
+
+    @override_settings(REDDIT_UNCHANGED_STOP_THRESHOLD=2)
+    def test_listing_stopped_on_its_first_page_takes_one_token(self):
+        # A listing of two pages, the second page is empty:
+        interactions = [
+            _listing_interaction(
+                "/r/replay/top", [["t", "day"], ["limit", "150"], ["raw_json", "1"]],
+                [_post("a1", "alice", 10), _post("a2", "bob", 5)], after="t3_a2"),
+            _listing_interaction("/r/replay/top", [["t", "day"], ["limit", "150"], ["raw_json", "1"], ["after", "t3_a2"]], []),
+            _author_interaction("alice"),
+            _author_interaction("bob")
+        ]
+        with open(self.cassette_path, "w") as cassette:
+            for interaction in interactions:
+                cassette.write(json.dumps(interaction) + "\n")
+
+        SubredditIngestionState.objects.create(subreddit=self.subreddit, listing_depth=150)
+        with FakeRedditServer(self.cassette_path) as server:
+            self.ingest(server.praw_config, post_filters=["top"])
+            self.assertEqual(self.rate_limiter.acquire.call_count, 4)
+
+            # The unchanged posts stop the listing before its second page is requested:
+            self.rate_limiter.acquire.reset_mock()
+            self.ingest(server.praw_config, post_filters=["top"])
+
+        self.assertEqual(server.unmatched_requests, [])
+        self.assertEqual(server.request_count, 5)
+        self.assertEqual(self.rate_limiter.acquire.call_count, 1)
+
+    @skipUnless(connection.vendor == "postgresql", "The snapshots are partitioned by day on postgres")
+    def test_load_writes_a_snapshot_of_each_post_into_its_daily_partition(self):
+        with FakeRedditServer(self.cassette_path) as server:
+            self.ingest(server.praw_config)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT tableoid::regclass::text, post_id, captured_on FROM redditpostsnapshots ORDER BY post_id")
+            snapshots = cursor.fetchall()
+
+        self.assertEqual([post_id for _, post_id, _ in snapshots], ["a1", "a2", "a3"])
+        for partition, _, captured_on in snapshots:
+            self.assertEqual(partition, f"redditpostsnapshots_{captured_on.astimezone(datetime.timezone.utc):%Y%m%d}")
+
+        # Snapshots captured on either side of midnight are written to two partitions:
+        posts = [{"id": "a1", "score": 1, "num_comments": 0, "upvote_ratio": 1.0}]
+        for captured_on in [datetime.datetime(2022, 5, 1, 23, 59, tzinfo=datetime.timezone.utc), datetime.datetime(2022, 5, 2, tzinfo=datetime.timezone.utc)]:
+            self.assertEqual(write_reddit_post_snapshots(posts, uuid.uuid4(), captured_on), 1)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM redditpostsnapshots_20220501")
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute("SELECT count(*) FROM redditpostsnapshots_20220502")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_recorded_cassette_replays(self):
+        recorded_path = os.path.join(self.directory.name, "recorded.jsonl")
+        with FakeRedditServer(self.cassette_path) as server:
+            with CassetteRecorder(recorded_path) as recorder:
+                self.ingest(dict(server.praw_config, requestor_kwargs={"session": recorder}))
+
+        with open(recorded_path, "r") as recorded:
+            self.assertEqual(len(recorded.readlines()), server.request_count)
+
+        # Replaying the recorded cassette into a clean database:
+        RedditPosts.objects.all().delete()
+        self.subreddit.ingestion_state.delete()
+        with FakeRedditServer(recorded_path) as replay_server:
+            inserted, updated = self.ingest(replay_server.praw_config)
+
+        self.assertEqual((inserted, updated), (3, 0))
+        self.assertEqual(replay_server.unmatched_requests, [])
+
+@skipUnless(fakeredis is not None, "The async ingestion tests require fakeredis")
+class RedditAsyncReplayTest(TestCase):
+    """Runs the asyncio reddit ingestion engine against the FakeRedditServer."""
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.cassette_path = os.path.join(self.directory.name, "cassette.jsonl")
+
+        self.subreddits = [Subreddit.objects.create(name=f"async{index}") for index in range(4)]
+        interactions = [_author_interaction("alice")]
+        for index, subreddit in enumerate(self.subreddits):
+            interactions += [
+                _listing_interaction(
+                    f"/r/{subreddit.name}/top", [["t", "day"], ["limit", "25"], ["raw_json", "1"]],
+                    [_post(f"t{index}", "alice", 10), _post(f"b{index}", "alice", 5)]),
+                _listing_interaction(
+                    f"/r/{subreddit.name}/hot", [["limit", "25"], ["raw_json", "1"]],
+                    [_post(f"b{index}", "alice", 5), _post(f"h{index}", "alice", 1)])
+            ]
+
+        with open(self.cassette_path, "w") as cassette:
+            for interaction in interactions:
+                cassette.write(json.dumps(interaction) + "\n")
+
+        self.rate_limiter = RedditRateLimiter("test:ratelimit", capacity=100, window=60, connection=fakeredis.FakeRedis())
+
+    def test_async_ingestion_writes_every_subreddit_within_the_concurrency_cap(self):
+        ingestion_run = IngestionRun.objects.create(source="reddit")
+        with FakeRedditServer(self.cassette_path, latency=0.05) as server:
+            results = async_to_sync(extract_reddit_posts_async)(
+                dev_client_id="replay",
+                dev_secret="replay",
+                dev_user_agent="replay tests",
+                subreddits=self.subreddits,
+                post_filters=["top", "hot"],
+                concurrency=2,
+                praw_config=server.praw_config,
+                rate_limiter=self.rate_limiter,
+                ingestion_run=ingestion_run)
+
+        self.assertEqual([(result["inserted"], result["updated"], result["error"]) for result in results], [(3, 0, None)] * 4)
+        self.assertEqual(server.unmatched_requests, [])
+        self.assertEqual(server.max_concurrent_requests, 2)
+
+        self.assertEqual(RedditPosts.objects.count(), 12)
+        self.assertEqual(RedditPosts.objects.get(id="b3").listings, ["top", "hot"])
+
+        # Every listing request and the refresh of the author took a token from the rate limiter:
+        fetch_stages = ingestion_run.stages.filter(name="fetch")
+        self.assertEqual(sorted(fetch_stages.values_list("api_calls", flat=True)), [2] * 4)
+        self.assertEqual(self.rate_limiter.acquired, 9)
+
+class ListingDepthTest(TestCase):
+    """Tests the adaptive listing depth of the SubredditIngestionState."""
+    def setUp(self):
+        self.ingestion_state = SubredditIngestionState.objects.create(
+            subreddit=Subreddit.objects.create(name="depth"), post_hashes={"a1": "hash"})
+
+    def test_saturated_listing_doubles_depth(self):
+        self.ingestion_state.update_listing_depth(25, saturated=True)
+        self.assertEqual(self.ingestion_state.listing_depth, 50)
+
+    def test_quiet_subreddit_shrinks_depth(self):
+        self.ingestion_state.listing_depth = 100
+        for new_post_count in [12, 2, 0]:
+            self.ingestion_state.update_listing_depth(new_post_count, saturated=False)
+
+        self.assertEqual(self.ingestion_state.listing_depth, 18)
+        self.assertEqual(self.ingestion_state.new_post_history, [12, 2, 0])
+
+    def test_first_run_keeps_depth(self):
+        self.ingestion_state.post_hashes = {}
+        self.ingestion_state.update_listing_depth(25, saturated=True)
+        self.assertEqual(self.ingestion_state.listing_depth, 25)
+        self.assertEqual(self.ingestion_state.new_post_history, [])
+
+
+@override_settings(REDDIT_UNCHANGED_STOP_THRESHOLD=2)
+class ListingMergerTest(TestCase):
+    """Selects the posts of the listings of a subreddit that need to be written."""
+    def setUp(self):
+        self.posts = [SimpleNamespace(id=f"m{index}", score=index, num_comments=0, upvote_ratio=1.0) for index in range(4)]
+        self.listing_merger = ListingMerger({post.id: _content_hash(post) for post in self.posts})
+
+    def add_listing(self, reddit_filter, posts):
+        self.listing_merger.start_listing()
+        added = [self.listing_merger.add(post, reddit_filter) for post in posts]
+        self.listing_merger.finish_listing(len(posts))
+        return added
+
+    def test_unchanged_posts_are_skipped(self):
+        self.assertEqual(self.add_listing("top", self.posts), [True, False, False, False])
+        self.assertEqual(self.listing_merger.posts, {})
+        self.assertEqual(self.listing_merger.post_hashes.keys(), {"m0", "m1", "m2", "m3"})
+
+    def test_changed_and_new_posts_are_written(self):
+        self.posts[1].score = 100
+        new_post = SimpleNamespace(id="m9", score=0, num_comments=0, upvote_ratio=1.0)
+
+        self.assertEqual(self.add_listing("top", [self.posts[0], self.posts[1], new_post]), [True, True, True])
+        self.assertEqual(list(self.listing_merger.posts), ["m1", "m9"])
+        self.assertEqual(self.listing_merger.new_post_ids, {"m9"})
+        self.assertTrue(self.listing_merger.saturated)
+
+    def test_post_in_several_listings_is_merged(self):
+        self.posts[0].score = 100
+        self.add_listing("top", self.posts[:1])
+        self.add_listing("hot", self.posts[:1])
+
+        self.assertEqual(list(self.listing_merger.posts), ["m0"])
+        self.assertEqual(self.listing_merger.post_listings["m0"], ["top", "hot"])
+
+@override_settings(CACHES=DUMMY_CACHES)
+class RedditCursorPaginationTest(TestCase):
+    """Pages through the reddit posts endpoint with the keyset cursor pagination."""
+    def setUp(self):
+        subreddit = Subreddit.objects.create(name="cursor")
+        created_on = timezone.now().replace(microsecond=0)
+
+        # Posts sharing a created_on value are ordered by id:
+        RedditPosts.objects.bulk_create([
+            RedditPosts(id=f"c{index:02d}", subreddit=subreddit, title=f"Post {index}",
+                created_on=created_on - datetime.timedelta(hours=index // 2))
+            for index in range(7)
+        ])
+
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username="cursor"))
+
+    def test_cursor_pages_cover_every_post_once(self):
+        response = self.client.get("/reddit/posts/", {"pagination": "cursor", "page_size": 3})
+        pages = [response.json()]
+        while pages[-1]["next"]:
+            pages.append(self.client.get(pages[-1]["next"]).json())
+
+        post_ids = [post["id"] for page in pages for post in page["results"]]
+        self.assertEqual(post_ids, ["c01", "c00", "c03", "c02", "c05", "c04", "c06"])
+        self.assertNotIn("count", pages[0])
+
+        # Walking back from the last page returns the three posts before it:
+        previous_page = self.client.get(pages[-1]["previous"]).json()
+        self.assertEqual([post["id"] for post in previous_page["results"]], ["c02", "c05", "c04"])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/reddit/posts/", {"pagination": "cursor", "cursor": "invalid"})
+        self.assertEqual(response.status_code, 404)
+
+@override_settings(CACHES=DUMMY_CACHES)
+class RedditPostSearchTest(TestCase):
+    """Searches the reddit posts endpoint with the full text 'q' parameter."""
+    def setUp(self):
+        subreddit = Subreddit.objects.create(name="search")
+        for post_id, title, content in [
+            ("s1", "Interest rates rise again", "The central bank raised interest rates."),
+            ("s2", "Rates of interest", "Savings accounts pay more."),
+            ("s3", "Election results", "Inflation was the main issue of the election.")
+        ]:
+            RedditPosts.objects.create(
+                id=post_id, subreddit=subreddit, title=title, content=content, created_on=timezone.now())
+
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username="search"))
+
+    def search(self, q, **params):
+        response = self.client.get("/reddit/posts/", dict(params, q=q))
+        return [post["id"] for post in response.json()["results"]]
+
+    @skipUnless(connection.vendor == "postgresql", "Full text search requires postgres")
+    def test_search_is_ranked_with_headlines(self):
+        response = self.client.get("/reddit/posts/", {"q": "interest rates"})
+        posts = response.json()["results"]
+
+        self.assertEqual([post["id"] for post in posts], ["s1", "s2"])
+        self.assertGreater(posts[0]["search_rank"], posts[1]["search_rank"])
+        self.assertIn("<b>Interest</b>", posts[0]["search_headline"])
+
+    @skipUnless(connection.vendor == "postgresql", "Full text search requires postgres")
+    def test_phrase_and_prefix_queries(self):
+        self.assertEqual(self.search('"interest rates"'), ["s1"])
+        self.assertEqual(self.search("inflat* elect*"), ["s3"])
+        self.assertEqual(self.search("interest", subreddit="other"), [])
+
+    @skipUnless(connection.vendor == "postgresql", "Full text search requires postgres")
+    def test_search_vector_follows_updates(self):
+        RedditPosts.objects.filter(id="s2").update(title="Election turnout")
+        self.assertEqual(sorted(self.search("election")), ["s2", "s3"])
+
+    @skipUnless(connection.vendor == "postgresql", "Full text search requires postgres")
+    def test_search_vectors_of_existing_posts_are_backfilled_in_batches(self):
+        migration = importlib.import_module("data_APIs.reddit_api.migrations.0017_redditposts_search_vector_index")
+
+        # Clearing the vectors of all but one post, as if they were written before the trigger was created:
+        RedditPosts.objects.exclude(id="s3").update(search_vector=None)
+        search_vector = RedditPosts.objects.values_list("search_vector", flat=True).get(id="s3")
+        with connection.schema_editor(atomic=False) as schema_editor:
+            migration.backfill_search_vectors(apps, schema_editor, batch_size=2)
+
+        self.assertFalse(RedditPosts.objects.filter(search_vector__isnull=True).exists())
+        self.assertEqual(RedditPosts.objects.values_list("search_vector", flat=True).get(id="s3"), search_vector)
+        self.assertEqual(self.search("interest rates"), ["s1", "s2"])
+
+    def test_title_icontains_ignores_case(self):
+        response = self.client.get("/reddit/posts/", {"title_icontains": "RATES"})
+        self.assertEqual(sorted(post["id"] for post in response.json()["results"]), ["s1", "s2"])
+
+    def test_search_falls_back_to_substrings(self):
+        self.assertEqual(sorted(self.search("savings")), ["s2"])
+        self.assertEqual(self.search("!!"), self.search(""))
+
+@skipUnless(connection.vendor == "postgresql", "Query plans are only checked on postgres")
+@override_settings(CACHES=DUMMY_CACHES)
+class RedditPostsQueryPlanTest(TestCase):
+    """Checks that the queries of the reddit posts endpoint can be served by the indexes of the
+    redditposts table. Sequential scans are disabled while the queries are explained, so a plan only
+    contains a sequential scan of the table if no index can serve the query."""
+    def setUp(self):
+        # A post is created so that the paginated endpoint queries the rows and not only their count:
+        RedditPosts.objects.create(
+            id="p1", subreddit=Subreddit.objects.create(name="plans"), title="Interest rates", created_on=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username="plans"))
+
+    def assertNoSequentialScans(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/reddit/posts/", params)
+
+        self.assertEqual(response.status_code, 200)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            for query in context.captured_queries:
+                if "redditposts" not in query["sql"]:
+                    continue
+
+                cursor.execute(f"EXPLAIN {query['sql']}")
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                self.assertNotIn('Seq Scan on redditposts', plan, f"{query['sql']}\n{plan}")
+
+    def test_subreddit_date_range_uses_indexes(self):
+        self.assertNoSequentialScans({"subreddit": "plans", "start_date": "2022-01-01"})
+
+    def test_newest_posts_use_indexes(self):
+        self.assertNoSequentialScans({})
+        self.assertNoSequentialScans({"pagination": "cursor"})
+
+        # A cursor positioned after the post 'a1', encoded as the DRF cursors are:
+        cursor = base64.b64encode(urlencode({"p": "2022-01-01T00:00:00+00:00|a1"}).encode("ascii")).decode("ascii")
+        self.assertNoSequentialScans({"pagination": "cursor", "cursor": cursor})
+
+    def test_search_uses_indexes(self):
+        self.assertNoSequentialScans({"q": "interest rates"})
+        self.assertNoSequentialScans({"title_icontains": "rates"})
+
+@override_settings(CACHES=DUMMY_CACHES)
+class RedditPostsExportTest(TestCase):
+    """Streams the reddit posts export endpoint in each of its formats."""
+    def setUp(self):
+        subreddit = Subreddit.objects.create(name="export")
+        author = RedditAuthor.objects.create(name="alice", is_mod=True)
+        for index in range(3):
+            RedditPosts.objects.create(
+                id=f"e{index}", subreddit=subreddit, title=f"Export {index}", author=author, listings=["top"],
+                created_on=datetime.datetime(2022, 1, 1 + index, tzinfo=datetime.timezone.utc))
+
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username="export"))
+
+    def export(self, **params):
+        response = self.client.get("/reddit/posts/export/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_ndjson_export_matches_api(self):
+        _, content = self.export(start_date="2022-01-01T12:00:00Z")
+        posts = [json.loads(line) for line in content.decode("utf-8").splitlines()]
+
+        api_posts = self.client.get("/reddit/posts/", {"start_date": "2022-01-01T12:00:00Z"}).json()["results"]
+        self.assertEqual(posts, api_posts)
+        self.assertEqual([post["id"] for post in posts], ["e2", "e1"])
+
+    def test_csv_export(self):
+        response, content = self.export(file_format="csv", subreddit="export")
+        rows = list(csv.DictReader(io.StringIO(content.decode("utf-8"))))
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual([row["id"] for row in rows], ["e2", "e1", "e0"])
+        self.assertEqual(rows[0]["author"], "alice")
+        self.assertEqual(json.loads(rows[0]["listings"]), ["top"])
+
+    def test_gzip_export(self):
+        response, content = self.export(compression="gzip")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="reddit_posts.ndjson.gz"')
+        self.assertEqual(len(gzip.decompress(content).splitlines()), 3)
+
+    def test_parquet_export(self):
+        response, content = self.export(file_format="parquet")
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(content))
+
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="reddit_posts.parquet"')
+        self.assertEqual(table.column("id").to_pylist(), ["e2", "e1", "e0"])
+        self.assertEqual(table.column("listings").to_pylist()[0], ["top"])
+        self.assertEqual(table.column("created_on").to_pylist()[0], datetime.datetime(2022, 1, 3, tzinfo=datetime.timezone.utc))
+
+    def test_arrow_stream_export(self):
+        with self.settings(REDDIT_EXPORT_BATCH_SIZE=2):
+            _, content = self.export(file_format="arrow", subreddit="export")
+
+        reader = pyarrow.ipc.open_stream(content)
+        batches = list(reader)
+        self.assertEqual([batch.num_rows for batch in batches], [2, 1])
+        self.assertEqual(reader.schema.field("author_mod").type, pyarrow.bool_())
+
+    def test_unsupported_format_is_rejected(self):
+        self.assertEqual(self.client.get("/reddit/posts/export/", {"file_format": "xml"}).status_code, 400)
+
+@override_settings(CACHES=DUMMY_CACHES)
+class RedditPostsFieldProjectionTest(TestCase):
+    """Requests a subset of the fields of the reddit posts endpoint."""
+    def setUp(self):
+        subreddit = Subreddit.objects.create(name="fields")
+        author = RedditAuthor.objects.create(name="alice")
+        for index in range(2):
+            RedditPosts.objects.create(
+                id=f"f{index}", subreddit=subreddit, title=f"Post {index}", content="x" * 1000, score=index,
+                author=author, created_on=timezone.now())
+
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username="fields"))
+
+    def test_only_requested_fields_are_read_and_returned(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/reddit/posts/", {"fields": "id,title,subreddit", "pagination": "cursor"})
+
+        posts = response.json()["results"]
+        self.assertEqual([set(post) for post in posts], [{"id", "title", "subreddit"}] * 2)
+
+        # The content and author are not read, the subreddit name is joined in the same query:
+        queries = [query["sql"] for query in context.captured_queries if "redditposts" in query["sql"]]
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"content"', queries[0])
+        self.assertNotIn("redditauthors", queries[0])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get("/reddit/posts/", {"fields": "id,secret"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("secret", response.json()["fields"])
+
+@override_settings(CACHES=DUMMY_CACHES)
+class RedditPostsValuesSerializationTest(TestCase):
+    """Compares the values rows serialization of the list endpoint with the serialization of model instances."""
+    def setUp(self):
+        subreddit = Subreddit.objects.create(name="values")
+        author = RedditAuthor.objects.create(
+            name="alice", is_gold=True, created_on=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc), comment_karma=10)
+        RedditPosts.objects.create(
+            id="v0", subreddit=subreddit, title="Line separator é", upvote_ratio=0.97, score=3,
+            author=author, created_on=datetime.datetime(2021, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            listings=["top", "hot"])
+        RedditPosts.objects.create(id="v1", subreddit=subreddit, title="Deleted author", created_on=timezone.now())
+
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username="values"))
+
+    def test_values_rows_render_the_same_json(self):
+        queryset = RedditPosts.objects.order_by("id")
+        instances_json = JSONRenderer().render(RedditPostsSerializer(queryset, many=True).data)
+        rows = queryset.values(*RedditPostsSerializer.values_lookups())
+        rows_json = ORJSONRenderer().render(RedditPostsSerializer().represent_values(rows))
+
+        self.assertEqual(rows_json, instances_json)
+
+    def test_endpoint_returns_the_serialized_posts(self):
+        response = self.client.get("/reddit/posts/", {"pagination": "cursor"})
+        queryset = RedditPosts.objects.order_by("-created_on", "-id")
+
+        self.assertEqual(response.json()["results"], json.loads(JSONRenderer().render(RedditPostsSerializer(queryset, many=True).data)))
+
+@override_settings(CACHES=DUMMY_CACHES)
+class RedditPostsConditionalGetTest(TestCase):
+    """Polls the reddit posts endpoint with the ETag and Last-Modified validators of earlier responses."""
+    def setUp(self):
+        RedditPosts.objects.create(
+            id="e1", subreddit=Subreddit.objects.create(name="etags"), title="Cached", created_on=timezone.now())
+        IngestionRun.objects.create(source="reddit").finish()
+
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username="etags"))
+
+    def test_unchanged_data_is_not_modified(self):
+        response = self.client.get("/reddit/posts/", {"subreddit": "etags"})
+        self.assertEqual(response.status_code, 200)
+
+        with CaptureQueriesContext(connection) as context:
+            etag_response = self.client.get("/reddit/posts/", {"subreddit": "etags"}, HTTP_IF_NONE_MATCH=response["ETag"])
+            date_response = self.client.get("/reddit/posts/", {"subreddit": "etags"}, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+
+        self.assertEqual((etag_response.status_code, date_response.status_code), (304, 304))
+        self.assertEqual(etag_response["ETag"], response["ETag"])
+        self.assertFalse([query for query in context.captured_queries if "redditposts" in query["sql"]])
+
+    def test_validators_change_with_the_filters_and_ingestion_runs(self):
+        etag = self.client.get("/reddit/posts/", {"subreddit": "etags"})["ETag"]
+        self.assertEqual(self.client.get("/reddit/posts/", {"subreddit": "other"}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        IngestionRun.objects.create(source="reddit").finish()
+        response = self.client.get("/reddit/posts/", {"subreddit": "etags"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "reddit-query-cache"}})
+class RedditPostsQueryCacheTest(TestCase):
+    """Repeats filtered requests of the reddit posts endpoint against the query result cache."""
+    def setUp(self):
+        cache.clear()
+        RedditPosts.objects.create(
+            id="r1", subreddit=Subreddit.objects.create(name="cached"), title="First", created_on=timezone.now())
+
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username="cached", is_staff=True))
+
+    def get_posts(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/reddit/posts/", params)
+
+        return response, [query for query in context.captured_queries if "redditposts" in query["sql"]]
+
+    def test_repeated_queries_are_read_from_the_cache(self):
+        response, queries = self.get_posts({"subreddit": "cached", "page_size": 10})
+        self.assertTrue(queries)
+
+        # The same query with its parameters in a different order is a cache hit:
+        cached_response, queries = self.get_posts({"page_size": 10, "subreddit": "cached"})
+        self.assertEqual(queries, [])
+        self.assertEqual(cached_response.json(), response.json())
+
+        stats = self.client.get("/api_core/cache_stats/").json()
+        self.assertEqual((stats["reddit"]["hits"], stats["reddit"]["misses"]), (1, 1))
+
+    def test_finished_ingestion_runs_invalidate_the_cache(self):
+        self.get_posts({"subreddit": "cached"})
+        RedditPosts.objects.create(
+            id="r2", subreddit=Subreddit.objects.get(name="cached"), title="Second", created_on=timezone.now())
+        IngestionRun.objects.create(source="reddit").finish()
+
+        response, queries = self.get_posts({"subreddit": "cached"})
+        self.assertTrue(queries)
+        self.assertEqual([post["id"] for post in response.json()["results"]], ["r2", "r1"])
+
+@override_settings(CACHES=DUMMY_CACHES)
+class RedditDailyRollupTest(TestCase):
+    """Maintains the daily rollups of posts and serves them from the reddit stats endpoint."""
+    def setUp(self):
+        self.subreddit = Subreddit.objects.create(name="rollups")
+        self.days = [datetime.date(2022, 3, 1), datetime.date(2022, 3, 2)]
+        for index, (day, hour) in enumerate([(0, 0), (0, 23), (1, 12)]):
+            RedditPosts.objects.create(
+                id=f"d{index}", subreddit=self.subreddit, title=f"Post {index}", score=10 * (index + 1), num_comments=index,
+                upvote_ratio=0.5, created_on=datetime.datetime.combine(self.days[day], datetime.time(hour), tzinfo=datetime.timezone.utc))
+
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username="rollups"))
+
+    def rollup_values(self):
+        return list(RedditDailyRollup.objects.order_by("day").values_list("day", "post_count", "total_score", "average_score", "total_comments"))
+
+    def test_only_touched_buckets_are_recomputed(self):
+        refresh_reddit_daily_rollups({(self.subreddit.id, day) for day in self.days})
+        self.assertEqual(self.rollup_values(), [(self.days[0], 2, 30, 15.0, 1), (self.days[1], 1, 30, 30.0, 2)])
+
+        # Changing a post of each day but only refreshing the second day:
+        RedditPosts.objects.filter(id__in=["d0", "d2"]).update(score=100)
+        refresh_reddit_daily_rollups({(self.subreddit.id, self.days[1])})
+        self.assertEqual(self.rollup_values(), [(self.days[0], 2, 30, 15.0, 1), (self.days[1], 1, 100, 100.0, 2)])
+
+        # Buckets without posts are removed:
+        RedditPosts.objects.filter(id="d2").delete()
+        refresh_reddit_daily_rollups({(self.subreddit.id, self.days[1])})
+        self.assertEqual(len(self.rollup_values()), 1)
+
+    def test_stats_endpoint_filters(self):
+        refresh_reddit_daily_rollups({(self.subreddit.id, day) for day in self.days})
+
+        response = self.client.get("/reddit/stats/", {"subreddit": "rollups", "start_date": "2022-03-02"})
+        self.assertEqual(response.json()["results"], [{
+            "subreddit": "rollups", "day": "2022-03-02", "post_count": 1, "total_score": 30, "average_score": 30.0,
+            "total_comments": 2, "average_comments": 2.0, "average_upvote_ratio": 0.5}])
+
+        response = self.client.get("/reddit/stats/", {"end_date": "2022-03-02", "fields": "day,post_count"})
+        self.assertEqual(response.json()["results"], [{"day": "2022-03-02", "post_count": 1}, {"day": "2022-03-01", "post_count": 2}])
+
+@override_settings(CACHES=DUMMY_CACHES)
+class SubredditActivityTest(TestCase):
+    """Lists the subreddits with the volume and recency of their posts."""
+    def setUp(self):
+        active, quiet = Subreddit.objects.create(name="active"), Subreddit.objects.create(name="quiet")
+        Subreddit.objects.create(name="empty")
+
+        now = timezone.now()
+        for index, (subreddit, age) in enumerate([(active, 1), (active, 5), (active, 48), (quiet, 72)]):
+            RedditPosts.objects.create(
+                id=f"s{index}", subreddit=subreddit, title=f"Post {index}", created_on=now - datetime.timedelta(hours=age))
+
+        refresh_reddit_daily_rollups(RedditPosts.objects.values_list("subreddit_id", "created_on__date"))
+        self.latest_post_on = {"active": now - datetime.timedelta(hours=1), "quiet": now - datetime.timedelta(hours=72)}
+        self.client = APIClient()
+
+    def test_subreddits_are_listed_with_their_activity_in_one_query(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/reddit/subreddits/")
+
+        activity = {
+            subreddit["name"]: (subreddit["post_count"], subreddit["posts_last_24h"], subreddit["latest_post_on"])
+            for subreddit in response.json()
+        }
+        self.assertEqual(activity, {
+            "active": (3, 2, self.latest_post_on["active"].isoformat().replace("+00:00", "Z")),
+            "empty": (0, 0, None),
+            "quiet": (1, 0, self.latest_post_on["quiet"].isoformat().replace("+00:00", "Z"))
+        })
+        self.assertEqual(len([query for query in context.captured_queries if "reddit_api_subreddit" in query["sql"]]), 1)
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "reddit-subreddits"}})
+class SubredditActivityFreshnessTest(TestCase):
+    """Polls the subreddits endpoint, whose posts of the last 24 hours change without an ingestion run."""
+    def setUp(self):
+        cache.clear()
+        self.subreddit = Subreddit.objects.create(name="fresh")
+        IngestionRun.objects.create(source="reddit").finish()
+
+        self.clock = mock.Mock(**{"time.return_value": time.time()})
+        self.client = APIClient()
+
+    def get_subreddits(self, **headers):
+        with mock.patch("api_core.caching.time", self.clock):
+            return self.client.get("/reddit/subreddits/", **headers)
+
+    def test_posts_of_the_last_24_hours_are_revalidated_every_hour(self):
+        response = self.get_subreddits()
+        self.assertEqual(response.json()[0]["posts_last_24h"], 0)
+
+        # A post written outside of an ingestion run is not served until the hour ends:
+        RedditPosts.objects.create(id="f1", subreddit=self.subreddit, title="Fresh", created_on=timezone.now())
+        self.assertEqual(self.get_subreddits(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.get_subreddits().json()[0]["posts_last_24h"], 0)
+
+        self.clock.time.return_value += 60 * 60
+        refreshed_response = self.get_subreddits(HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(refreshed_response.status_code, 200)
+        self.assertNotEqual(refreshed_response["ETag"], response["ETag"])
+        self.assertEqual(refreshed_response.json()[0]["posts_last_24h"], 1)
+
+@skipUnless(connection.vendor == "postgresql", "The inserted/updated split is read from xmax on postgres")
+class RedditBulkUpsertTest(TestCase):
+    """Writes reddit posts with the INSERT ... ON CONFLICT statement of 'bulk_upsert_reddit_posts'."""
+    def setUp(self):
+        self.subreddit = Subreddit.objects.create(name="upserts")
+
+    def post(self, post_id, score):
+        return {
+            "id": post_id, "subreddit": self.subreddit, "title": f"Post {post_id}", "score": score, "listings": ["top"],
+            "created_on": datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)}
+
+    def row_location(self, post_id):
+        """Returns the physical location of a row, which changes whenever the row is rewritten by an UPDATE."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT ctid FROM redditposts WHERE id = %s", [post_id])
+            return cursor.fetchone()[0]
+
+    def test_inserted_and_updated_rows_are_split(self):
+        self.assertEqual(bulk_upsert_reddit_posts([self.post("u1", 1), self.post("u2", 2)]), (2, 0))
+        self.assertEqual(bulk_upsert_reddit_posts([self.post("u2", 20), self.post("u3", 3)]), (1, 1))
+        self.assertEqual(RedditPosts.objects.get(id="u2").score, 20)
+
+        # Posts repeated within a batch are written once, the last one wins:
+        self.assertEqual(bulk_upsert_reddit_posts([self.post("u4", 4), self.post("u4", 40)]), (1, 0))
+        self.assertEqual(RedditPosts.objects.get(id="u4").score, 40)
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        bulk_upsert_reddit_posts([self.post("u1", 1), self.post("u2", 2)])
+        locations = {post_id: self.row_location(post_id) for post_id in ["u1", "u2"]}
+
+        self.assertEqual(bulk_upsert_reddit_posts([self.post("u1", 1), self.post("u2", 5)]), (0, 1))
+        self.assertEqual(self.row_location("u1"), locations["u1"])
+        self.assertNotEqual(self.row_location("u2"), locations["u2"])
+
+class FakeClock(object):
+    """A clock that replaces the 'time' module of the rate limiters, its time only advances when it sleeps."""
+    def __init__(self, now=1650000000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@skipUnless(fakeredis is not None, "The rate limiting tests require fakeredis")
+class RedditRateLimiterTest(TestCase):
+    """Draws tokens from the redis token bucket of the RedditRateLimiter."""
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("data_APIs.reddit_api.rate_limiting.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.connection = fakeredis.FakeRedis()
+        self.rate_limiter = RedditRateLimiter("test:ratelimit", capacity=3, window=60, connection=self.connection)
+
+    def remaining(self):
+        return int(self.connection.get("test:ratelimit:remaining"))
+
+    def test_bucket_refills_after_the_window(self):
+        self.assertEqual(self.rate_limiter.try_acquire(2), 0)
+
+        # Over budget, the wait is the time left until the end of the window:
+        self.assertEqual(self.rate_limiter.try_acquire(2), 60)
+        self.clock.now += 45
+        self.assertEqual(self.rate_limiter.try_acquire(2), 15)
+        self.assertEqual(self.remaining(), 1)
+
+        self.clock.now += 15
+        self.assertEqual(self.rate_limiter.try_acquire(2), 0)
+        self.assertEqual(self.rate_limiter.acquired, 4)
+
+    def test_more_tokens_than_the_capacity_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.rate_limiter.acquire(4)
+        with self.assertRaises(ValueError):
+            async_to_sync(_acquire)(self.rate_limiter, 4)
+
+        # The bucket was not touched:
+        self.assertEqual(self.connection.get("test:ratelimit:remaining"), None)
+        self.assertEqual(self.rate_limiter.acquired, 0)
+
+    def test_acquire_blocks_until_the_refill_or_the_timeout(self):
+        self.assertTrue(self.rate_limiter.acquire(3))
+
+        self.assertFalse(self.rate_limiter.acquire(blocking=False))
+        self.assertFalse(self.rate_limiter.acquire(timeout=10))
+        self.assertEqual(self.clock.sleeps, [])
+
+        self.assertTrue(self.rate_limiter.acquire(timeout=90))
+        self.assertEqual(self.clock.sleeps, [60])
+        self.assertEqual(self.rate_limiter.acquired, 4)
+
+    def test_sync_clamps_the_bucket_to_the_response_headers(self):
+        self.rate_limiter.try_acquire(1)
+
+        # The lowest remaining value of the window is kept, a stale header can not raise the budget:
+        self.rate_limiter.sync(1.0, self.clock.now + 30)
+        self.assertEqual(self.remaining(), 1)
+        self.rate_limiter.sync(2.0, self.clock.now + 30)
+        self.assertEqual(self.remaining(), 1)
+
+        self.assertEqual(self.rate_limiter.try_acquire(1), 0)
+        self.assertEqual(self.rate_limiter.try_acquire(1), 30)
+
+        # The headers of a new window replace the bucket:
+        self.clock.now += 30
+        self.rate_limiter.sync_from_reddit(mock.Mock(auth=mock.Mock(limits={"remaining": 2.0, "reset_timestamp": self.clock.now + 60})))
+        self.assertEqual(self.remaining(), 2)
+
+@skipUnless(fakeredis is not None, "The ingestion slots require fakeredis")
+@override_settings(REDDIT_INGESTION_CONCURRENCY=1)
+class RedditIngestionTasksTest(TestCase):
+    """Runs the reddit ingestion celery tasks eagerly, with the extraction of the posts mocked."""
+    def setUp(self):
+        RedditDeveloperAccount.objects.create(dev_client_id="tasks", dev_secret="tasks", dev_user_agent="tasks")
+        self.subreddits = [Subreddit.objects.create(name="working"), Subreddit.objects.create(name="broken")]
+
+        self.connection = fakeredis.FakeRedis()
+        self.task = perform_subreddit_ingestion._get_current_object()
+        self.retry = self.task.retry
+        for patcher in [
+            mock.patch("data_APIs.reddit_api.rate_limiting.get_redis_connection", return_value=self.connection),
+            mock.patch.object(self.task, "retry", side_effect=self.retry)
+        ]:
+            self.addCleanup(patcher.stop)
+            patcher.start()
+
+        patcher = mock.patch("data_APIs.reddit_api.tasks.extract_reddit_posts", side_effect=self.extract)
+        self.addCleanup(patcher.stop)
+        self.extract_posts = patcher.start()
+
+        app_config = self.task.app.conf
+        self.addCleanup(setattr, app_config, "task_always_eager", app_config.task_always_eager)
+        app_config.task_always_eager = True
+
+        self.failures = {"working": 0, "broken": 100}
+
+    def extract(self, subreddits=None, **kwargs):
+        """Mocks 'extract_reddit_posts', raising the number of 'failures' of the subreddit before succeeding."""
+        # Every ingestion holds a slot while it runs:
+        self.assertEqual(self.connection.zcard("reddit:ingestion:slots"), 1)
+
+        name = subreddits[0].name
+        if self.failures[name] > 0:
+            self.failures[name] -= 1
+            raise RuntimeError(f"{name} failed")
+
+        return 2, 1
+
+    def retry_countdowns(self):
+        return [call.kwargs["countdown"] for call in self.task.retry.call_args_list]
+
+    def test_chord_records_the_totals_of_every_subreddit(self):
+        self.failures["broken"] = 0
+        perform_reddit_ingestion()
+
+        ingestion_run = IngestionRun.objects.get()
+        self.assertEqual(ingestion_run.status, "succeeded")
+        self.assertEqual(self.retry_countdowns(), [])
+
+        # One subtask was run for each subreddit as part of the run:
+        calls = self.extract_posts.call_args_list
+        self.assertEqual(sorted(call.kwargs["subreddits"][0].name for call in calls), ["broken", "working"])
+        self.assertEqual({call.kwargs["run_id"] for call in calls}, {str(ingestion_run.run_id)})
+        self.assertEqual(self.connection.zcard("reddit:ingestion:slots"), 0)
+
+    def test_failed_ingestion_is_retried_with_a_backoff(self):
+        self.failures["working"] = 2
+        result = perform_subreddit_ingestion.apply(args=(self.subreddits[0].id, ["top", "hot"])).get()
+
+        self.assertEqual(result, {"subreddit": "working", "post_filters": ["top", "hot"], "inserted": 2, "updated": 1, "error": None})
+        self.assertEqual(self.retry_countdowns(), [30, 60])
+
+    def test_callback_receives_the_error_once_the_retries_are_exhausted(self):
+        perform_reddit_ingestion()
+
+        self.assertEqual(self.retry_countdowns(), [30, 60, 120])
+        ingestion_run = IngestionRun.objects.get()
+        self.assertEqual(ingestion_run.status, "failed")
+        self.assertEqual(ingestion_run.error, "broken: RuntimeError('broken failed')")
+        self.assertEqual(self.connection.zcard("reddit:ingestion:slots"), 0)
+
+    def test_task_is_retried_while_the_slots_are_taken(self):
+        holder = ConcurrencyLimiter("reddit:ingestion:slots", limit=1, connection=self.connection)
+        holder.acquire(blocking=False)
+
+        def release_and_retry(*args, **kwargs):
+            holder.release()
+            return self.retry(*args, **kwargs)
+
+        self.task.retry.side_effect = release_and_retry
+        result = perform_subreddit_ingestion.apply(args=(self.subreddits[0].id, ["top"])).get()
+
+        self.assertEqual(result["inserted"], 2)
+        self.task.retry.assert_called_once_with(countdown=15, max_retries=None)
+
+class FakeCommentForest(list):
+    """A stand-in for the praw CommentForest of a submission whose 'MoreComments' are already resolved."""
+    replace_more_limit = None
+
+    def replace_more(self, limit):
+        self.replace_more_limit = limit
+        return []
+
+def _comment(comment_id, parent_id, depth, replies=()):
+    """Creates a stand-in for a praw comment."""
+    return SimpleNamespace(
+        id=comment_id, parent_id=parent_id, author=SimpleNamespace(name="alice"), body=f"Comment {comment_id}", score=1,
+        depth=depth, created_utc=1650000000.0, stickied=False, is_submitter=False, replies=list(replies))
+
+class RedditCommentExtractionTest(TestCase):
+    """Walks a comment forest and writes its comments in batches."""
+    def setUp(self):
+        self.post = RedditPosts.objects.create(id="p1", subreddit=Subreddit.objects.create(name="comments"), created_on=timezone.now())
+        self.forest = FakeCommentForest([
+            _comment("c1", "t3_p1", 0, [_comment("c2", "t1_c1", 1, [_comment("c4", "t1_c2", 2)])]),
+            _comment("c3", "t3_p1", 0, [_comment("c5", "t1_c3", 1)])
+        ])
+
+        patcher = mock.patch("data_APIs.reddit_api.comment_extraction.praw.Reddit")
+        self.addCleanup(patcher.stop)
+        patcher.start().return_value.submission.return_value = SimpleNamespace(comments=self.forest)
+
+    def extract(self, **kwargs):
+        return extract_reddit_comments(
+            dev_client_id="comments", dev_secret="comments", dev_user_agent="comments tests", posts=[self.post],
+            rate_limiter=mock.Mock(), **kwargs)
+
+    def test_forest_is_written_in_batches(self):
+        with mock.patch("data_APIs.reddit_api.comment_extraction.load_reddit_comments", wraps=load_reddit_comments) as load:
+            self.assertEqual(self.extract(batch_size=2, replace_more_limit=4), (5, 0))
+
+        # The forest is walked breadth first and flushed every two comments:
+        batches = [[comment["id"] for comment in call.args[0]] for call in load.call_args_list]
+        self.assertEqual(batches, [["c1", "c3"], ["c2", "c5"], ["c4"]])
+        self.assertEqual(self.forest.replace_more_limit, 4)
+
+        self.assertEqual(dict(RedditComment.objects.values_list("id", "parent_id")), {
+            "c1": "t3_p1", "c2": "t1_c1", "c3": "t3_p1", "c4": "t1_c2", "c5": "t1_c3"})
+        self.assertEqual(set(RedditComment.objects.values_list("post_id", "author__name")), {("p1", "alice")})
+
+    def test_unbounded_replace_more_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.extract(replace_more_limit=None)
+
+        self.assertIsNone(self.forest.replace_more_limit)
+        self.assertFalse(RedditComment.objects.exists())
+
+def _dump_line(post_id, subreddit, author="alice", title=None):
+    """Creates a line of a Pushshift dump of reddit submissions."""
+    record = {
+        "id": post_id, "subreddit": subreddit, "title": title or f"Post {post_id}", "selftext": "", "score": 1,
+        "num_comments": 0, "created_utc": 1650000000, "author": author, "permalink": f"/r/{subreddit}/comments/{post_id}/"}
+    return json.dumps(record).encode("utf-8") + b"\n"
+
+class RedditBackfillTest(TestCase):
+    """Loads dumps of reddit submissions with the 'reddit_backfill' command."""
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        self.subreddit = Subreddit.objects.create(name="Backfill")
+        self.lines = [_dump_line(f"b{index}", "backfill") for index in range(5)]
+
+        self.command = RedditBackfillCommand()
+        self.command.subreddit_ids = {"backfill": self.subreddit.id}
+        self.command.create_subreddits = False
+
+    def write_dump(self, name, lines):
+        dump_path = os.path.join(self.directory.name, name)
+        with (gzip.open(dump_path, "wb") if name.endswith(".gz") else open(dump_path, "wb")) as dump:
+            dump.writelines(lines)
+
+        return dump_path
+
+    def backfill(self, dump_path):
+        call_command("reddit_backfill", dump_path, chunk_size=2, stdout=io.StringIO())
+
+    def interrupt_after(self, chunks):
+        """Patches the COPY of the backfill to fail after a number of chunks were loaded."""
+        loaded = []
+        def copy_posts(posts):
+            if len(loaded) == chunks:
+                raise RuntimeError("interrupted")
+            loaded.append(posts)
+            return copy_reddit_posts(posts)
+
+        return mock.patch("data_APIs.reddit_api.management.commands.reddit_backfill.copy_reddit_posts", side_effect=copy_posts)
+
+    def post_ids(self):
+        return sorted(RedditPosts.objects.values_list("id", flat=True))
+
+    def test_records_are_mapped_onto_posts(self):
+        post = self.command.map_record(_dump_line("m1", "BACKFILL", author="[deleted]", title="caf\u00e9"))
+        self.assertEqual(
+            {field: post[field] for field in ["id", "subreddit_id", "title", "author", "listings", "permalink"]},
+            {"id": "m1", "subreddit_id": self.subreddit.id, "title": "caf\u00e9", "author": None, "listings": [],
+                "permalink": "/r/BACKFILL/comments/m1/"})
+        self.assertEqual(post["created_on"], datetime.datetime(2022, 4, 15, 5, 20, tzinfo=datetime.timezone.utc))
+
+        # Invalid utf-8 is replaced, lines that are not submissions are skipped:
+        self.assertEqual(self.command.map_record(b'{"id": "m2", "subreddit": "backfill", "title": "caf\xe9", "created_utc": 1}')["title"], "caf\ufffd")
+        self.assertIsNone(self.command.map_record(b"not json\n"))
+        self.assertIsNone(self.command.map_record(b'{"id": "m3", "subreddit": "backfill"}'))
+
+    def test_unknown_subreddits_are_skipped_or_created(self):
+        self.assertIsNone(self.command.map_record(_dump_line("m1", "Unknown")))
+        self.assertFalse(Subreddit.objects.filter(name="Unknown").exists())
+
+        self.command.create_subreddits = True
+        posts = [self.command.map_record(_dump_line(post_id, "Unknown")) for post_id in ["m1", "m2"]]
+        self.assertEqual({post["subreddit_id"] for post in posts}, {Subreddit.objects.get(name="Unknown").id})
+
+    def test_interrupted_dump_is_resumed_from_its_byte_offset(self):
+        dump_path = self.write_dump("RS.ndjson", self.lines)
+        with self.interrupt_after(1), self.assertRaises(RuntimeError):
+            self.backfill(dump_path)
+
+        checkpoint = RedditBackfillCheckpoint.objects.get()
+        self.assertEqual((checkpoint.offset, checkpoint.byte_offset), (2, len(self.lines[0] + self.lines[1])))
+        self.assertEqual(self.post_ids(), ["b0", "b1"])
+        self.assertEqual(IngestionRun.objects.get().status, "failed")
+
+        # Replacing the two loaded lines by a single line of the same length, only seeking past their bytes 
+        # (and not skipping two lines) resumes at the first line that was not loaded:
+        self.write_dump("RS.ndjson", [b"x" * (checkpoint.byte_offset - 1) + b"\n"] + self.lines[2:])
+        self.backfill(dump_path)
+
+        checkpoint.refresh_from_db()
+        self.assertEqual(self.post_ids(), ["b0", "b1", "b2", "b3", "b4"])
+        self.assertEqual(
+            (checkpoint.offset, checkpoint.byte_offset, checkpoint.rows_loaded, checkpoint.completed),
+            (5, len(b"".join(self.lines)), 5, True))
+
+    def test_interrupted_compressed_dump_is_resumed_by_skipping_lines(self):
+        dump_path = self.write_dump("RS.ndjson.gz", self.lines)
+        with self.interrupt_after(1), self.assertRaises(RuntimeError):
+            self.backfill(dump_path)
+
+        with mock.patch.object(RedditBackfillCommand, "map_record", autospec=True, side_effect=RedditBackfillCommand.map_record) as map_record:
+            self.backfill(dump_path)
+
+        self.assertEqual(map_record.call_count, 3)
+        self.assertEqual(self.post_ids(), ["b0", "b1", "b2", "b3", "b4"])
+        self.assertEqual(RedditBackfillCheckpoint.objects.get().byte_offset, len(b"".join(self.lines)))
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "reddit-backfill"}})
+    def test_backfill_changes_the_etag_of_the_posts(self):
+        cache.clear()
+        IngestionRun.objects.create(source="reddit").finish()
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username="backfill"))
+        etag = client.get("/reddit/posts/")["ETag"]
+
+        self.backfill(self.write_dump("RS.ndjson", self.lines))
+
+        response = client.get("/reddit/posts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 5)
+
+        # The backfill is recorded as a run with a write stage per chunk:
+        ingestion_run = IngestionRun.objects.latest("started_on")
+        self.assertEqual((ingestion_run.status, ingestion_run.rows_written, ingestion_run.stages.count()), ("succeeded", 5, 3))
@@ -6,7 +6,7 @@ from django.urls import path, include
 #router = routers.DefaultRouter()
 
 # Importing Reddit API Viewsets:
-from .views import reddit_posts, subreddits
+from .views import reddit_posts, reddit_posts_export, reddit_stats, subreddits
 
 # Adding reddit REST API routes to the router:
 #router.register(r"posts", RedditPostsAPI, basename="RedditPosts")
@@ -14,6 +14,8 @@ from .views import reddit_posts, subreddits
 # Creating Automatic URL Routing:
 urlpatterns = [
     path(r"subreddits/", subreddits, name="Subreddits"),
-    path(r"posts/", reddit_posts, name="Reddit Posts")
+    path(r"posts/", reddit_posts, name="Reddit Posts"),
+    path(r"posts/export/", reddit_posts_export, name="Reddit Posts Export"),
+    path(r"stats/", reddit_stats, name="Reddit Stats")
 ]
     
\ No newline at end of file
@@ -1,6 +1,12 @@
 # Native Django Imports:
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db.models import Count, Sum, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Importing native packages:
+from datetime import timedelta
 
 # DRF Imports:
 from rest_framework import viewsets, status
@@ -12,10 +18,12 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
 # Importing Reddit Models, Serializers, Filters and Paginators:
-from .models import RedditPosts, RedditDeveloperAccount, Subreddit
-from .serializers import RedditPostsSerializer, SubredditSerializer
-from .filters import RedditPostFilter
-from .pagination import RedditEndpointPagination
+from .models import RedditPosts, RedditDeveloperAccount, Subreddit, RedditDailyRollup
+from .serializers import RedditPostsSerializer, RedditPostsSearchSerializer, SubredditSerializer, RedditDailyRollupSerializer
+from .filters import RedditPostFilter, RedditDailyRollupFilter
+from .pagination import RedditEndpointPagination, RedditCursorPagination, RedditStatsPagination
+from .exports import EXPORT_FORMATS, iter_post_rows, iter_gzip
+from api_core.caching import ingestion_conditional_view, ingestion_cached_view
 
 # Importing schema documentation methods:
 from drf_yasg import openapi
@@ -60,16 +68,59 @@ def queryset_datetime_filter(queryset, start_date, end_date):
     
     return queryset
 
+def annotate_subreddit_activity(queryset, since):
+    """A method that annotates a Subreddit queryset with the volume and recency of the posts of each
+    subreddit, computed in the same query as the subreddits:
+
+        post_count: The number of posts, the sum of the RedditDailyRollup post counts of the subreddit.
+
+        latest_post_on: The 'created_on' of the newest post, read from the (subreddit, created_on) index.
+
+        recent_post_count: The number of posts created after 'since', a range of the same index.
+
+    Each annotation is a correlated subquery that is served by an index or the rollup rows, so the 
+    query does not aggregate the posts of every subreddit.
+
+    Args:
+        queryset (models.QuerySet): The Subreddit queryset.
+
+        since (datetime.datetime): The start of the window of the 'recent_post_count'.
+
+    Returns:
+        models.QuerySet: The annotated queryset.
+
+    """
+    posts = RedditPosts.objects.filter(subreddit=OuterRef("pk")).order_by()
+    rollups = RedditDailyRollup.objects.filter(subreddit=OuterRef("pk")).order_by()
+
+    return queryset.annotate(
+        post_count=Coalesce(
+            Subquery(rollups.values("subreddit").annotate(total=Sum("post_count")).values("total"), output_field=IntegerField()), 0),
+        latest_post_on=Subquery(posts.order_by("-created_on").values("created_on")[:1]),
+        recent_post_count=Coalesce(
+            Subquery(posts.filter(created_on__gte=since).values("subreddit").annotate(total=Count("id")).values("total"), output_field=IntegerField()), 0)
+    )
+
+# The maximum number of seconds that the response of the subreddits endpoint is cached for:
+SUBREDDITS_MAX_AGE = 60 * 60
+
 # Describing the Schema parameters for the api view:
-schema_description="The endpoint that provides a list of all supported subreddits for the reddit posts endpoint."
+schema_description="The endpoint that provides a list of all supported subreddits for the reddit posts endpoint, with the number of posts of each subreddit, the date of its latest post and the number of posts of the last 24 hours. The response is cached until the next reddit ingestion run finishes or for at most an hour, so the posts of the last 24 hours may be up to an hour out of date."
 @swagger_auto_schema(method="get", operation_description=schema_description)
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedOrReadOnly])
+@ingestion_conditional_view("reddit", max_age=SUBREDDITS_MAX_AGE)
+@ingestion_cached_view("reddit", max_age=SUBREDDITS_MAX_AGE)
 def subreddits(request):
     """The basic API endpoint that generates a list of subreddits when queried.
+
+    Each subreddit is returned with its 'post_count', the 'latest_post_on' date of its newest post and 
+    the 'posts_last_24h' created in the 24 hours before the response, all read in a single query. The 
+    response is cached until the next reddit ingestion run finishes or the hour ends, whichever is first,
+    as the 'posts_last_24h' change with time even if no posts are ingested.
     """
-    # Querying all subreddits:
-    queryset = Subreddit.objects.all()
+    # Querying all subreddits with the volume and recency of their posts:
+    queryset = annotate_subreddit_activity(Subreddit.objects.order_by("name"), timezone.now() - timedelta(hours=24))
 
     # Seralizing the data into a JSON response and returning the data:
     seralized_queryset = SubredditSerializer(queryset, many=True, context={'request': request})
@@ -78,6 +129,14 @@ def subreddits(request):
 
 # Describing the Schema parameters for the api view:
 parameter_schema = [
+            openapi.Parameter(
+                "q",
+                openapi.IN_QUERY,
+                description="A full text search of the title and content of the posts. Every term is required, \"quoted phrases\" match their words in order and terms ending in * match words starting with the term eg: \"interest rates\" inflat*. Posts are ordered by relevance and returned with their search_rank and a search_headline of the matched terms.",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+
             openapi.Parameter(
                 "title",
                 openapi.IN_QUERY,
@@ -85,6 +144,14 @@ parameter_schema = [
                 type=openapi.TYPE_STRING,
                 required=False
             ),
+
+            openapi.Parameter(
+                "title_icontains",
+                openapi.IN_QUERY,
+                description="The case insensitive version of the title filter. Posts with a title that contains this value, ignoring case, will be returned.",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
             
             openapi.Parameter(
                 "content",
@@ -117,6 +184,14 @@ parameter_schema = [
                 required=False
             ),
 
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="A comma separated list of the fields to return eg: id,title,score,created_on. Only the requested fields are read from the database and returned. Defaults to all fields.",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+
             openapi.Parameter(
                 "per_page",
                 openapi.IN_QUERY,
@@ -124,18 +199,41 @@ parameter_schema = [
                 type=openapi.TYPE_INTEGER,
                 required=False,
                 default=200
+            ),
+
+            openapi.Parameter(
+                "pagination",
+                openapi.IN_QUERY,
+                description="Set to 'cursor' to page through the posts newest first with opaque next and previous cursors instead of page numbers. Cursor pages do not include a total count and every page is equally fast to query, use it to page through large parts of the dataset.",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description="The cursor of the page to return, taken from the next or previous links of a cursor paginated response.",
+                type=openapi.TYPE_STRING,
+                required=False
             )
 
         ] 
 schema_description = "The endpoint that provides structured reddit post data for all the supported subreddits (which can be determined via the subreddit endpoint). There are various query parameters that can be used to refine the dataset. See our API documentation for more details. "
 @swagger_auto_schema(method="get", manual_parameters=parameter_schema, operation_description=schema_description)
 @api_view(["GET"])
+@ingestion_conditional_view("reddit")
+@ingestion_cached_view("reddit")
 def reddit_posts(request):
     """The API view that provides reddit posts data by processing incoming GET requests.
     
     It filters the queryset based on the url params that are provded by the incoming GET request.
+    The ETag and Last-Modified headers of the response only change when a reddit ingestion run finishes,
+    conditional requests (If-None-Match/If-Modified-Since) of unchanged data are answered with a 304.
+    The data of the responses is cached until the next reddit ingestion run finishes.
 
     Arguments:
+
+        q (str): A full text search of the title and content of the posts, ordered by relevance.
         
         title (str): The title of the reddit post can be filtered based on if it contains the string.
 
@@ -146,23 +244,189 @@ def reddit_posts(request):
         start-date (yyyy-mm-dd): Reddits Posts only on or after this date will be returned.
         
         end-date (yyyy-mm-dd): Reddits Posts up to (including) this date will be returned.
+
+        pagination (str): If 'cursor' the posts are paginated with the keyset RedditCursorPagination
+            instead of the page number RedditEndpointPagination.
+
+        fields (str): A comma separated list of the fields of the posts to return.
         
     """        
-    # Creating the queryset to be filtered:
+    # Creating the queryset to be filtered, the subreddit and author tables are joined by the values lookups:
     queryset = RedditPosts.objects.all()
 
-    # Creating and configuring pagination:
-    paginator = RedditEndpointPagination()
+    # Creating and configuring pagination, cursor pagination is opt-in:
+    if request.GET.get("pagination") == "cursor":
+        paginator = RedditCursorPagination()
+    else:
+        paginator = RedditEndpointPagination()
 
     # Applying filters based on query parameters in GET request:
     filterset = RedditPostFilter(request.GET, queryset=queryset) 
     if filterset.is_valid():
         queryset = filterset.qs
 
+    # Including the rank and headline of searches:
+    serializer_class = RedditPostsSearchSerializer if request.GET.get("q") and filterset.is_valid() else RedditPostsSerializer
+
+    # Only reading the requested fields, and the created_on date and id that the paginations order by, as values rows:
+    fields = serializer_class.get_requested_fields(request)
+    lookups = serializer_class.values_lookups(fields, required_fields=["created_on", "id"])
+
     # Paginating the queryset:
-    paginated_queryset = paginator.paginate_queryset(queryset, request)
+    paginated_rows = paginator.paginate_values(queryset, lookups, request)
     
-    # Seralizing the data into a JSON response and returning the data:
-    seralized_queryset = RedditPostsSerializer(paginated_queryset, many=True, context={'request': request})
+    # Seralizing the rows into a JSON response and returning the data:
+    seralized_rows = serializer_class(fields=fields, context={'request': request}).represent_values(paginated_rows)
     
-    return paginator.get_paginated_response(seralized_queryset.data)
\ No newline at end of file
+    return paginator.get_paginated_response(seralized_rows)
+
+# Describing the Schema parameters for the api view, the filters of the reddit posts endpoint are shared:
+parameter_schema = [parameter for parameter in parameter_schema if parameter.name not in ("fields", "per_page", "pagination", "cursor")] + [
+            openapi.Parameter(
+                "file_format",
+                openapi.IN_QUERY,
+                description="The format of the export, 'ndjson' (one JSON post per line), 'csv', 'parquet' or 'arrow' (an Arrow IPC stream). The parquet and arrow exports are zstd compressed and typed, they load directly into pandas or any other Arrow based tool. Defaults to 'ndjson'.",
+                type=openapi.TYPE_STRING,
+                required=False,
+                default="ndjson"
+            ),
+
+            openapi.Parameter(
+                "compression",
+                openapi.IN_QUERY,
+                description="Set to 'gzip' to download the export as a gzip compressed file.",
+                type=openapi.TYPE_STRING,
+                required=False
+            )
+
+        ]
+schema_description = "The endpoint that exports every reddit post matching the filters of the reddit posts endpoint in a single streamed download, without pagination."
+@swagger_auto_schema(method="get", manual_parameters=parameter_schema, operation_description=schema_description)
+@api_view(["GET"])
+@ingestion_conditional_view("reddit")
+def reddit_posts_export(request):
+    """The API view that streams all the reddit posts matching the filters of the 'reddit_posts' view
+    as a newline delimited JSON, CSV, Parquet or Arrow IPC stream file.
+
+    The posts are read through a server-side cursor in chunks of 'REDDIT_EXPORT_CHUNK_SIZE' rows and
+    encoded as they are sent, so the memory used by an export does not grow with the number of posts. The
+    parquet and arrow formats are encoded in record batches of 'REDDIT_EXPORT_BATCH_SIZE' posts.
+
+    Arguments:
+
+        file_format (str): The format of the export, 'ndjson' (the default), 'csv', 'parquet' or 'arrow'.
+
+        compression (str): If 'gzip' the export is gzip compressed.
+
+        The filters of the 'reddit_posts' view (q, title, content, subreddit, start_date and end_date) are also supported.
+
+    """
+    file_format = request.GET.get("file_format", "ndjson")
+    if file_format not in EXPORT_FORMATS:
+        return Response(
+            {"error": f"Unsupported file_format {file_format}, must be one of {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST)
+
+    # Applying filters based on query parameters in GET request:
+    queryset = RedditPosts.objects.all()
+    filterset = RedditPostFilter(request.GET, queryset=queryset)
+    if filterset.is_valid():
+        queryset = filterset.qs
+
+    # Building the stream of encoded posts:
+    content_type, extension, encoder = EXPORT_FORMATS[file_format]
+    content = encoder(iter_post_rows(queryset))
+    filename = f"reddit_posts.{extension}"
+
+    if request.GET.get("compression") == "gzip":
+        content, content_type, filename = iter_gzip(content), "application/gzip", f"{filename}.gz"
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+# Describing the Schema parameters for the api view:
+parameter_schema = [
+            openapi.Parameter(
+                "subreddit",
+                openapi.IN_QUERY,
+                description="Only the statistics of this subreddit will be returned eg: politics.",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+
+            openapi.Parameter(
+                "start_date",
+                openapi.IN_QUERY,
+                description="Only the statistics of this day and later will be returned (yyyy-mm-dd).",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+
+            openapi.Parameter(
+                "end_date",
+                openapi.IN_QUERY,
+                description="Only the statistics of this day and earlier will be returned (yyyy-mm-dd).",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="A comma separated list of the fields to return eg: subreddit,day,post_count. Defaults to all fields.",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+
+            openapi.Parameter(
+                "page_size",
+                openapi.IN_QUERY,
+                description="The number of daily statistics returned per page, at most 10000.",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+                default=1000
+            )
+        ]
+schema_description = "The endpoint that provides the daily statistics of the supported subreddits: the number of posts, their total and average score, comments and upvote ratio for each subreddit and UTC day."
+@swagger_auto_schema(method="get", manual_parameters=parameter_schema, operation_description=schema_description)
+@api_view(["GET"])
+@ingestion_conditional_view("reddit")
+@ingestion_cached_view("reddit")
+def reddit_stats(request):
+    """The API view that provides the daily post statistics of each subreddit by processing incoming GET
+    requests. The statistics are read from the RedditDailyRollup rows that the reddit ingestion maintains,
+    so they cost a read of one row per subreddit and day instead of an aggregation of the posts.
+
+    Arguments:
+
+        subreddit (str): The statistics can be filtered based on the subreddit eg: "politics".
+
+        start_date (yyyy-mm-dd): Statistics only on or after this day will be returned.
+        
+        end_date (yyyy-mm-dd): Statistics up to (including) this day will be returned.
+
+        fields (str): A comma separated list of the fields of the statistics to return.
+
+    """
+    queryset = RedditDailyRollup.objects.order_by("-day", "subreddit__name")
+
+    # Creating and configuring pagination:
+    paginator = RedditStatsPagination()
+
+    # Applying filters based on query parameters in GET request:
+    filterset = RedditDailyRollupFilter(request.GET, queryset=queryset)
+    if filterset.is_valid():
+        queryset = filterset.qs
+
+    # Only reading the requested fields as values rows:
+    fields = RedditDailyRollupSerializer.get_requested_fields(request)
+    lookups = RedditDailyRollupSerializer.values_lookups(fields)
+
+    # Paginating the queryset:
+    paginated_rows = paginator.paginate_values(queryset, lookups, request)
+
+    # Seralizing the rows into a JSON response and returning the data:
+    seralized_rows = RedditDailyRollupSerializer(fields=fields, context={'request': request}).represent_values(paginated_rows)
+
+    return paginator.get_paginated_response(seralized_rows)
@@ -6,6 +6,7 @@ import time
 
 # Importing models:
 from .models import TwitterDeveloperAccount, TwitterRegion, TrendingTwitterTopic
+from api_core.models import track_stage
 
 # Function that gets all the avalible regions of the API and writing regions to the database:
 def extract_twitter_regions(**kwargs):
@@ -78,6 +79,9 @@ def extract_trending_topics(**kwargs):
 
         locations (QuerySet): A list of TwitterRegion objects dictating where to pull data from.
 
+        ingestion_run (IngestionRun): Optional ingestion run that the fetch, serialize and write stages
+            of each location are recorded on.
+
     """
     # Unpacking kwargs:
     API_KEY = kwargs.get("api_key")
@@ -85,6 +89,7 @@ def extract_trending_topics(**kwargs):
     ACCESS_TOKEN = kwargs.get("access_token")
     ACCESS_TOKEN_SECRET = kwargs.get("access_token_secret")
     locations = kwargs.get("locations")
+    ingestion_run = kwargs.get("ingestion_run")
     
     # Autenticating and creating API:
     auth = tweepy.OAuthHandler(API_KEY, API_SECRET_KEY)
@@ -94,29 +99,34 @@ def extract_trending_topics(**kwargs):
     # Performing data extraction and ingestion:
     for location in locations:
         # Querying trending topics"
-        topics = api.get_place_trends(location.woeid)
+        with track_stage(ingestion_run, "fetch", location.name) as stage:
+            topics = api.get_place_trends(location.woeid)
+            stage.api_calls = 1
+            stage.rows = len(topics[0]["trends"])
 
         # Extracting variables:
         created_at = topics[0]["created_at"]
         woeid = topics[0]["locations"][0]["woeid"]
 
-        topic_objs = [
-            TrendingTwitterTopic(
-                name = topic["name"],
-                url = topic["url"],
-                promoted_content = topic["promoted_content"],
-                topic_query = topic["query"],
-                tweet_volume = topic["tweet_volume"],
-                created_at = created_at,
-                location = location
-
-            ) for topic in topics[0]["trends"]
-        ]
+        with track_stage(ingestion_run, "serialize", location.name) as stage:
+            topic_objs = [
+                TrendingTwitterTopic(
+                    name = topic["name"],
+                    url = topic["url"],
+                    promoted_content = topic["promoted_content"],
+                    topic_query = topic["query"],
+                    tweet_volume = topic["tweet_volume"],
+                    created_at = created_at,
+                    location = location
+
+                ) for topic in topics[0]["trends"]
+            ]
+            stage.rows = len(topic_objs)
 
         # Sleeping to avoid breaking twitter API rate limit:
         time.sleep(1)
 
         # Bulk creating the db objects from the list:
-        TrendingTwitterTopic.objects.bulk_create(topic_objs)
-
-
+        with track_stage(ingestion_run, "write", location.name) as stage:
+            TrendingTwitterTopic.objects.bulk_create(topic_objs)
+            stage.rows = len(topic_objs)
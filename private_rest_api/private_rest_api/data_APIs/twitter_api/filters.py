@@ -5,8 +5,13 @@ from .models import TrendingTwitterTopic
 from django_filters import rest_framework as filters
 
 class TrendingTwitterTopicFilter(filters.FilterSet):
-    """A Django Filterset for the Trending Twitter Posts API"""
+    """A Django Filterset for the Trending Twitter Posts API. 
+    
+    On postgres the 'name' and 'name_icontains' substring filters are served by the GIN trigram
+    indexes of the topic name, other database backends scan the table.
+    """
     name = filters.CharFilter(field_name="name", lookup_expr="contains")
+    name_icontains = filters.CharFilter(field_name="name", lookup_expr="icontains")
     location = filters.CharFilter(field_name="location__name", lookup_expr="exact")
     
     start_date = filters.DateTimeFilter(field_name="created_at", lookup_expr="gt")
@@ -0,0 +1,26 @@
+# Generated by Django 3.1.4 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+from api_core.operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+
+    # The indexes are built concurrently which can not be done inside a transaction:
+    atomic = False
+
+    dependencies = [
+        ('twitter_api', '0004_trigram_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='trendingtwittertopic',
+            index=models.Index(fields=['location', '-created_at'], name='trendingtopic_location_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='trendingtwittertopic',
+            index=models.Index(fields=['-created_at'], name='trendingtopic_created_idx'),
+        ),
+    ]
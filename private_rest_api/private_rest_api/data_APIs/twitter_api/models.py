@@ -113,3 +113,10 @@ class TrendingTwitterTopic(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+
+        # Indexes matching the queries of the trending topics endpoint, topics of a location newest first
+        # and all topics newest first:
+        indexes = [
+            models.Index(fields=["location", "-created_at"], name="trendingtopic_location_idx"),
+            models.Index(fields=["-created_at"], name="trendingtopic_created_idx")
+        ]
@@ -1,8 +1,8 @@
 # Importing pagination methods:
-from rest_framework import pagination
+from api_core.pagination import ValuesPageNumberPagination
 
 # Creating custom pagination for Twitter API endpoint:
-class TrendingTwitterTopicPagination(pagination.PageNumberPagination):
+class TrendingTwitterTopicPagination(ValuesPageNumberPagination):
     """A Pagination object that overrides the default PageNumberPagination to allow for
     user specified query sizes. 
     """
@@ -3,8 +3,9 @@ from rest_framework import serializers
 
 # Importing Twitter models: 
 from .models import TrendingTwitterTopic
+from api_core.serializers import DynamicFieldsModelSerializer
 
-class TrendingTwitterTopicSerializer(serializers.ModelSerializer):
+class TrendingTwitterTopicSerializer(DynamicFieldsModelSerializer):
     # Specifying the ForeginKey field on display:
     location = serializers.CharField(source="location.name")
 
@@ -6,6 +6,7 @@ from celery import shared_task
 # Importing database models and extraction methods:
 from .models import TwitterRegion, TwitterDeveloperAccount, TrendingTwitterTopic
 from .data_extraction import extract_trending_topics, extract_twitter_regions
+from api_core.models import IngestionRun
 
 @shared_task
 def perform_twitter_location_ingestion():
@@ -35,16 +36,26 @@ def perform_twitter_trending_ingestion():
     locations via the TwitterRegion object. Typically this means that the 'perform_twitter_location_ingestion'
     task needs to have executed at least once for this task to execute successfully.
 
+    The run and the stages of each location are recorded as an IngestionRun.
+
     """
     # Querying developer credentials and location:
     dev_account = TwitterDeveloperAccount.objects.first()
     locations = TwitterRegion.objects.all()
+    ingestion_run = IngestionRun.objects.create(source="twitter")
 
     # Initalizing the extracting method:
-    extract_trending_topics(
-        api_key=dev_account.api_key,
-        api_secret_key=dev_account.api_secret_key,
-        access_token=dev_account.access_token,
-        access_token_secret=dev_account.access_token_secret,
-        locations=locations
-    )
+    try:
+        extract_trending_topics(
+            api_key=dev_account.api_key,
+            api_secret_key=dev_account.api_secret_key,
+            access_token=dev_account.access_token,
+            access_token_secret=dev_account.access_token_secret,
+            locations=locations,
+            ingestion_run=ingestion_run
+        )
+    except Exception as exc:
+        ingestion_run.finish(error=repr(exc))
+        raise
+
+    ingestion_run.finish()
@@ -1,3 +1,51 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.db import connection
+from django.contrib.auth import get_user_model
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
 
-# Create your tests here.
+# Importing native packages:
+from unittest import skipUnless
+
+# Importing Twitter Database Models:
+from .models import TwitterRegion, TrendingTwitterTopic
+
+@skipUnless(connection.vendor == "postgresql", "Query plans are only checked on postgres")
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+class TrendingTopicsQueryPlanTest(TestCase):
+    """Checks that the queries of the trending topics endpoint can be served by the indexes of the
+    trending topics table. Sequential scans are disabled while the queries are explained, so a plan 
+    only contains a sequential scan of the table if no index can serve the query."""
+    def setUp(self):
+        # A topic is created so that the paginated endpoint queries the rows and not only their count:
+        location = TwitterRegion.objects.create(
+            name="Toronto", location_type="Town", parentid=23424775, country="Canada", woeid=4118, country_code="CA")
+        TrendingTwitterTopic.objects.create(
+            name="#plans", url="http://twitter.com/search?q=%23plans", topic_query="%23plans", created_at=timezone.now(),
+            location=location)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username="plans"))
+
+    def assertNoSequentialScans(self, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/twitter/trending/", params)
+
+        self.assertEqual(response.status_code, 200)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            for query in context.captured_queries:
+                if "twitter_api_trendingtwittertopic" not in query["sql"]:
+                    continue
+
+                cursor.execute(f"EXPLAIN {query['sql']}")
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                self.assertNotIn("Seq Scan on twitter_api_trendingtwittertopic", plan, f"{query['sql']}\n{plan}")
+
+    def test_location_date_range_uses_indexes(self):
+        self.assertNoSequentialScans({"location": "Toronto", "start_date": "2022-01-01", "end_date": "2022-02-01"})
+
+    def test_date_range_uses_indexes(self):
+        self.assertNoSequentialScans({"start_date": "2022-01-01"})
+        self.assertNoSequentialScans({})
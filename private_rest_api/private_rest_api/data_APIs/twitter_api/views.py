@@ -15,6 +15,7 @@ from .models import TrendingTwitterTopic
 from .filters import TrendingTwitterTopicFilter
 from .serializers import TrendingTwitterTopicSerializer
 from .pagination import TrendingTwitterTopicPagination
+from api_core.caching import ingestion_conditional_view, ingestion_cached_view
 
 # Importing schema documentation methods:
 from drf_yasg import openapi
@@ -30,6 +31,14 @@ parameter_schema=[
                 required=False
             ),
 
+            openapi.Parameter(
+                "name_icontains",
+                openapi.IN_QUERY,
+                description="The case insensitive version of the name filter. Only topics that contain this value, ignoring case, will be returned.",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+
             openapi.Parameter(
                 "location",
                 openapi.IN_QUERY,
@@ -53,6 +62,14 @@ parameter_schema=[
                 required=False
             ),
 
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="A comma separated list of the fields to return eg: name,tweet_volume,location. Only the requested fields are read from the database and returned. Defaults to all fields.",
+                type=openapi.TYPE_STRING,
+                required=False
+            ),
+
             openapi.Parameter(
                 "per_page",
                 openapi.IN_QUERY,
@@ -66,10 +83,15 @@ parameter_schema=[
 schema_description="The endpoint that provides all the trending twitter topics for all available locations. There are various query parameters that can be used to refine the dataset. See our API documentation for more details."
 @swagger_auto_schema(method="get", manual_parameters=parameter_schema, operation_description=schema_description)
 @api_view(('GET',))
+@ingestion_conditional_view("twitter")
+@ingestion_cached_view("twitter")
 def trending_twitter_topics(request):
     """The API view that provdes trending twitter topics by processing incoming GET requests.
 
     It filters the queryset based on the url params that are provded by the incoming GET request.
+    The ETag and Last-Modified headers of the response only change when a twitter ingestion run finishes,
+    conditional requests (If-None-Match/If-Modified-Since) of unchanged data are answered with a 304.
+    The data of the responses is cached until the next twitter ingestion run finishes.
 
     Arguments:
         
@@ -82,6 +104,8 @@ def trending_twitter_topics(request):
         location (str): Only trending topics from this local area will be returned. Trending
             topics are queried by the 'name' value of the twitter region. 
 
+        fields (str): A comma separated list of the fields of the trending topics to return.
+
     """
     # Creating the main queryset:
     queryset = TrendingTwitterTopic.objects.all()
@@ -94,10 +118,14 @@ def trending_twitter_topics(request):
     if filterset.is_valid():
         queryset = filterset.qs
 
+    # Only reading the requested fields as values rows:
+    fields = TrendingTwitterTopicSerializer.get_requested_fields(request)
+    lookups = TrendingTwitterTopicSerializer.values_lookups(fields)
+
     # Paginating the queryset:
-    queryset = paginator.paginate_queryset(queryset, request)
+    paginated_rows = paginator.paginate_values(queryset, lookups, request)
 
-    # Seralizing the data into a JSON response and returning the data:
-    seralized_queryset = TrendingTwitterTopicSerializer(queryset, many=True, context={'request':request})
+    # Seralizing the rows into a JSON response and returning the data:
+    seralized_rows = TrendingTwitterTopicSerializer(fields=fields, context={'request':request}).represent_values(paginated_rows)
 
-    return Response(seralized_queryset.data, status=status.HTTP_200_OK)
\ No newline at end of file
+    return Response(seralized_rows, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -89,6 +89,7 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.TokenAuthentication'],
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_RENDERER_CLASSES": ["api_core.renderers.ORJSONRenderer", "rest_framework.renderers.BrowsableAPIRenderer"],
 }
 
 
@@ -129,6 +130,47 @@ CELERY_ENABLE_UTC = True
 CELERY_TIMEZONE = "UTC"
 """
 
+# Redis Settings (shared state between celery workers eg: API rate limits):
+REDIS_URL = os.environ.get("REDIS_URL", os.environ.get("CELERY_BROKER_URL", "redis://localhost:6379/0"))
+
+# Cache Settings (the query result cache of the data APIs). Cache errors are ignored so that the data
+# APIs fall back to querying the database when redis is unavailable:
+CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": os.environ.get("CACHE_REDIS_URL", REDIS_URL),
+        "TIMEOUT": int(os.environ.get("API_CACHE_TIMEOUT", 60 * 60 * 24)),
+        "KEY_PREFIX": "private_rest_api",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "SOCKET_CONNECT_TIMEOUT": 1,
+            "SOCKET_TIMEOUT": 1,
+            "IGNORE_EXCEPTIONS": True
+        }
+    }
+}
+
+# Reddit Ingestion Settings:
+REDDIT_RATELIMIT_CAPACITY = int(os.environ.get("REDDIT_RATELIMIT_CAPACITY", 600))
+REDDIT_RATELIMIT_WINDOW = int(os.environ.get("REDDIT_RATELIMIT_WINDOW", 600))
+REDDIT_AUTHOR_REFRESH_TTL = int(os.environ.get("REDDIT_AUTHOR_REFRESH_TTL", 60 * 60 * 24 * 7))
+REDDIT_AUTHOR_REFRESH_BATCH_SIZE = int(os.environ.get("REDDIT_AUTHOR_REFRESH_BATCH_SIZE", 100))
+REDDIT_INGESTION_CONCURRENCY = int(os.environ.get("REDDIT_INGESTION_CONCURRENCY", 4))
+REDDIT_INGESTION_SLOT_TIMEOUT = int(os.environ.get("REDDIT_INGESTION_SLOT_TIMEOUT", 60 * 15))
+REDDIT_INGESTION_SLOT_RETRY_DELAY = int(os.environ.get("REDDIT_INGESTION_SLOT_RETRY_DELAY", 15))
+REDDIT_UNCHANGED_STOP_THRESHOLD = int(os.environ.get("REDDIT_UNCHANGED_STOP_THRESHOLD", 10))
+REDDIT_INGESTION_STATE_SIZE = int(os.environ.get("REDDIT_INGESTION_STATE_SIZE", 1000))
+REDDIT_ASYNC_CONCURRENCY = int(os.environ.get("REDDIT_ASYNC_CONCURRENCY", 8))
+REDDIT_COMMENT_REPLACE_MORE_LIMIT = int(os.environ.get("REDDIT_COMMENT_REPLACE_MORE_LIMIT", 32))
+REDDIT_COMMENT_BATCH_SIZE = int(os.environ.get("REDDIT_COMMENT_BATCH_SIZE", 500))
+REDDIT_COMMENT_POST_MAX_AGE = int(os.environ.get("REDDIT_COMMENT_POST_MAX_AGE", 60 * 60 * 24))
+REDDIT_LISTING_MIN_DEPTH = int(os.environ.get("REDDIT_LISTING_MIN_DEPTH", 10))
+REDDIT_LISTING_MAX_DEPTH = int(os.environ.get("REDDIT_LISTING_MAX_DEPTH", 300))
+REDDIT_LISTING_DEPTH_HISTORY = int(os.environ.get("REDDIT_LISTING_DEPTH_HISTORY", 12))
+REDDIT_LISTING_DEPTH_HEADROOM = float(os.environ.get("REDDIT_LISTING_DEPTH_HEADROOM", 1.5))
+REDDIT_EXPORT_CHUNK_SIZE = int(os.environ.get("REDDIT_EXPORT_CHUNK_SIZE", 2000))
+REDDIT_EXPORT_BATCH_SIZE = int(os.environ.get("REDDIT_EXPORT_BATCH_SIZE", 20000))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {